@@ -126,11 +126,54 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Médias nommés par leur contenu (photos/3f/a2/3fa2...jpg) : déduplication, enregistrements idempotents
+STORAGES = {
+    'default': {'BACKEND': 'identification.stockage.StockageContenu'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Envoi des images par get_image : '' (Django), 'x-sendfile' ou 'x-accel-redirect' (nginx)
+MEDIA_ENVOI = ''
+MEDIA_ACCEL_PREFIXE = '/media-interne/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Liste des membres : taille de page par défaut et maximale (?per_page=)
+MEMBRES_PAR_PAGE = 50
+MEMBRES_PAR_PAGE_MAX = 200
+
+# Images statiques des PDF : délai (secondes) entre deux vérifications de modification
+PDF_RESSOURCES_VERIFICATION = 60
+
+# Photos des membres : plus grand côté (pixels) conservé après normalisation
+PHOTO_TAILLE_MAX = 1600
+
+# Cache (fiches de vérification des cartes). Avec plusieurs processus web,
+# préférer un cache partagé (Redis, Memcached) pour que l'invalidation les atteigne tous.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'renemico',
+    }
+}
+
+# Vérification des cartes (/verifier/<code>/) : durée en cache (secondes) d'une fiche, d'un code inconnu
+VERIFICATION_CACHE_DUREE = 300
+VERIFICATION_CACHE_DUREE_INCONNU = 30
+
+# Arriérés (voir finance/arrieres.py) : cotisation mensuelle due par membre (USD),
+# durée en cache (secondes) des mois payés lus en base
+COTISATION_MENSUELLE = 10
+ARRIERES_CACHE_DUREE = 600
+
+# Signature des QR codes (voir identification/signature.py) : {numéro (0-15): clé}.
+# Vide : clé dérivée de SECRET_KEY. Conserver les anciennes clés après un renouvellement.
+QR_CLES_SIGNATURE = {}
+# QR_CLE_ACTIVE = 1
+
 
 # settings.py
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -0,0 +1,320 @@
+# finance/arrieres.py
+"""
+Arriérés de cotisation : mois dus et non payés, pour tous les membres à la fois.
+
+Un mois est dû du mois d'enregistrement du membre jusqu'au mois de la date
+d'arrêt (inclus) ; il est payé s'il existe une Contribution pour ce mois
+(une seule par membre et par mois, voir Contribution.Meta).
+
+1. Les membres sont lus en une requête (id, date d'enregistrement) et les
+   contributions en une autre, groupée par membre : GROUP_CONCAT des mois
+   (texte AAAA-MM-JJ de largeur fixe), soit une ligne par membre au lieu
+   d'une par contribution. Le texte est converti d'un bloc en indices de
+   mois (année * 12 + mois - 1) dans des tableaux NumPy. Sur les moteurs
+   sans concaténation d'agrégat (ni SQLite ni PostgreSQL), les paires
+   (membre, mois) sont lues une par ligne.
+2. Une matrice booléenne membres x mois des impayés est construite, et tout
+   (mois impayés, séries de mois consécutifs impayés, premier impayé,
+   montant dû) en est tiré par des opérations NumPy sur toute la matrice,
+   sans boucle Python par membre ni par mois.
+
+La matrice des mois payés (compactée, 1 bit par mois) est gardée dans le
+cache Django, par mois d'arrêt : les pages suivantes ne relisent pas la
+base. Elle est périmée à chaque écriture de Contribution ou de Membre
+(signals.py) ; les opérations en masse, sans signaux, sont prises en compte
+au plus tard après ARRIERES_CACHE_DUREE secondes.
+
+Mémoire du calcul : un octet par (membre, mois) de la période, plus deux
+tableaux int16 de même taille (environ 60 Mo pour 100 000 membres sur 10 ans).
+"""
+import time
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Aggregate, CharField, Count
+from django.utils import timezone
+
+from identification.models import Membre
+
+from .models import Contribution
+
+
+COTISATION_MENSUELLE = getattr(settings, 'COTISATION_MENSUELLE', 10)
+DUREE_CACHE = getattr(settings, 'ARRIERES_CACHE_DUREE', 600)
+CLE_VERSION = 'arrieres:version'
+
+LARGEUR_DATE = len('AAAA-MM-JJ')
+
+TRIS = {
+    'montant': 'montant_du',
+    'serie': 'serie_en_cours',
+    'plus_longue': 'plus_longue_serie',
+    'anciennete': 'premier_impaye',
+}
+
+
+class _ConcatMois(Aggregate):
+    """GROUP_CONCAT(mois, '') : tous les mois payés d'un membre bout à bout."""
+    function = 'GROUP_CONCAT'
+    template = "%(function)s(%(expressions)s, '')"
+    output_field = CharField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        # TO_CHAR : texte AAAA-MM-JJ quel que soit le DateStyle de la session
+        return self.as_sql(
+            compiler, connection, function='STRING_AGG',
+            template="%(function)s(TO_CHAR(%(expressions)s, 'YYYY-MM-DD'), '')",
+            **extra_context,
+        )
+
+
+def concat_disponible(conn=None):
+    return (conn or connection).vendor in ('sqlite', 'postgresql')
+
+
+def indice_mois(jour):
+    """Indice entier d'un mois : 2025-08-xx -> 2025 * 12 + 7."""
+    return jour.year * 12 + jour.month - 1
+
+
+def mois_depuis_indice(indice):
+    """Premier jour du mois d'indice `indice` (inverse de indice_mois)."""
+    annee, mois = divmod(int(indice), 12)
+    return date(annee, mois + 1, 1)
+
+
+def _indices_depuis_texte(texte):
+    """'2025-08-012025-09-01...' -> array([24307, 24308, ...])"""
+    chiffres = np.frombuffer(texte.encode('ascii'), dtype=np.uint8).reshape(-1, LARGEUR_DATE).astype(np.int32) - ord('0')
+    annees = chiffres[:, 0] * 1000 + chiffres[:, 1] * 100 + chiffres[:, 2] * 10 + chiffres[:, 3]
+    return annees * 12 + chiffres[:, 5] * 10 + chiffres[:, 6] - 1
+
+
+def charger_membres(membres):
+    """(ids triés, indice du mois d'enregistrement) des membres du queryset."""
+    lignes = membres.order_by('id').values_list('id', 'date_enregistrement')
+    ids = []
+    debuts = []
+    for membre_id, date_enregistrement in lignes.iterator(chunk_size=5000):
+        ids.append(membre_id)
+        debuts.append(indice_mois(date_enregistrement))
+    return np.array(ids, dtype=np.int64), np.array(debuts, dtype=np.int32)
+
+
+def charger_paiements():
+    """
+    Paires (membre, mois payé) de toutes les contributions, en deux tableaux
+    alignés : ids des membres et indices des mois.
+
+    Pas de filtre sur le mois : la requête parcourt alors l'index unique
+    (membre, mois) dans l'ordre du GROUP BY, sans tri ; les mois hors de la
+    période sont écartés par matrice_payes().
+    """
+    contributions = Contribution.objects.order_by()
+    if not concat_disponible():
+        ids = []
+        mois = []
+        for membre_id, jour in contributions.values_list('membre_id', 'mois').iterator(chunk_size=5000):
+            ids.append(membre_id)
+            mois.append(indice_mois(jour))
+        return np.array(ids, dtype=np.int64), np.array(mois, dtype=np.int32)
+
+    groupes = contributions.values('membre_id').annotate(nombre=Count('mois'), mois_payes=_ConcatMois('mois'))
+
+    ids = []
+    nombres = []
+    textes = []
+    for membre_id, nombre, mois_payes in groupes.values_list('membre_id', 'nombre', 'mois_payes').iterator(chunk_size=5000):
+        ids.append(membre_id)
+        nombres.append(nombre)
+        textes.append(mois_payes)
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+    return np.repeat(np.array(ids, dtype=np.int64), nombres), _indices_depuis_texte(''.join(textes))
+
+
+def matrice_payes(membre_ids, paiements_membres, paiements_mois, origine, fin):
+    """Matrice booléenne membres x mois (d'`origine` à `fin`) : vrai si le mois est payé."""
+    nombre = len(membre_ids)
+    payes = np.zeros((nombre, max(fin - origine + 1, 0)), dtype=bool)
+    lignes = np.searchsorted(membre_ids, paiements_membres)
+    retenus = (lignes < nombre) & (paiements_mois >= origine) & (paiements_mois <= fin)
+    retenus[retenus] &= membre_ids[lignes[retenus]] == paiements_membres[retenus]
+    payes[lignes[retenus], paiements_mois[retenus] - origine] = True
+    return payes
+
+
+class Arrieres:
+    """
+    Arriérés d'un ensemble de membres : tableaux NumPy alignés sur `membre_ids`
+    (triés par id, sauf après trie()).
+
+    mois_dus / mois_payes / mois_impayes : nombre de mois sur la période ;
+    serie_en_cours : mois impayés consécutifs jusqu'au mois d'arrêt ;
+    plus_longue_serie : plus longue suite de mois impayés consécutifs ;
+    premier_impaye : indice du plus ancien mois impayé (-1 : aucun).
+    """
+
+    CHAMPS = (
+        'membre_ids', 'mois_dus', 'mois_payes', 'mois_impayes',
+        'serie_en_cours', 'plus_longue_serie', 'premier_impaye',
+    )
+
+    def __init__(self, membre_ids, mois_dus, mois_payes, mois_impayes, serie_en_cours,
+                 plus_longue_serie, premier_impaye, date_arret, cotisation=COTISATION_MENSUELLE):
+        self.membre_ids = membre_ids
+        self.mois_dus = mois_dus
+        self.mois_payes = mois_payes
+        self.mois_impayes = mois_impayes
+        self.serie_en_cours = serie_en_cours
+        self.plus_longue_serie = plus_longue_serie
+        self.premier_impaye = premier_impaye
+        self.date_arret = date_arret
+        self.cotisation = cotisation
+
+    def __len__(self):
+        return len(self.membre_ids)
+
+    @property
+    def montant_du(self):
+        return self.mois_impayes.astype(np.int64) * self.cotisation
+
+    @property
+    def total_du(self):
+        return int(self.mois_impayes.sum(dtype=np.int64)) * self.cotisation
+
+    def _sous_ensemble(self, selection):
+        valeurs = {champ: getattr(self, champ)[selection] for champ in self.CHAMPS}
+        return Arrieres(**valeurs, date_arret=self.date_arret, cotisation=self.cotisation)
+
+    def en_retard(self, minimum_impayes=1, minimum_serie=0):
+        """Membres ayant au moins `minimum_impayes` mois impayés et une série en cours d'au moins `minimum_serie`."""
+        selection = self.mois_impayes >= max(minimum_impayes, 1)
+        if minimum_serie:
+            selection &= self.serie_en_cours >= minimum_serie
+        return self._sous_ensemble(selection)
+
+    def trie(self, tri='montant'):
+        """Arriérés triés (décroissant ; du plus ancien impayé pour 'anciennete'), à égalité par id."""
+        if tri == 'anciennete':
+            ordre = np.lexsort((self.membre_ids, self.premier_impaye))
+        else:
+            ordre = np.lexsort((self.membre_ids, -getattr(self, TRIS.get(tri, 'montant_du'))))
+        return self._sous_ensemble(ordre)
+
+    def ligne(self, position):
+        """Valeurs (types Python) du membre à la position `position`."""
+        premier = int(self.premier_impaye[position])
+        return {
+            'membre_id': int(self.membre_ids[position]),
+            'mois_dus': int(self.mois_dus[position]),
+            'mois_payes': int(self.mois_payes[position]),
+            'mois_impayes': int(self.mois_impayes[position]),
+            'serie_en_cours': int(self.serie_en_cours[position]),
+            'plus_longue_serie': int(self.plus_longue_serie[position]),
+            'premier_impaye': mois_depuis_indice(premier) if premier >= 0 else None,
+            'montant_du': int(self.mois_impayes[position]) * self.cotisation,
+        }
+
+    def position(self, membre_id):
+        """Position d'un membre dans les tableaux, ou None."""
+        position = int(np.searchsorted(self.membre_ids, membre_id))
+        if position < len(self) and self.membre_ids[position] == membre_id:
+            return position
+        return None
+
+
+def calculer_arrieres(membre_ids, debuts, payes, origine, fin, date_arret=None, cotisation=COTISATION_MENSUELLE):
+    """
+    Arriérés à partir des tableaux : `membre_ids` triés, `debuts` (indice du
+    mois d'enregistrement), matrice `payes` des mois d'`origine` à `fin`
+    (indice du dernier mois dû).
+    """
+    nombre = len(membre_ids)
+    debuts = np.minimum(debuts, fin + 1)  # enregistré après l'arrêt : rien de dû
+    largeur = payes.shape[1]
+
+    # Matrice des impayés : vrai pour un mois dû sans contribution
+    impayes = ~payes
+    impayes &= np.arange(origine, fin + 1, dtype=np.int32)[None, :] >= debuts[:, None]
+
+    mois_dus = (fin + 1 - debuts).astype(np.int32)
+    mois_impayes = impayes.sum(axis=1, dtype=np.int32)
+
+    # Séries : impayés cumulés moins le cumul au dernier mois payé (ou non dû)
+    type_cumul = np.int16 if largeur < np.iinfo(np.int16).max else np.int32
+    series = np.cumsum(impayes, axis=1, dtype=type_cumul)
+    au_dernier_paye = np.where(impayes, 0, series)
+    np.maximum.accumulate(au_dernier_paye, axis=1, out=au_dernier_paye)
+    series -= au_dernier_paye
+    if largeur:
+        serie_en_cours = series[:, -1].astype(np.int32)
+        plus_longue_serie = series.max(axis=1).astype(np.int32)
+        premier_impaye = np.where(mois_impayes > 0, impayes.argmax(axis=1) + origine, -1).astype(np.int32)
+    else:
+        serie_en_cours = plus_longue_serie = np.zeros(nombre, dtype=np.int32)
+        premier_impaye = np.full(nombre, -1, dtype=np.int32)
+
+    return Arrieres(
+        membre_ids=membre_ids,
+        mois_dus=mois_dus,
+        mois_payes=mois_dus - mois_impayes,
+        mois_impayes=mois_impayes,
+        serie_en_cours=serie_en_cours,
+        plus_longue_serie=plus_longue_serie,
+        premier_impaye=premier_impaye,
+        date_arret=date_arret,
+        cotisation=cotisation,
+    )
+
+
+#################################################################################################
+# Données en cache
+
+def version_donnees():
+    return cache.get_or_set(CLE_VERSION, time.time_ns, None)
+
+
+def invalider():
+    """Périme les données en cache (contribution ou membre modifié, voir signals.py)."""
+    cache.set(CLE_VERSION, time.time_ns(), None)
+
+
+def donnees_arrieres(fin):
+    """
+    (membre_ids, debuts, matrice des mois payés compactée par np.packbits,
+    origine) de tous les membres jusqu'au mois `fin`, lus au travers du cache.
+    """
+    cle = f'arrieres:{version_donnees()}:{fin}'
+    donnees = cache.get(cle)
+    if donnees is None:
+        membre_ids, debuts = charger_membres(Membre.objects.all())
+        debuts = np.minimum(debuts, fin + 1)
+        origine = int(debuts.min()) if len(membre_ids) else fin + 1
+        paiements_membres, paiements_mois = charger_paiements()
+        payes = matrice_payes(membre_ids, paiements_membres, paiements_mois, origine, fin)
+        donnees = (membre_ids, debuts, np.packbits(payes, axis=1), origine)
+        cache.set(cle, donnees, DUREE_CACHE)
+    return donnees
+
+
+def arrieres_membres(membres=None, date_arret=None, cotisation=None):
+    """Arriérés des membres du queryset `membres` (tous par défaut) au mois de `date_arret` (aujourd'hui par défaut)."""
+    date_arret = date_arret or timezone.now().date()
+    fin = indice_mois(date_arret)
+    membre_ids, debuts, compacte, origine = donnees_arrieres(fin)
+
+    if membres is not None and membres.query.has_filters():
+        selection = membres.order_by().values_list('id', flat=True).iterator(chunk_size=5000)
+        retenus = np.isin(membre_ids, np.fromiter(selection, dtype=np.int64))
+        membre_ids, debuts, compacte = membre_ids[retenus], debuts[retenus], compacte[retenus]
+
+    payes = np.unpackbits(compacte, axis=1, count=fin - origine + 1).view(bool)
+    return calculer_arrieres(
+        membre_ids, debuts, payes, origine, fin,
+        date_arret=date_arret,
+        cotisation=COTISATION_MENSUELLE if cotisation is None else cotisation,
+    )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from finance.resume import reconstruire_resumes
+
+
+class Command(BaseCommand):
+    help = "Recalcule entièrement le résumé des contributions de chaque membre (total, mois payés...)."
+
+    def handle(self, *args, **options):
+        nombre = reconstruire_resumes()
+        self.stdout.write(self.style.SUCCESS(f"Résumés reconstruits : {nombre} membre(s) avec contributions."))
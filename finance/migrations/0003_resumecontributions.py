@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def remplir_resumes(apps, schema_editor):
+    # Copie figée de finance.resume._agregats() à la date de la migration : une
+    # migration n'importe pas le code de l'application, qui peut changer après
+    # coup. Une fois la migration appliquée, `reconstruire_resumes` fait foi.
+    Contribution = apps.get_model('finance', 'Contribution')
+    ResumeContributions = apps.get_model('finance', 'ResumeContributions')
+    lignes = (
+        Contribution.objects.order_by()
+        .values('membre_id')
+        .annotate(
+            total_paye=Sum('montant'),
+            nombre_mois=Count('id'),
+            premier_mois=Min('mois'),
+            dernier_mois=Max('mois'),
+            dernier_paiement=Max('date_paiement'),
+        )
+    )
+    ResumeContributions.objects.bulk_create(
+        [ResumeContributions(**ligne) for ligne in lignes.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_index_requetes'),
+        ('identification', '0008_sequencecode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeContributions',
+            fields=[
+                ('membre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resume_contributions', serialize=False, to='identification.membre')),
+                ('total_paye', models.BigIntegerField(default=0)),
+                ('nombre_mois', models.IntegerField(default=0)),
+                ('premier_mois', models.DateField(blank=True, null=True)),
+                ('dernier_mois', models.DateField(blank=True, null=True)),
+                ('dernier_paiement', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Résumé des contributions',
+                'verbose_name_plural': 'Résumés des contributions',
+            },
+        ),
+        migrations.RunPython(remplir_resumes, migrations.RunPython.noop),
+    ]
@@ -11,10 +11,45 @@ class Contribution(models.Model):
     class Meta:
         unique_together = ("membre", "mois")  # Un membre paie une seule fois par mois
         ordering = ["-date_paiement"]
+        indexes = [
+            # Contributions récentes d'un membre (ajout de contribution)
+            models.Index(fields=["membre", "-date_paiement"], name="contrib_membre_paiement_idx"),
+            # Listes globales triées par date de paiement
+            models.Index(fields=["-date_paiement"], name="contrib_date_paiement_idx"),
+            # Exports par période (?du / ?au sur le mois)
+            models.Index(fields=["mois"], name="contrib_mois_idx"),
+        ]
 
     def __str__(self):
         return f"{self.membre.nom} {self.membre.post_nom} - {self.mois.strftime('%B %Y')}"
 
+
+class ResumeContributions(models.Model):
+    """
+    Résumé des contributions d'un membre (une ligne par membre ayant payé),
+    tenu à jour dans la transaction de chaque écriture de Contribution
+    (voir resume.py), reconstruit par `python manage.py reconstruire_resumes`.
+    """
+    membre = models.OneToOneField(
+        Membre, on_delete=models.CASCADE, primary_key=True, related_name="resume_contributions"
+    )
+    total_paye = models.BigIntegerField(default=0)
+    nombre_mois = models.IntegerField(default=0)
+    premier_mois = models.DateField(null=True, blank=True)
+    dernier_mois = models.DateField(null=True, blank=True)
+    dernier_paiement = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Résumé des contributions"
+        verbose_name_plural = "Résumés des contributions"
+
+    def __str__(self):
+        return f"{self.membre_id} : {self.total_paye} ({self.nombre_mois} mois)"
+
+    @property
+    def moyenne_mensuelle(self):
+        return round(self.total_paye / self.nombre_mois, 2) if self.nombre_mois else 0
+
 ########################################################################################################
 from django.db import models
 from django.utils import timezone
@@ -33,6 +68,12 @@ class Operation(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Totaux par type sur une période (rapports, exports)
+            models.Index(fields=['type_operation', 'date'], name='operation_type_date_idx'),
+            # Liste et rapports par période, du plus récent au plus ancien
+            models.Index(fields=['-date'], name='operation_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_type_operation_display()} - {self.date} - {self.motif} : {self.montant} FC"
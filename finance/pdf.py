@@ -0,0 +1,364 @@
+# finance/pdf.py
+"""
+Outils communs aux PDF de la finance (factures, historiques, rapports).
+
+La charte graphique (couleurs, styles de paragraphe) est construite une
+seule fois par processus. L'en-tête, le bandeau des pages suivantes et le
+pied de page sont des Form XObject : tracés une fois par document puis
+simplement référencés (/Do) sur chaque page, au lieu d'être réencodés page
+après page. `DocumentRenemico` assemble le tout pour les documents platypus ;
+les documents dessinés directement sur le canvas (facture) utilisent
+`dessiner_entete`, `dessiner_titre` et `dessiner_pied`.
+
+`FluxFlowables` permet de construire un document de taille quelconque à
+mémoire constante : doc.build() consomme la liste des flowables par le
+début, elle est donc remplie au fur et à mesure depuis un générateur
+(lignes lues en base par paquets) au lieu d'être construite d'avance.
+
+Les documents sont écrits avec pageCompression : le contenu des pages est
+compressé (FlateDecode) à l'écriture du fichier.
+"""
+import hashlib
+
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Table
+
+from identification.ressources import registre
+
+
+# Charte graphique
+PRIMAIRE = colors.HexColor("#2c3e50")    # Bleu foncé (titres, texte)
+SECONDAIRE = colors.HexColor("#3498db")  # Bleu
+CLAIR = colors.HexColor("#ecf0f1")       # Gris très clair
+BORDURE = colors.HexColor("#bdc3c7")
+DISCRET = colors.HexColor("#7f8c8d")     # Pieds de page
+
+MARGE = 1.5*cm
+LARGEUR, HAUTEUR = A4
+
+ORGANISATION = "REGROUPEMENT DES NEGOCIANTS MINIERS DU CONGO"
+COORDONNEES = [
+    "297, Avenue Lubudi, Quartier Industriel, Manika, Kolwezi",
+    "Lualaba - RDC",
+    "Tél: +243 81 60 69 861 - Email: contact@renemico.com",
+]
+
+
+def _styles():
+    base = getSampleStyleSheet()
+    normal = ParagraphStyle(
+        'RenemicoNormal', parent=base['Normal'], fontSize=10, spaceAfter=6,
+        textColor=PRIMAIRE, fontName='Helvetica',
+    )
+    pied = ParagraphStyle(
+        'RenemicoPied', parent=normal, fontSize=9, alignment=TA_CENTER,
+        textColor=DISCRET, fontName='Helvetica-Oblique',
+    )
+    return {'normal': normal, 'pied': pied}
+
+
+# Construits à l'import : une seule fois par processus
+STYLES = _styles()
+
+
+# Fonction pour convertir les nombres en lettres
+def nombre_en_lettres(n):
+    """
+    Convertit un nombre en lettres en français avec une majuscule au début.
+    """
+    if not isinstance(n, (int, float)) or n < 0:
+        return "Nombre invalide"
+
+    # Si c'est un float, on sépare les parties entière et décimale
+    if isinstance(n, float):
+        partie_entiere = int(n)
+        partie_decimale = round((n - partie_entiere) * 100)
+        if partie_decimale == 0:
+            return nombre_en_lettres(partie_entiere) + " dollars américains"
+        else:
+            return f"{nombre_en_lettres(partie_entiere)} dollars américains et {nombre_en_lettres(partie_decimale)} cents"
+
+    # Pour les entiers
+    units = ["", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf"]
+    teens = ["dix", "onze", "douze", "treize", "quatorze", "quinze", "seize", "dix-sept", "dix-huit", "dix-neuf"]
+    tens = ["", "dix", "vingt", "trente", "quarante", "cinquante", "soixante", "soixante-dix", "quatre-vingt", "quatre-vingt-dix"]
+    big_numbers = {
+        100: "cent",
+        1000: "mille",
+        1000000: "million",
+        1000000000: "milliard"
+    }
+
+    if n == 0:
+        return "Zéro"
+    elif n < 10:
+        return units[n].capitalize()
+    elif 10 <= n < 20:
+        return teens[n - 10].capitalize()
+    elif 20 <= n < 100:
+        if n % 10 == 0:
+            return tens[n // 10].capitalize()
+        elif n // 10 == 7 or n // 10 == 9:
+            # Cas particuliers pour soixante-dix et quatre-vingt-dix
+            base = tens[n // 10 - 1] if n // 10 == 7 else tens[n // 10 - 1]
+            return f"{base.capitalize()}-{teens[n % 10 - 10]}"
+        else:
+            separator = "-et-" if n % 10 == 1 and n // 10 != 8 else "-"
+            return f"{tens[n // 10].capitalize()}{separator}{units[n % 10]}"
+    else:
+        # Trouver la plus grande unité
+        divisor = 1
+        for d in sorted(big_numbers.keys(), reverse=True):
+            if n >= d:
+                divisor = d
+                break
+
+        quotient = n // divisor
+        remainder = n % divisor
+
+        if divisor == 100:
+            if quotient == 1 and remainder == 0:
+                return "Cent"
+            elif quotient == 1:
+                return f"Cent {nombre_en_lettres(remainder)}"
+            elif remainder == 0:
+                return f"{units[quotient].capitalize()} cents"
+            else:
+                return f"{units[quotient].capitalize()} cent {nombre_en_lettres(remainder)}"
+        else:
+            unit_name = big_numbers[divisor]
+            if quotient == 1:
+                prefix = "Un"
+            else:
+                prefix = nombre_en_lettres(quotient)
+
+            if remainder == 0:
+                return f"{prefix} {unit_name}"
+            else:
+                return f"{prefix} {unit_name} {nombre_en_lettres(remainder)}"
+
+
+def forme(p, nom, dessin, *args):
+    """
+    Place la Form XObject `nom` sur la page, à l'origine courante.
+
+    `dessin(p, *args)` n'est appelé qu'à la première utilisation dans le
+    document : les pages suivantes ne font que référencer la forme. `nom`
+    doit donc identifier aussi les arguments du dessin.
+    """
+    if not p.hasForm(nom):
+        p.beginForm(nom)
+        dessin(p, *args)
+        p.endForm()
+    p.doForm(nom)
+
+
+def _entete(p):
+    # Bandeau clair (logo + infos société)
+    p.setFillColor(CLAIR)
+    p.rect(0, HAUTEUR - 3.5*cm, LARGEUR, 3.5*cm, fill=True, stroke=False)
+
+    # Logo (à gauche)
+    logo = registre.reader('logo1')
+    if logo:
+        p.drawImage(logo, MARGE, HAUTEUR - 3.5*cm, width=2.5*cm, height=2.5*cm, mask='auto')
+    else:
+        # Placeholder
+        p.setFillColor(SECONDAIRE)
+        p.roundRect(MARGE, HAUTEUR - 3*cm, 2.5*cm, 2.5*cm, 5, stroke=False, fill=True)
+        p.setFillColor(colors.white)
+        p.setFont("Helvetica-Bold", 10)
+        p.drawCentredString(MARGE + 1.25*cm, HAUTEUR - 2.2*cm, "LOGO")
+        p.drawCentredString(MARGE + 1.25*cm, HAUTEUR - 2.6*cm, "RENEMICO")
+
+    # Informations de la société (à droite)
+    p.setFillColor(PRIMAIRE)
+    p.setFont("Helvetica-Bold", 14)
+    p.drawRightString(LARGEUR - MARGE, HAUTEUR - 2*cm, ORGANISATION)
+    p.setFont("Helvetica", 10)
+    for rang, ligne in enumerate(COORDONNEES):
+        p.drawRightString(LARGEUR - MARGE, HAUTEUR - (2.7 + 0.4*rang)*cm, ligne)
+
+
+def dessiner_entete(p):
+    """En-tête complet (logo, coordonnées) en haut de la page."""
+    forme(p, 'RenemicoEntete', _entete)
+
+
+def dessiner_titre(p, titre, y):
+    """Bandeau coloré portant le titre du document, centré sur `y`."""
+    p.setFillColor(SECONDAIRE)
+    p.rect(0, y - 0.5*cm, LARGEUR, 1.2*cm, fill=True, stroke=False)
+    p.setFillColor(colors.white)
+    p.setFont("Helvetica-Bold", 18)
+    p.drawCentredString(LARGEUR/2, y, titre)
+
+
+def _pied(p, lignes):
+    y = MARGE + 2.5*cm
+    p.setStrokeColor(BORDURE)
+    p.setLineWidth(1)
+    p.line(MARGE, y, LARGEUR - MARGE, y)
+    p.setFillColor(DISCRET)
+    p.setFont("Helvetica-Oblique", 9)
+    for rang, ligne in enumerate(lignes):
+        p.drawCentredString(LARGEUR/2, MARGE + (1.8 - 0.5*rang)*cm, ligne)
+
+
+def dessiner_pied(p, lignes):
+    """Pied de page : filet et lignes de texte centrées (remerciements, contact)."""
+    # Une forme par texte : deux pieds différents dans un même document restent distincts
+    empreinte = hashlib.sha1('\n'.join(lignes).encode('utf-8')).hexdigest()[:12]
+    forme(p, f'RenemicoPied{empreinte}', _pied, lignes)
+
+
+class FluxFlowables:
+    """
+    Liste de flowables alimentée à la demande par un générateur.
+
+    Seules les opérations utilisées par BaseDocTemplate.build() sont prises
+    en charge : longueur, lecture / suppression / insertion en tête.
+    """
+
+    def __init__(self, flowables):
+        self._tampon = []
+        self._source = iter(flowables)
+
+    def _remplir(self, taille):
+        while len(self._tampon) < taille:
+            suivant = next(self._source, None)
+            if suivant is None:
+                return
+            self._tampon.append(suivant)
+
+    def __len__(self):
+        # Un seul flowable d'avance suffit : build() boucle tant que la liste n'est pas vide
+        self._remplir(1)
+        return len(self._tampon)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            if indice.stop is not None:
+                self._remplir(indice.stop)
+        else:
+            self._remplir(indice + 1)
+        return self._tampon[indice]
+
+    def __setitem__(self, indice, valeur):
+        self._tampon[indice] = valeur
+
+    def __delitem__(self, indice):
+        del self._tampon[indice]
+
+    def insert(self, indice, flowable):
+        self._tampon.insert(indice, flowable)
+
+
+class DocumentRenemico(BaseDocTemplate):
+    """
+    A4 aux couleurs de RENEMICO : en-tête complet (logo, coordonnées, titre,
+    sous-titre) sur la première page, bandeau réduit sur les suivantes, pied
+    de page daté et numéroté.
+
+    `entete_colonnes` (Table d'une ligne, facultatif) est dessiné en haut de
+    chaque page qui porte un tableau : les longs rapports y découpent leurs
+    lignes en tables successives plutôt qu'en une seule table à répéter.
+    """
+
+    HAUT_PREMIERE = 8*cm
+    HAUT_SUITE = 2.8*cm
+
+    def __init__(self, fichier, titre, sous_titre, entete_colonnes=None, **kwargs):
+        kwargs.setdefault('title', titre.capitalize())
+        kwargs.setdefault('pageCompression', 1)
+        super().__init__(fichier, pagesize=A4, **kwargs)
+        self.titre = titre
+        self.sous_titre = sous_titre
+        self.entete_colonnes = entete_colonnes
+        self._tableau_sur_page = False
+        if entete_colonnes is not None:
+            entete_colonnes.wrap(0, 0)
+
+        bas = MARGE + 1.2*cm
+        self.addPageTemplates([
+            PageTemplate(
+                id='premiere', frames=[self._cadre(bas, HAUTEUR - self.HAUT_PREMIERE)],
+                onPage=self._debut_premiere_page, onPageEnd=self._fin_page, autoNextPageTemplate='suite',
+            ),
+            PageTemplate(
+                id='suite', frames=[self._cadre(bas, HAUTEUR - self.HAUT_SUITE)],
+                onPage=self._debut_page_suivante, onPageEnd=self._fin_page,
+            ),
+        ])
+
+    def _cadre(self, bas, haut):
+        if self.entete_colonnes is not None:
+            haut -= self.entete_colonnes._height
+        return Frame(
+            MARGE, bas, LARGEUR - 2*MARGE, haut - bas,
+            leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
+        )
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, Table):
+            self._tableau_sur_page = True
+
+    def _debut_premiere_page(self, p, doc):
+        self._tableau_sur_page = False
+        dessiner_entete(p)
+
+        y = HAUTEUR - 4.5*cm
+        dessiner_titre(p, self.titre, y)
+
+        y -= 1.8*cm
+        p.setFillColor(PRIMAIRE)
+        p.setFont("Helvetica-Bold", 12)
+        p.drawCentredString(LARGEUR/2, y, self.sous_titre)
+
+        # Ligne de séparation
+        y -= 0.6*cm
+        p.setStrokeColor(SECONDAIRE)
+        p.setLineWidth(1)
+        p.line(MARGE, y, LARGEUR - MARGE, y)
+
+    def _bandeau_suite(self, p):
+        p.setFillColor(CLAIR)
+        p.rect(0, HAUTEUR - 2*cm, LARGEUR, 2*cm, fill=True, stroke=False)
+        p.setFillColor(PRIMAIRE)
+        p.setFont("Helvetica-Bold", 11)
+        p.drawString(MARGE, HAUTEUR - 1*cm, f"RENEMICO — {self.titre}")
+        p.setFont("Helvetica", 8)
+        p.drawString(MARGE, HAUTEUR - 1.5*cm, self.sous_titre)
+
+    def _debut_page_suivante(self, p, doc):
+        self._tableau_sur_page = False
+        forme(p, 'RenemicoBandeau', self._bandeau_suite)
+
+    def _pied_pagine(self, p):
+        p.setStrokeColor(BORDURE)
+        p.setLineWidth(1)
+        p.line(MARGE, MARGE + 0.8*cm, LARGEUR - MARGE, MARGE + 0.8*cm)
+        p.setFillColor(DISCRET)
+        p.setFont("Helvetica-Oblique", 8)
+        p.drawString(MARGE, MARGE + 0.3*cm, f"Généré le {timezone.now().strftime('%d/%m/%Y')}")
+
+    def _fin_page(self, p, doc):
+        # En-tête des colonnes, répété sur chaque page qui porte des lignes
+        if self.entete_colonnes is not None and self._tableau_sur_page:
+            p.saveState()
+            p.translate(MARGE + (self.frame._width - self.entete_colonnes._width) / 2,
+                        self.frame._y1 + self.frame._height)
+            forme(p, 'RenemicoColonnes', self.entete_colonnes.drawOn, 0, 0)
+            p.restoreState()
+
+        # Pied de page : seul le numéro change d'une page à l'autre
+        forme(p, 'RenemicoPiedPagine', self._pied_pagine)
+        p.setFillColor(DISCRET)
+        p.setFont("Helvetica-Oblique", 8)
+        p.drawRightString(LARGEUR - MARGE, MARGE + 0.3*cm, f"Page {doc.page}")
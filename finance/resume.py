@@ -0,0 +1,86 @@
+# finance/resume.py
+"""
+Résumé des contributions par membre (ResumeContributions).
+
+Total payé, nombre de mois, premier / dernier mois payé et date du dernier
+paiement sont recalculés pour le membre concerné à chaque création,
+modification ou suppression d'une Contribution (signals.py), dans la même
+transaction : une agrégation sur l'index (membre, mois), jamais sur toute
+la table. Les pages d'historique et les listes lisent ensuite ces colonnes
+sans agrégation.
+
+Les opérations en masse (QuerySet.update, bulk_create) ne déclenchent pas
+de signaux : relancer `python manage.py reconstruire_resumes` ensuite.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+
+from identification.models import Membre
+
+from .models import Contribution, ResumeContributions
+
+
+def _agregats():
+    return dict(
+        total_paye=Sum('montant'),
+        nombre_mois=Count('id'),
+        premier_mois=Min('mois'),
+        dernier_mois=Max('mois'),
+        dernier_paiement=Max('date_paiement'),
+    )
+
+
+def recalculer_resume(membre_id):
+    """Recalcule le résumé d'un membre (supprimé s'il n'a plus de contribution)."""
+    with transaction.atomic():
+        # Verrou sur le membre : deux écritures concurrentes pour un même membre se suivent
+        existe = Membre.objects.select_for_update().filter(pk=membre_id).exists()
+        valeurs = Contribution.objects.filter(membre_id=membre_id).aggregate(**_agregats())
+        if not existe or not valeurs['nombre_mois']:
+            ResumeContributions.objects.filter(membre_id=membre_id).delete()
+            return None
+        resume, _ = ResumeContributions.objects.update_or_create(membre_id=membre_id, defaults=valeurs)
+        return resume
+
+
+TAILLE_TRANCHE = 1000
+
+
+def reconstruire_resumes(taille_tranche=TAILLE_TRANCHE):
+    """
+    Recalcule tous les résumés, par tranches de `taille_tranche` membres
+    (ids consécutifs) : chaque tranche est supprimée puis recréée par une
+    agrégation groupée dans sa propre transaction, courte. La table n'est
+    jamais vidée d'un coup ni verrouillée pendant toute la reconstruction ;
+    une écriture concurrente attend au plus la fin d'une tranche.
+    """
+    nombre = 0
+    dernier = 0
+    while True:
+        ids = list(
+            Membre.objects.filter(pk__gt=dernier).order_by('pk')
+            .values_list('pk', flat=True)[:taille_tranche]
+        )
+        if not ids:
+            break
+        tranche = dict(membre_id__gt=dernier, membre_id__lte=ids[-1])
+        with transaction.atomic():
+            ResumeContributions.objects.filter(**tranche).delete()
+            lignes = (
+                Contribution.objects.filter(**tranche).order_by()
+                .values('membre_id')
+                .annotate(**_agregats())
+            )
+            nombre += len(ResumeContributions.objects.bulk_create(
+                [ResumeContributions(**ligne) for ligne in lignes]
+            ))
+        dernier = ids[-1]
+    return nombre
+
+
+def resume_de(membre):
+    """Résumé du membre, ou un résumé vide (non enregistré) s'il n'a jamais payé."""
+    try:
+        return membre.resume_contributions
+    except ResumeContributions.DoesNotExist:
+        return ResumeContributions(membre=membre)
@@ -0,0 +1,43 @@
+# finance/signals.py
+"""
+Maintien de ResumeContributions à chaque écriture de Contribution (voir resume.py)
+et péremption des données d'arriérés en cache (voir arrieres.py).
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from identification.models import Membre
+
+from . import arrieres
+from .models import Contribution
+from .resume import recalculer_resume
+
+
+@receiver(pre_save, sender=Contribution)
+def contribution_avant_enregistrement(sender, instance, **kwargs):
+    # Une contribution réattribuée à un autre membre modifie aussi le résumé de l'ancien
+    instance._membre_avant = None
+    if instance.pk is not None:
+        instance._membre_avant = sender.objects.filter(pk=instance.pk).values_list('membre_id', flat=True).first()
+
+
+@receiver(post_save, sender=Contribution)
+def contribution_enregistree(sender, instance, **kwargs):
+    recalculer_resume(instance.membre_id)
+    ancien = getattr(instance, '_membre_avant', None)
+    if ancien and ancien != instance.membre_id:
+        recalculer_resume(ancien)
+    arrieres.invalider()
+
+
+@receiver(post_delete, sender=Contribution)
+def contribution_supprimee(sender, instance, **kwargs):
+    recalculer_resume(instance.membre_id)
+    arrieres.invalider()
+
+
+@receiver(post_save, sender=Membre)
+@receiver(post_delete, sender=Membre)
+def membre_modifie(sender, **kwargs):
+    # Nouveau membre ou date d'enregistrement modifiée : mois dus différents
+    arrieres.invalider()
@@ -1,3 +1,236 @@
+from datetime import date
+from io import BytesIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
 from django.test import TestCase
+from reportlab.pdfgen import canvas
+
+from identification.models import Membre
+from identification.tests import SQLITE, PlanRequeteMixin, creer_membre
+
+from . import arrieres
+from .models import Contribution, Operation, ResumeContributions
+from .pdf import dessiner_pied
+from .resume import reconstruire_resumes
+
+
+@skipUnless(SQLITE, "Plans de requête écrits pour SQLite (EXPLAIN QUERY PLAN)")
+class IndexFinanceTests(PlanRequeteMixin, TestCase):
+    """Les requêtes fréquentes sur les contributions et opérations passent par un index."""
+
+    jour = date(2025, 1, 1)
+
+    def test_contributions_recentes_du_membre(self):
+        # Vue ajouter : 5 dernières contributions du membre
+        qs = Contribution.objects.filter(membre_id=1).order_by('-date_paiement')[:5]
+        self.assertUtiliseIndex(qs, 'contrib_membre_paiement_idx')
+        self.assertNotIn('TEMP B-TREE', self.plan(qs))
+
+    def test_historique_du_membre(self):
+        qs = Contribution.objects.filter(membre_id=1).order_by('-mois')
+        self.assertSansScanComplet(qs)
+        self.assertNotIn('TEMP B-TREE', self.plan(qs))
+
+    def test_contribution_existante(self):
+        self.assertSansScanComplet(Contribution.objects.filter(membre_id=1, mois=self.jour))
+
+    def test_contributions_par_date_de_paiement(self):
+        self.assertUtiliseIndex(Contribution.objects.all()[:20], 'contrib_date_paiement_idx')
+
+    def test_export_contributions_par_periode(self):
+        qs = Contribution.objects.filter(mois__gte=self.jour, mois__lte=self.jour).order_by('id')
+        self.assertUtiliseIndex(qs, 'contrib_mois_idx')
+
+    def test_total_par_type(self):
+        qs = Operation.objects.filter(type_operation='ENTREE').order_by()
+        self.assertUtiliseIndex(qs, 'operation_type_date_idx')
+
+    def test_total_par_type_sur_l_annee(self):
+        # export_pdf_operations : type + période
+        qs = Operation.objects.filter(type_operation='SORTIE', date__year=2025).order_by()
+        self.assertUtiliseIndex(qs, 'operation_type_date_idx')
+
+    def test_operations_du_jour(self):
+        self.assertUtiliseIndex(Operation.objects.filter(date=self.jour), 'operation_date_idx')
+
+    def test_liste_des_operations(self):
+        self.assertUtiliseIndex(Operation.objects.all()[:20], 'operation_date_idx')
+
+    def test_export_operations_par_periode(self):
+        qs = Operation.objects.filter(date__gte=self.jour, date__lte=self.jour).order_by('id')
+        self.assertUtiliseIndex(qs, 'operation_date_idx')
+
+
+class ChargerPaiementsTests(TestCase):
+    """Les deux lectures des contributions (concaténées ou ligne à ligne) donnent les mêmes paires."""
+
+    def test_lecture_ligne_a_ligne(self):
+        premier, second = creer_membre(), creer_membre(nom="Tshala")
+        for membre, jour in ((premier, date(2025, 1, 1)), (premier, date(2025, 3, 1)), (second, date(2024, 12, 1))):
+            Contribution.objects.create(membre=membre, mois=jour, montant=10)
+
+        def paires():
+            membres, mois = arrieres.charger_paiements()
+            return sorted(zip(membres.tolist(), mois.tolist()))
+
+        attendu = sorted([
+            (premier.pk, arrieres.indice_mois(date(2025, 1, 1))),
+            (premier.pk, arrieres.indice_mois(date(2025, 3, 1))),
+            (second.pk, arrieres.indice_mois(date(2024, 12, 1))),
+        ])
+        self.assertEqual(paires(), attendu)
+        with mock.patch.object(arrieres, 'concat_disponible', return_value=False):
+            self.assertEqual(paires(), attendu)
+
+
+class FormesPdfTests(TestCase):
+    """Formes réutilisées (pdf.py) : un pied de page par texte distinct."""
+
+    def test_pieds_differents_sur_un_meme_document(self):
+        sortie = BytesIO()
+        p = canvas.Canvas(sortie, pageCompression=0)
+        dessiner_pied(p, ["Premier pied"])
+        p.showPage()
+        dessiner_pied(p, ["Second pied"])
+        p.showPage()
+        p.save()
+        self.assertIn(b"Premier pied", sortie.getvalue())
+        self.assertIn(b"Second pied", sortie.getvalue())
+
+
+class ResumeContributionsTests(TestCase):
+    """Résumé par membre (resume.py) tenu à jour par les signaux des contributions."""
+
+    def resume(self, membre):
+        return ResumeContributions.objects.filter(membre=membre).values(
+            'total_paye', 'nombre_mois', 'premier_mois', 'dernier_mois'
+        ).first()
+
+    def test_creation_modification_suppression(self):
+        membre = creer_membre()
+        self.assertIsNone(self.resume(membre))
+
+        janvier = Contribution.objects.create(membre=membre, mois=date(2025, 1, 1), montant=10)
+        Contribution.objects.create(membre=membre, mois=date(2025, 3, 1), montant=15)
+        self.assertEqual(self.resume(membre), dict(
+            total_paye=25, nombre_mois=2, premier_mois=date(2025, 1, 1), dernier_mois=date(2025, 3, 1),
+        ))
+
+        janvier.montant = 20
+        janvier.mois = date(2024, 12, 1)
+        janvier.save()
+        self.assertEqual(self.resume(membre), dict(
+            total_paye=35, nombre_mois=2, premier_mois=date(2024, 12, 1), dernier_mois=date(2025, 3, 1),
+        ))
+
+        membre.contributions.all().delete()
+        self.assertIsNone(self.resume(membre))
+
+    def test_contribution_reattribuee(self):
+        premier, second = creer_membre(), creer_membre(nom="Tshala")
+        Contribution.objects.create(membre=premier, mois=date(2025, 1, 1), montant=10)
+        deplacee = Contribution.objects.create(membre=premier, mois=date(2025, 2, 1), montant=15)
+
+        deplacee.membre = second
+        deplacee.save()
+
+        # L'ancien membre est recalculé lui aussi
+        self.assertEqual(self.resume(premier)['total_paye'], 10)
+        self.assertEqual(self.resume(premier)['dernier_mois'], date(2025, 1, 1))
+        self.assertEqual(self.resume(second), dict(
+            total_paye=15, nombre_mois=1, premier_mois=date(2025, 2, 1), dernier_mois=date(2025, 2, 1),
+        ))
+
+        deplacee.membre = premier
+        deplacee.save()
+        self.assertIsNone(self.resume(second))
+        self.assertEqual(self.resume(premier)['nombre_mois'], 2)
+
+    def test_reconstruction_par_tranches(self):
+        membres = [creer_membre(nom=f"Membre{i}") for i in range(5)]
+        for i, membre in enumerate(membres[:4]):
+            for mois in range(1, i + 2):
+                Contribution.objects.create(membre=membre, mois=date(2025, mois, 1), montant=10)
+        attendus = {m.pk: self.resume(m) for m in membres}
+
+        # Résumés faussés par des écritures en masse (sans signaux)
+        Contribution.objects.filter(membre=membres[0]).update(montant=99)
+        ResumeContributions.objects.filter(membre=membres[1]).delete()
+        ResumeContributions.objects.create(membre=membres[4], total_paye=1, nombre_mois=1)
+        attendus[membres[0].pk]['total_paye'] = 99
+
+        self.assertEqual(reconstruire_resumes(taille_tranche=2), 4)
+        self.assertEqual({m.pk: self.resume(m) for m in membres}, attendus)
+
+
+class ArrieresTests(TestCase):
+    """Matrice des arriérés (arrieres.py) sur un petit jeu de membres aux mois connus."""
+
+    arret = date(2025, 6, 15)
+
+    def setUp(self):
+        cache.clear()
+
+        def payer(membre, *mois):
+            for annee, numero in mois:
+                Contribution.objects.create(membre=membre, mois=date(annee, numero, 1), montant=10)
+
+        # Trous en mars et mai-juin ; décembre 2024 (avant l'enregistrement)
+        # et août 2025 (après l'arrêt) ne comptent pas
+        self.troue = creer_membre(nom="Troue", date_enregistrement=date(2025, 1, 10))
+        payer(self.troue, (2024, 12), (2025, 1), (2025, 2), (2025, 4), (2025, 8))
+        # Aucune contribution
+        self.jamais = creer_membre(nom="Jamais", date_enregistrement=date(2024, 11, 5))
+        # À jour
+        self.a_jour = creer_membre(nom="Ajour", date_enregistrement=date(2024, 12, 1))
+        payer(self.a_jour, (2024, 12), *((2025, m) for m in range(1, 7)))
+        # Enregistré après le mois d'arrêt : rien de dû
+        self.futur = creer_membre(nom="Futur", date_enregistrement=date(2025, 8, 1))
+        # Seul le dernier mois payé : série terminée
+        self.rattrape = creer_membre(nom="Rattrape", date_enregistrement=date(2025, 2, 1))
+        payer(self.rattrape, (2025, 6))
+
+    def lignes(self, arrieres):
+        return {arrieres.ligne(i)['membre_id']: arrieres.ligne(i) for i in range(len(arrieres))}
+
+    def test_matrice(self):
+        resultat = arrieres.arrieres_membres(date_arret=self.arret, cotisation=10)
+        lignes = self.lignes(resultat)
+
+        def attendu(membre, dus, impayes, serie, plus_longue, premier):
+            return dict(
+                membre_id=membre.pk, mois_dus=dus, mois_payes=dus - impayes, mois_impayes=impayes,
+                serie_en_cours=serie, plus_longue_serie=plus_longue, premier_impaye=premier,
+                montant_du=impayes * 10,
+            )
+
+        self.assertEqual(lignes, {
+            self.troue.pk: attendu(self.troue, 6, 3, 2, 2, date(2025, 3, 1)),
+            self.jamais.pk: attendu(self.jamais, 8, 8, 8, 8, date(2024, 11, 1)),
+            self.a_jour.pk: attendu(self.a_jour, 7, 0, 0, 0, None),
+            self.futur.pk: attendu(self.futur, 0, 0, 0, 0, None),
+            self.rattrape.pk: attendu(self.rattrape, 5, 4, 0, 4, date(2025, 2, 1)),
+        })
+        self.assertEqual(resultat.total_du, 150)
+
+    def test_selection_et_tris(self):
+        resultat = arrieres.arrieres_membres(date_arret=self.arret, cotisation=10)
+
+        en_retard = resultat.en_retard()
+        self.assertEqual(sorted(en_retard.membre_ids.tolist()), sorted([self.troue.pk, self.jamais.pk, self.rattrape.pk]))
+        self.assertEqual(resultat.en_retard(minimum_serie=2).membre_ids.tolist(), [self.troue.pk, self.jamais.pk])
+
+        self.assertEqual(en_retard.trie('montant').membre_ids.tolist(), [self.jamais.pk, self.rattrape.pk, self.troue.pk])
+        self.assertEqual(en_retard.trie('serie').membre_ids.tolist(), [self.jamais.pk, self.troue.pk, self.rattrape.pk])
+        self.assertEqual(en_retard.trie('anciennete').membre_ids.tolist(), [self.jamais.pk, self.rattrape.pk, self.troue.pk])
+
+    def test_queryset_filtre_et_cache_perime(self):
+        membres = Membre.objects.filter(pk__in=[self.troue.pk, self.futur.pk])
+        resultat = arrieres.arrieres_membres(membres, date_arret=self.arret, cotisation=10)
+        self.assertEqual(resultat.membre_ids.tolist(), [self.troue.pk, self.futur.pk])
 
-# Create your tests here.
+        # Contribution ajoutée : la matrice en cache est périmée
+        Contribution.objects.create(membre=self.troue, mois=date(2025, 6, 1), montant=10)
+        ligne = arrieres.arrieres_membres(membres, date_arret=self.arret, cotisation=10).ligne(0)
+        self.assertEqual((ligne['mois_impayes'], ligne['serie_en_cours']), (2, 0))
@@ -22,6 +22,10 @@ urlpatterns = [
     path("tous/historique.pdf", views.tous_historique_pdf, name="tous_historique_pdf"),
     path("tous/historique.xlsx", views.tous_historique_excel, name="tous_historique_excel"),
 
+    # 4. Arriérés : membres en retard de paiement (page et export CSV / JSON Lines)
+    path("arrieres/", views.arrieres, name="arrieres"),
+    path("arrieres/export/", views.export_arrieres, name="export_arrieres"),
+
     ###########################################################################################################
     path('liste_operations', views.liste_operations, name="liste_operations"),
     path('ajouter/', views.ajouter_operation, name="ajouter_operation"),
@@ -30,6 +34,8 @@ urlpatterns = [
     path('detail/<int:pk>/', views.detail_operation, name="detail_operation"),
     path("operations/export/excel/", views.export_excel_operations, name="export_excel_operations"),
     path("operations/export/pdf/<str:periode>/", views.export_pdf_operations, name="export_pdf_operations"),
+    path("operations/export/", views.export_operations, name="export_operations"),
+    path("contributions/export/", views.export_contributions, name="export_contributions"),
 
 
 ]
@@ -1,24 +1,19 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from .models import Contribution
 from identification.models import Membre
+from identification.recherche import rechercher_membres
 from django.db.models import Q, Count
 from django.utils import timezone
 
 def liste_membres_finance(request):
-    membres = Membre.objects.all()
+    # Résumé des contributions joint : état des paiements de chaque membre sans agrégation
+    membres = Membre.objects.select_related('resume_contributions')
 
     # Recherche
     search_query = request.GET.get('search', '')
     if search_query:
-        membres = membres.filter(
-            Q(nom__icontains=search_query) |
-            Q(post_nom__icontains=search_query) |
-            Q(prenom__icontains=search_query) |
-            Q(code__icontains=search_query) |
-            Q(province__icontains=search_query) |
-            Q(categorie__icontains=search_query) |
-            Q(statut__icontains=search_query)
-        )
+        # Index plein texte FTS5, résultats classés par pertinence
+        membres = rechercher_membres(membres, search_query, classer=True)
 
     # Statistiques (optionnelles)
     membres_actifs = Membre.objects.filter(statut="actif").count()
@@ -46,27 +41,23 @@ from django.db.models import Sum
 from django.shortcuts import get_object_or_404, render
 from .models import Membre, Contribution
 from .forms import ContributionForm
+from .resume import resume_de
 
 
 
 def historique(request, membre_id):
-    membre = get_object_or_404(Membre, id=membre_id)
+    membre = get_object_or_404(Membre.objects.select_related('resume_contributions'), id=membre_id)
     contributions = membre.contributions.all().order_by('-mois')
-    
-    # Total des contributions
-    total_contributions = contributions.aggregate(Sum('montant'))['montant__sum'] or 0
-    
-    # Moyenne par mois payé
-    if contributions.exists():
-        moyenne_mensuelle = total_contributions / contributions.count()
-    else:
-        moyenne_mensuelle = 0
-    
+
+    # Total et moyenne par mois payé : résumé tenu à jour (voir resume.py), sans agrégation
+    resume = resume_de(membre)
+
     return render(request, "historique.html", {
         "membre": membre,
         "contributions": contributions,
-        "total_contributions": total_contributions,
-        "moyenne_mensuelle": round(moyenne_mensuelle, 2)
+        "resume": resume,
+        "total_contributions": resume.total_paye,
+        "moyenne_mensuelle": resume.moyenne_mensuelle,
     })
 
 #################################################################################################
@@ -146,113 +137,17 @@ from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
-from reportlab.lib.units import cm, mm
+from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import Table, TableStyle
 from io import BytesIO
-import os
-import qrcode
-from PIL import Image
-import tempfile
-from django.conf import settings
 from .models import Contribution, Membre
-from django.contrib.staticfiles import finders
-
-# Fonction pour convertir les nombres en lettres (version améliorée)
-def nombre_en_lettres(n):
-    """
-    Convertit un nombre en lettres en français avec une majuscule au début.
-    """
-    if not isinstance(n, (int, float)) or n < 0:
-        return "Nombre invalide"
-    
-    # Si c'est un float, on sépare les parties entière et décimale
-    if isinstance(n, float):
-        partie_entiere = int(n)
-        partie_decimale = round((n - partie_entiere) * 100)
-        if partie_decimale == 0:
-            return nombre_en_lettres(partie_entiere) + " dollars américains"
-        else:
-            return f"{nombre_en_lettres(partie_entiere)} dollars américains et {nombre_en_lettres(partie_decimale)} cents"
-    
-    # Pour les entiers
-    units = ["", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf"]
-    teens = ["dix", "onze", "douze", "treize", "quatorze", "quinze", "seize", "dix-sept", "dix-huit", "dix-neuf"]
-    tens = ["", "dix", "vingt", "trente", "quarante", "cinquante", "soixante", "soixante-dix", "quatre-vingt", "quatre-vingt-dix"]
-    big_numbers = {
-        100: "cent",
-        1000: "mille",
-        1000000: "million",
-        1000000000: "milliard"
-    }
-
-    if n == 0:
-        return "Zéro"
-    elif n < 10:
-        return units[n].capitalize()
-    elif 10 <= n < 20:
-        return teens[n - 10].capitalize()
-    elif 20 <= n < 100:
-        if n % 10 == 0:
-            return tens[n // 10].capitalize()
-        elif n // 10 == 7 or n // 10 == 9:
-            # Cas particuliers pour soixante-dix et quatre-vingt-dix
-            base = tens[n // 10 - 1] if n // 10 == 7 else tens[n // 10 - 1]
-            return f"{base.capitalize()}-{teens[n % 10 - 10]}"
-        else:
-            separator = "-et-" if n % 10 == 1 and n // 10 != 8 else "-"
-            return f"{tens[n // 10].capitalize()}{separator}{units[n % 10]}"
-    else:
-        # Trouver la plus grande unité
-        divisor = 1
-        for d in sorted(big_numbers.keys(), reverse=True):
-            if n >= d:
-                divisor = d
-                break
-        
-        quotient = n // divisor
-        remainder = n % divisor
-        
-        if divisor == 100:
-            if quotient == 1 and remainder == 0:
-                return "Cent"
-            elif quotient == 1:
-                return f"Cent {nombre_en_lettres(remainder)}"
-            elif remainder == 0:
-                return f"{units[quotient].capitalize()} cents"
-            else:
-                return f"{units[quotient].capitalize()} cent {nombre_en_lettres(remainder)}"
-        else:
-            unit_name = big_numbers[divisor]
-            if quotient == 1:
-                prefix = "Un"
-            else:
-                prefix = nombre_en_lettres(quotient)
-            
-            if remainder == 0:
-                return f"{prefix} {unit_name}"
-            else:
-                return f"{prefix} {unit_name} {nombre_en_lettres(remainder)}"
-
-# Fonction pour générer un QR code
-def generer_qr_code(data):
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-    img.save(temp_file.name)
-    return temp_file.name
+from identification.qr import QrCodeVectoriel
+from identification.ressources import registre
+from .pdf import (
+    BORDURE, CLAIR, MARGE, PRIMAIRE, SECONDAIRE,
+    dessiner_entete, dessiner_pied, dessiner_titre, nombre_en_lettres,
+)
 
 #################################################################################################################################
 
@@ -266,101 +161,13 @@ def generer_facture_contribution(request, pk):
 
     # Créer un buffer pour le PDF
     buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
+    p = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
     width, height = A4
 
-    # Définition des marges
-    MARGIN_LEFT = 1.5 * cm
-    MARGIN_RIGHT = 1.5 * cm
-    MARGIN_TOP = 1.5 * cm
-    MARGIN_BOTTOM = 1.5 * cm
-
-    # Couleurs de la charte graphique
-    primary_color = colors.HexColor("#2c3e50")  # Bleu foncé
-    secondary_color = colors.HexColor("#3498db")  # Bleu
-    accent_color = colors.HexColor("#e74c3c")  # Rouge
-    light_color = colors.HexColor("#ecf0f1")  # Gris très clair
-    dark_color = colors.HexColor("#2c3e50")  # Texte foncé
-
-    # Styles de texte
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=primary_color,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        textColor=dark_color,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        textColor=dark_color,
-        fontName='Helvetica'
-    )
-    
-    bold_style = ParagraphStyle(
-        'CustomBold',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        textColor=dark_color,
-        fontName='Helvetica-Bold'
-    )
-
-    # En-tête avec deux colonnes (logo + infos société)
-    p.setFillColor(light_color)
-    p.rect(0, height - 3.5*cm, width, 3.5*cm, fill=True, stroke=False)
-    
-    # Logo (à gauche)
-    try:
-        logo_path = finders.find('images/logo1.png')
-        if logo_path:  # si trouvé
-            p.drawImage(logo_path, MARGIN_LEFT, height - 3.5*cm, width=2.5*cm, height=2.5*cm, mask='auto')
-        else:
-            raise FileNotFoundError("Logo non trouvé")
-    except:
-        # Placeholder
-        p.setFillColor(secondary_color)
-        p.roundRect(MARGIN_LEFT, height - 3*cm, 2.5*cm, 2.5*cm, 5, stroke=False, fill=True)
-        p.setFillColor(colors.white)
-        p.setFont("Helvetica-Bold", 10)
-        p.drawCentredString(MARGIN_LEFT + 1.25*cm, height - 2.2*cm, "LOGO")
-        p.drawCentredString(MARGIN_LEFT + 1.25*cm, height - 2.6*cm, "RENEMICO")
-
-    # Informations de la société (à droite)
-    p.setFillColor(dark_color)
-    p.setFont("Helvetica-Bold", 14)
-    p.drawRightString(width - MARGIN_RIGHT, height - 2*cm, "REGROUPEMENT DES NEGOCIANTS MINIERS DU CONGO")
-    
-    p.setFont("Helvetica", 10)
-    p.drawRightString(width - MARGIN_RIGHT, height - 2.7*cm, "297, Avenue Lubudi, Quartier Industriel, Manika, Kolwezi")
-    p.drawRightString(width - MARGIN_RIGHT, height - 3.1*cm, "Lualaba - RDC")
-    p.drawRightString(width - MARGIN_RIGHT, height - 3.5*cm, "Tél: +243 81 60 69 861 - Email: contact@renemico.com")
-
-    # Position verticale initiale après l'en-tête
+    # En-tête (logo + infos société) et titre du document
+    dessiner_entete(p)
     y = height - 4.5*cm
-
-    # Titre du document avec bandeau coloré
-    p.setFillColor(secondary_color)
-    p.rect(0, y - 0.5*cm, width, 1.2*cm, fill=True, stroke=False)
-    
-    p.setFillColor(colors.white)
-    p.setFont("Helvetica-Bold", 18)
-    p.drawCentredString(width/2, y, "FACTURE DE COTISATION MENSUELLE")
+    dessiner_titre(p, "FACTURE DE COTISATION MENSUELLE", y)
     y -= 1.8*cm
 
     # Informations de la facture dans un tableau à deux colonnes
@@ -374,27 +181,27 @@ def generer_facture_contribution(request, pk):
         ('FONT', (0, 0), (-1, -1), 'Helvetica', 10),
         ('FONT', (0, 0), (0, -1), 'Helvetica-Bold', 10),
         ('FONT', (2, 0), (2, -1), 'Helvetica-Bold', 10),
-        ('BACKGROUND', (0, 0), (0, -1), light_color),
-        ('BACKGROUND', (2, 0), (2, -1), light_color),
+        ('BACKGROUND', (0, 0), (0, -1), CLAIR),
+        ('BACKGROUND', (2, 0), (2, -1), CLAIR),
         ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
         ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
         ('TOPPADDING', (0, 0), (-1, -1), 6),
     ]))
     
     facture_table.wrapOn(p, width, height)
-    facture_table.drawOn(p, MARGIN_LEFT, y - 1.2*cm)
+    facture_table.drawOn(p, MARGE, y - 1.2*cm)
     y -= 2.5*cm
 
     # Informations du membre
-    p.setFillColor(primary_color)
+    p.setFillColor(PRIMAIRE)
     p.setFont("Helvetica-Bold", 12)
-    p.drawString(MARGIN_LEFT, y, "INFORMATIONS DU MEMBRE")
+    p.drawString(MARGE, y, "INFORMATIONS DU MEMBRE")
     y -= 1*cm
 
     # Ligne de séparation
-    p.setStrokeColor(secondary_color)
+    p.setStrokeColor(SECONDAIRE)
     p.setLineWidth(1)
-    p.line(MARGIN_LEFT, y, width - MARGIN_RIGHT, y)
+    p.line(MARGE, y, width - MARGE, y)
     y -= 1.3*cm
     
     # Tableau des informations du membre
@@ -409,7 +216,7 @@ def generer_facture_contribution(request, pk):
     membre_table.setStyle(TableStyle([
         ('FONT', (0, 0), (-1, -1), 'Helvetica', 10),
         ('FONT', (0, 0), (0, -1), 'Helvetica-Bold', 10),
-        ('BACKGROUND', (0, 0), (0, -1), light_color),
+        ('BACKGROUND', (0, 0), (0, -1), CLAIR),
         ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
         ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
         ('TOPPADDING', (0, 0), (-1, -1), 8),
@@ -418,17 +225,17 @@ def generer_facture_contribution(request, pk):
     ]))
     
     membre_table.wrapOn(p, width, height)
-    membre_table.drawOn(p, MARGIN_LEFT, y - len(membre_data)*0.7*cm)
+    membre_table.drawOn(p, MARGE, y - len(membre_data)*0.7*cm)
     y -= len(membre_data)*0.9*cm + 1*cm
 
     # Détails de la facture
-    p.setFillColor(primary_color)
+    p.setFillColor(PRIMAIRE)
     p.setFont("Helvetica-Bold", 12)
-    p.drawString(MARGIN_LEFT, y, "DÉTAILS DE LA COTISATION")
+    p.drawString(MARGE, y, "DÉTAILS DE LA COTISATION")
     y -= 1*cm
 
     # Ligne de séparation
-    p.line(MARGIN_LEFT, y, width - MARGIN_RIGHT, y)
+    p.line(MARGE, y, width - MARGE, y)
     y -= 1*cm
     
     # Tableau des détails
@@ -441,7 +248,7 @@ def generer_facture_contribution(request, pk):
     details_table.setStyle(TableStyle([
         ('FONT', (0, 0), (-1, -1), 'Helvetica', 10),
         ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
-        ('BACKGROUND', (0, 0), (-1, 0), primary_color),
+        ('BACKGROUND', (0, 0), (-1, 0), PRIMAIRE),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
         ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
         ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
@@ -449,18 +256,18 @@ def generer_facture_contribution(request, pk):
         ('TOPPADDING', (0, 0), (-1, -1), 8),
         ('LEFTPADDING', (0, 0), (-1, -1), 6),
         ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor("#bdc3c7")),
+        ('GRID', (0, 0), (-1, -1), 1, BORDURE),
     ]))
     
     details_table.wrapOn(p, width, height)
-    details_table.drawOn(p, MARGIN_LEFT, y - len(details_data)*0.7*cm)
+    details_table.drawOn(p, MARGE, y - len(details_data)*0.7*cm)
     y -= len(details_data)*0.9*cm + 1*cm
 
     # Montant en lettres
     # Montant en lettres
-    p.setFillColor(dark_color)
+    p.setFillColor(PRIMAIRE)
     p.setFont("Helvetica-Bold", 10)
-    p.drawString(MARGIN_LEFT, y, "Montant en lettres:")
+    p.drawString(MARGE, y, "Montant en lettres:")
     p.setFont("Helvetica", 10)
 
     # Conversion en lettres + devise
@@ -480,25 +287,25 @@ def generer_facture_contribution(request, pk):
         parts.append(current_part.strip())
         
         for i, part in enumerate(parts):
-            p.drawString(MARGIN_LEFT + 3.5*cm, y - i*0.4*cm, part)
+            p.drawString(MARGE + 3.5*cm, y - i*0.4*cm, part)
         y -= (len(parts) - 1)*0.4*cm
     else:
-        p.drawString(MARGIN_LEFT + 3.5*cm, y, montant_lettres)
+        p.drawString(MARGE + 3.5*cm, y, montant_lettres)
 
     y -= 0.8*cm
 
 
     # Cadre pour le montant total
-    p.setFillColor(light_color)
-    p.setStrokeColor(secondary_color)
+    p.setFillColor(CLAIR)
+    p.setStrokeColor(SECONDAIRE)
     p.setLineWidth(1.5)
     p.roundRect(width - 8*cm, y - 1.5*cm, 6.5*cm, 1.5*cm, 5, stroke=True, fill=True)
     
-    p.setFillColor(primary_color)
+    p.setFillColor(PRIMAIRE)
     p.setFont("Helvetica-Bold", 12)
     p.drawString(width - 7.5*cm, y - 0.7*cm, "TOTAL:")
     p.setFont("Helvetica-Bold", 14)
-    p.drawRightString(width - MARGIN_RIGHT - 0.5*cm, y - 0.7*cm, f"{contribution.montant:.2f} USD")
+    p.drawRightString(width - MARGE - 0.5*cm, y - 0.7*cm, f"{contribution.montant:.2f} USD")
     y -= 2.5*cm
 
     # Générer et ajouter le QR Code
@@ -511,46 +318,39 @@ def generer_facture_contribution(request, pk):
     Date: {contribution.date_paiement.strftime('%d/%m/%Y')}
     """
     
-    qr_code_path = generer_qr_code(qr_data)
-    p.drawImage(qr_code_path, MARGIN_LEFT, y - 1.5*cm, width=3.5*cm, height=3.5*cm)
-    os.unlink(qr_code_path)  # Supprimer le fichier temporaire
+    QrCodeVectoriel(qr_data, 3.5*cm, niveau='L').drawOn(p, MARGE, y - 1.5*cm)
     
     # --- SIGNATURE RENEMICO AVEC IMAGE ---
     try:
-        signature_path = finders.find("images/pca.png")  # mets ton fichier ici
-        if signature_path:
+        signature = registre.reader('pca')
+        if signature:
             sig_width = 4.5*cm
             sig_height = 4*cm
-            sig_x = MARGIN_LEFT + 6*cm   # position horizontale (ajuste selon besoin)
+            sig_x = MARGE + 6*cm   # position horizontale (ajuste selon besoin)
             sig_y = y - 1*cm             # position verticale (ajuste aussi)
 
             # Texte "Pour l'organisation:"
-            p.setFillColor(dark_color)
+            p.setFillColor(PRIMAIRE)
             p.setFont("Helvetica", 10)
-            p.drawString(MARGIN_LEFT + 4.5*cm, y - 6.5*cm, "Pour l'organisation:")
+            p.drawString(MARGE + 4.5*cm, y - 6.5*cm, "Pour l'organisation:")
 
             # Ligne
-            p.line(MARGIN_LEFT + 4.5*cm, y - 6.7*cm, MARGIN_LEFT + 10*cm, y - 6.7*cm)
+            p.line(MARGE + 4.5*cm, y - 6.7*cm, MARGE + 10*cm, y - 6.7*cm)
 
             # Image de la signature
-            p.drawImage(signature_path, sig_x, sig_y, width=sig_width, height=sig_height, mask='auto')
+            p.drawImage(signature, sig_x, sig_y, width=sig_width, height=sig_height, mask='auto')
 
             # Texte "Signature et cachet"
-            p.drawString(MARGIN_LEFT + 15*cm, sig_y - 0.0*cm, "Signature")
+            p.drawString(MARGE + 15*cm, sig_y - 0.0*cm, "Signature")
 
     except Exception as e:
         print("Erreur insertion signature:", e)
     
     # Notes et conditions en bas de page
-    y = MARGIN_BOTTOM + 2.5*cm
-    p.setStrokeColor(colors.HexColor('#bdc3c7'))
-    p.setLineWidth(1)
-    p.line(MARGIN_LEFT, y, width - MARGIN_RIGHT, y)
-    
-    p.setFillColor(colors.HexColor('#7f8c8d'))
-    p.setFont("Helvetica-Oblique", 9)
-    p.drawCentredString(width/2, MARGIN_BOTTOM + 1.8*cm, "Merci pour votre confiance et votre cotisation mensuelle !")
-    p.drawCentredString(width/2, MARGIN_BOTTOM + 1.3*cm, "Cette facture est générée automatiquement, pour toute question, contactez-nous à contact@renemico.com ou au +243 81 60 69 861.")
+    dessiner_pied(p, [
+        "Merci pour votre confiance et votre cotisation mensuelle !",
+        "Cette facture est générée automatiquement, pour toute question, contactez-nous à contact@renemico.com ou au +243 81 60 69 861.",
+    ])
 
     p.showPage()
     p.save()
@@ -565,69 +365,8 @@ def generer_facture_contribution(request, pk):
 #######################################################################################################
 #######################################################################################################
 #HISTORIQUE DES COTISTIONS D'UN MEMBRE
-from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from io import BytesIO
-import os
-import qrcode
-import tempfile
-from django.conf import settings
-from .models import Membre
-from django.contrib.staticfiles import finders
-
-# Fonction pour convertir les nombres en lettres (version simplifiée)
-def nombre_en_lettres(n):
-    """
-    Convertit un nombre en lettres en français avec une majuscule au début.
-    """
-    if not isinstance(n, (int, float)) or n < 0:
-        return "Nombre invalide"
-    
-    # Pour les entiers uniquement (pas besoin de décimales pour l'historique)
-    units = ["", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf"]
-    teens = ["dix", "onze", "douze", "treize", "quatorze", "quinze", "seize", "dix-sept", "dix-huit", "dix-neuf"]
-    tens = ["", "dix", "vingt", "trente", "quarante", "cinquante", "soixante", "soixante-dix", "quatre-vingt", "quatre-vingt-dix"]
-
-    if n == 0:
-        return "Zéro"
-    elif n < 10:
-        return units[n].capitalize()
-    elif 10 <= n < 20:
-        return teens[n - 10].capitalize()
-    elif 20 <= n < 100:
-        if n % 10 == 0:
-            return tens[n // 10].capitalize()
-        elif n // 10 == 7 or n // 10 == 9:
-            base = tens[n // 10 - 1] if n // 10 == 7 else tens[n // 10 - 1]
-            return f"{base.capitalize()}-{teens[n % 10 - 10]}"
-        else:
-            separator = "-et-" if n % 10 == 1 and n // 10 != 8 else "-"
-            return f"{tens[n // 10].capitalize()}{separator}{units[n % 10]}"
-    else:
-        return f"{n}"
-
-# Fonction pour générer un QR code
-def generer_qr_code(data):
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-    img.save(temp_file.name)
-    return temp_file.name
+from reportlab.platypus import Paragraph, Spacer
+from .pdf import STYLES, DocumentRenemico
 
 def historique_membre_pdf(request, membre_id):
     membre = get_object_or_404(Membre, id=membre_id)
@@ -636,133 +375,21 @@ def historique_membre_pdf(request, membre_id):
     response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="historique_{membre.nom}.pdf"'
 
-    # Créer un buffer pour le PDF
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # Définition des marges
-    MARGIN_LEFT = 1.5 * cm
-    MARGIN_RIGHT = 1.5 * cm
-    MARGIN_TOP = 1.5 * cm
-    MARGIN_BOTTOM = 1.5 * cm
-
-    # Couleurs de la charte graphique
-    primary_color = colors.HexColor("#2c3e50")  # Bleu foncé
-    secondary_color = colors.HexColor("#3498db")  # Bleu
-    accent_color = colors.HexColor("#e74c3c")  # Rouge
-    light_color = colors.HexColor("#ecf0f1")  # Gris très clair
-    dark_color = colors.HexColor("#2c3e50")  # Texte foncé
-
-    # Styles de texte
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=primary_color,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        textColor=dark_color,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        textColor=dark_color,
-        fontName='Helvetica'
-    )
-
-    # En-tête avec deux colonnes (logo + infos société)
-    p.setFillColor(light_color)
-    p.rect(0, height - 3.5*cm, width, 3.5*cm, fill=True, stroke=False)
-    
-    # Logo (à gauche)
-    try:
-        logo_path = finders.find('images/logo1.png')
-        if logo_path:  # si trouvé
-            p.drawImage(logo_path, MARGIN_LEFT, height - 3.5*cm, width=2.5*cm, height=2.5*cm, mask='auto')
-        else:
-            raise FileNotFoundError("Logo non trouvé")
-    except:
-        # Placeholder
-        p.setFillColor(secondary_color)
-        p.roundRect(MARGIN_LEFT, height - 3*cm, 2.5*cm, 2.5*cm, 5, stroke=False, fill=True)
-        p.setFillColor(colors.white)
-        p.setFont("Helvetica-Bold", 10)
-        p.drawCentredString(MARGIN_LEFT + 1.25*cm, height - 2.2*cm, "LOGO")
-        p.drawCentredString(MARGIN_LEFT + 1.25*cm, height - 2.6*cm, "RENEMICO")
-
-    # Informations de la société (à droite)
-    p.setFillColor(dark_color)
-    p.setFont("Helvetica-Bold", 14)
-    p.drawRightString(width - MARGIN_RIGHT, height - 2*cm, "REGROUPEMENT DES NEGOCIANTS MINIERS DU CONGO")
-    
-    p.setFont("Helvetica", 10)
-    p.drawRightString(width - MARGIN_RIGHT, height - 2.7*cm, "297, Avenue Lubudi, Quartier Industriel, Manika, Kolwezi")
-    p.drawRightString(width - MARGIN_RIGHT, height - 3.1*cm, "Lualaba - RDC")
-    p.drawRightString(width - MARGIN_RIGHT, height - 3.5*cm, "Tél: +243 81 60 69 861 - Email: contact@renemico.com")
-
-    # Position verticale initiale après l'en-tête
-    y = height - 4.5*cm
-
-    # Titre du document avec bandeau coloré
-    p.setFillColor(secondary_color)
-    p.rect(0, y - 0.5*cm, width, 1.2*cm, fill=True, stroke=False)
-    
-    p.setFillColor(colors.white)
-    p.setFont("Helvetica-Bold", 18)
-    p.drawCentredString(width/2, y, "HISTORIQUE DES COTISATIONS")
-    y -= 1.8*cm
-
-    # Informations du membre
-    p.setFillColor(primary_color)
-    p.setFont("Helvetica-Bold", 12)
-
-    titre = f"HISTORIQUE DES COTISATIONS DE: {membre.nom.upper()} {membre.post_nom.upper()} {membre.prenom.upper()}"
-
-    # centrer horizontalement sur la largeur de la page
-    p.drawCentredString(width / 2, y, titre)
-
-    y -= 1*cm
-
-
-    # Ligne de séparation
-    p.setStrokeColor(secondary_color)
-    p.setLineWidth(1)
-    p.line(MARGIN_LEFT, y, width - MARGIN_RIGHT, y)
-    y -= 0.5*cm
-    
     # Tableau des contributions
     data = [["Mois", "Montant (USD)"]]
-    total = 0
-    for c in membre.contributions.all().order_by('-mois'):
-        data.append([c.mois.strftime('%B %Y'), f"{c.montant:,.2f}"])
-        total += c.montant
+    for mois, montant in membre.contributions.order_by('-mois').values_list('mois', 'montant'):
+        data.append([mois.strftime('%B %Y'), f"{montant:,.2f}"])
+    total = resume_de(membre).total_paye
 
     # Ajouter une ligne de total
     data.append(["TOTAL", f"{total:,.2f}"])
 
-    # Largeur agrandie
-    col_widths = [12*cm, 6*cm]  # élargir le tableau
-
-    # Création du tableau
-    table = Table(data, colWidths=col_widths)
+    # Largeur agrandie ; l'en-tête est répété si le tableau déborde sur plusieurs pages
+    table = Table(data, colWidths=[12*cm, 6*cm], repeatRows=1)
 
     table.setStyle(TableStyle([
         # En-tête (centré, couleur)
-        ('BACKGROUND', (0,0), (-1,0), primary_color),
+        ('BACKGROUND', (0,0), (-1,0), PRIMAIRE),
         ('TEXTCOLOR', (0,0), (-1,0), colors.white),
         ('ALIGN', (0,0), (-1,0), 'CENTER'),  # centrer uniquement l’entête
         ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
@@ -776,44 +403,18 @@ def historique_membre_pdf(request, membre_id):
         ('ALIGN', (1,1), (1,-1), 'RIGHT'),
 
         # Ligne TOTAL (gras + couleur fond)
-        ('BACKGROUND', (0,-1), (-1,-1), light_color),
+        ('BACKGROUND', (0,-1), (-1,-1), CLAIR),
         ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
         ('LINEABOVE', (0,-1), (-1,-1), 1, colors.black),
 
         # Bordures du tableau
-        ('GRID', (0,0), (-1,-2), 1, colors.HexColor("#bdc3c7")),
+        ('GRID', (0,0), (-1,-2), 1, BORDURE),
     ]))
 
-    # Calculer la hauteur du tableau
-    table_height = len(data) * 0.7 * cm
-    table_width, _ = table.wrap(0, 0)
-
-    # Position centrée horizontalement
-    table_x = (width - table_width) / 2
-    table_y = y - table_height
-
-    # Vérifier si assez d’espace
-    if table_y < MARGIN_BOTTOM + 5*cm:
-        p.showPage()
-        y = height - MARGIN_TOP
-        table_y = y - table_height
-
-    # Dessiner le tableau centré
-    table.drawOn(p, table_x, table_y)
-    y = table_y - 1*cm
-
-
     # Montant total en lettres
-    p.setFillColor(dark_color)
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(MARGIN_LEFT, y, "Total en lettres:")
-    p.setFont("Helvetica", 10)
-    
     montant_lettres = nombre_en_lettres(int(total)) + " dollars américains"
-    p.drawString(MARGIN_LEFT + 3*cm, y, montant_lettres)
-    y -= 1*cm
 
-    # Générer et ajouter le QR Code
+    # QR Code
     qr_data = f"""
     RENEMICO - Historique des cotisations
     Membre: {membre.nom} {membre.post_nom} {membre.prenom}
@@ -821,396 +422,235 @@ def historique_membre_pdf(request, membre_id):
     Nombre de mois: {len(data)-2}
     Généré le: {timezone.now().strftime('%d/%m/%Y')}
     """
-    
-    qr_code_path = generer_qr_code(qr_data)
-    p.drawImage(qr_code_path, MARGIN_LEFT, y - 3.5*cm, width=3.5*cm, height=3.5*cm)
-    os.unlink(qr_code_path)  # Supprimer le fichier temporaire
-    
-    # Pied de page
-    y = MARGIN_BOTTOM + 2.5*cm
-    p.setStrokeColor(colors.HexColor('#bdc3c7'))
-    p.setLineWidth(1)
-    p.line(MARGIN_LEFT, y, width - MARGIN_RIGHT, y)
-    
-    p.setFillColor(colors.HexColor('#7f8c8d'))
-    p.setFont("Helvetica-Oblique", 9)
-    p.drawCentredString(width/2, MARGIN_BOTTOM + 1.8*cm, "Merci pour votre confiance et vos cotisations !")
-    p.drawCentredString(width/2, MARGIN_BOTTOM + 1.3*cm, "Ce document est généré automatiquement, pour toute question, contactez-nous à contact@renemico.com")
 
-    p.showPage()
-    p.save()
-    
-    pdf = buffer.getvalue()
+    buffer = BytesIO()
+    titre = f"HISTORIQUE DES COTISATIONS DE: {membre.nom.upper()} {membre.post_nom.upper()} {membre.prenom.upper()}"
+    DocumentRenemico(buffer, "HISTORIQUE DES COTISATIONS", titre).build([
+        table,
+        Spacer(1, 1*cm),
+        Paragraph(f"<b>Total en lettres :</b> {montant_lettres}", STYLES['normal']),
+        QrCodeVectoriel(qr_data, 3.5*cm, niveau='L'),
+        Spacer(1, 0.5*cm),
+        Paragraph("Merci pour votre confiance et vos cotisations !", STYLES['pied']),
+        Paragraph("Ce document est généré automatiquement, pour toute question, contactez-nous à contact@renemico.com", STYLES['pied']),
+    ])
+
+    response.write(buffer.getvalue())
     buffer.close()
-    response.write(pdf)
-    
     return response
 
 
 ############################################################################################################
 from django.http import HttpResponse
-import openpyxl
-from openpyxl.utils import get_column_letter
-from io import BytesIO
+from identification.tableur import reponse_xlsx
 
 def historique_membre_excel(request, membre_id):
     membre = get_object_or_404(Membre, id=membre_id)
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"Historique {membre.nom}"
+    contributions = membre.contributions.order_by('-mois').values_list('mois', 'montant').iterator(chunk_size=2000)
+    lignes = ([mois.strftime('%B %Y'), montant] for mois, montant in contributions)
 
-    # entêtes
-    ws.append(["Mois", "Montant"])
-
-    for c in membre.contributions.all().order_by('-mois'):
-        ws.append([c.mois.strftime('%B %Y'), c.montant])
-
-    # largeur colonnes
-    for col in ws.columns:
-        ws.column_dimensions[get_column_letter(col[0].column)].width = 20
-
-    # sauvegarde dans mémoire
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-
-    # réponse HTTP
-    response = HttpResponse(
-        buffer,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    # largeur colonnes fixe : 20
+    return reponse_xlsx(
+        f"historique_{membre.nom}.xlsx", f"Historique {membre.nom}",
+        ["Mois", "Montant"], lignes, largeurs=20,
     )
-    response['Content-Disposition'] = f'attachment; filename="historique_{membre.nom}.xlsx"'
-    return response
 
 ##########################################################################################################
 #HISTORIQUE DES TOUS LES MEMBRES
 # finance/views.py
-from django.shortcuts import get_object_or_404
-from django.http import HttpResponse, FileResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle, Paragraph, SimpleDocTemplate
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from io import BytesIO
-import os
-import qrcode
+from django.http import FileResponse
 import tempfile
-from django.conf import settings
-from django.utils import timezone
 from .models import Membre, Contribution
-from django.contrib.staticfiles import finders
-
-# Fonction pour convertir les nombres en lettres (version simplifiée)
-def nombre_en_lettres(n):
-    """
-    Convertit un nombre en lettres en français avec une majuscule au début.
-    """
-    if not isinstance(n, (int, float)) or n < 0:
-        return "Nombre invalide"
-    
-    # Pour les entiers uniquement (pas besoin de décimales pour l'historique)
-    units = ["", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf"]
-    teens = ["dix", "onze", "douze", "treize", "quatorze", "quinze", "seize", "dix-sept", "dix-huit", "dix-neuf"]
-    tens = ["", "dix", "vingt", "trente", "quarante", "cinquante", "soixante", "soixante-dix", "quatre-vingt", "quatre-vingt-dix"]
-
-    if n == 0:
-        return "Zéro"
-    elif n < 10:
-        return units[n].capitalize()
-    elif 10 <= n < 20:
-        return teens[n - 10].capitalize()
-    elif 20 <= n < 100:
-        if n % 10 == 0:
-            return tens[n // 10].capitalize()
-        elif n // 10 == 7 or n // 10 == 9:
-            base = tens[n // 10 - 1] if n // 10 == 7 else tens[n // 10 - 1]
-            return f"{base.capitalize()}-{teens[n % 10 - 10]}"
-        else:
-            separator = "-et-" if n % 10 == 1 and n // 10 != 8 else "-"
-            return f"{tens[n // 10].capitalize()}{separator}{units[n % 10]}"
-    else:
-        return f"{n}"
-
-# Fonction pour générer un QR code
-def generer_qr_code(data):
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-    img.save(temp_file.name)
-    return temp_file.name
-
-def tous_historique_pdf(request):
-    # Préparer la réponse HTTP avec en-tête PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="Historique_Tous_Membres.pdf"'
-
-    # Créer un buffer pour le PDF
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # Définition des marges
-    MARGIN_LEFT = 1.5 * cm
-    MARGIN_RIGHT = 1.5 * cm
-    MARGIN_TOP = 1.5 * cm
-    MARGIN_BOTTOM = 1.5 * cm
-
-    # Couleurs de la charte graphique
-    primary_color = colors.HexColor("#2c3e50")  # Bleu foncé
-    secondary_color = colors.HexColor("#3498db")  # Bleu
-    accent_color = colors.HexColor("#e74c3c")  # Rouge
-    light_color = colors.HexColor("#ecf0f1")  # Gris très clair
-    dark_color = colors.HexColor("#2c3e50")  # Texte foncé
-
-    # Styles de texte
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=primary_color,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        textColor=dark_color,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        textColor=dark_color,
-        fontName='Helvetica'
-    )
 
-    # En-tête avec deux colonnes (logo + infos société)
-    p.setFillColor(light_color)
-    p.rect(0, height - 3.5*cm, width, 3.5*cm, fill=True, stroke=False)
-    
-    # Logo (à gauche)
-    try:
-        logo_path = finders.find('images/logo1.png')
-        if logo_path:  # si trouvé
-            p.drawImage(logo_path, MARGIN_LEFT, height - 3.5*cm, width=2.5*cm, height=2.5*cm, mask='auto')
-        else:
-            raise FileNotFoundError("Logo non trouvé")
-    except:
-        # Placeholder
-        p.setFillColor(secondary_color)
-        p.roundRect(MARGIN_LEFT, height - 3*cm, 2.5*cm, 2.5*cm, 5, stroke=False, fill=True)
-        p.setFillColor(colors.white)
-        p.setFont("Helvetica-Bold", 10)
-        p.drawCentredString(MARGIN_LEFT + 1.25*cm, height - 2.2*cm, "LOGO")
-        p.drawCentredString(MARGIN_LEFT + 1.25*cm, height - 2.6*cm, "RENEMICO")
-
-    # Informations de la société (à droite)
-    p.setFillColor(dark_color)
-    p.setFont("Helvetica-Bold", 14)
-    p.drawRightString(width - MARGIN_RIGHT, height - 2*cm, "REGROUPEMENT DES NEGOCIANTS MINIERS DU CONGO")
-    
-    p.setFont("Helvetica", 10)
-    p.drawRightString(width - MARGIN_RIGHT, height - 2.7*cm, "297, Avenue Lubudi, Quartier Industriel, Manika, Kolwezi")
-    p.drawRightString(width - MARGIN_RIGHT, height - 3.1*cm, "Lualaba - RDC")
-    p.drawRightString(width - MARGIN_RIGHT, height - 3.5*cm, "Tél: +243 81 60 69 861 - Email: contact@renemico.com")
+# Rapport paginé : lignes lues par paquets, tableaux découpés sur autant de pages que nécessaire
+from .pdf import FluxFlowables
 
-    # Position verticale initiale après l'en-tête
-    y = height - 4.5*cm
+HISTORIQUE_COLONNES = ["Membre", "Code", "Province", "Mois", "Montant (USD)"]
+HISTORIQUE_LARGEURS = [5*cm, 2.5*cm, 3.5*cm, 3.5*cm, 3*cm]
+HISTORIQUE_HAUTEUR_LIGNE = 0.55*cm
+HISTORIQUE_HAUTEUR_ENTETE = 0.8*cm
+HISTORIQUE_LIGNES_PAR_TABLE = 100
+HISTORIQUE_TAILLE_LOT = 2000
+HISTORIQUE_GROUPES = ('province', 'membre')
 
-    # Titre du document avec bandeau coloré
-    p.setFillColor(secondary_color)
-    p.rect(0, y - 0.5*cm, width, 1.2*cm, fill=True, stroke=False)
-    
-    p.setFillColor(colors.white)
-    p.setFont("Helvetica-Bold", 18)
-    p.drawCentredString(width/2, y, "HISTORIQUE DES COTISATIONS")
-    y -= 1.8*cm
+# Fond des sous-totaux par province (les autres couleurs viennent de la charte, voir pdf.py)
+HISTORIQUE_SOUS_TOTAL = colors.HexColor("#d6eaf8")
 
-    # Informations du document
-    p.setFillColor(primary_color)
-    p.setFont("Helvetica-Bold", 12)
-
-    titre = "HISTORIQUE DES COTISATIONS DE TOUS LES MEMBRES"
+HISTORIQUE_STYLE_LIGNES = [
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (1, 0), (1, -1), 'CENTER'),   # Code
+    ('ALIGN', (4, 0), (4, -1), 'RIGHT'),    # Montant
+    ('GRID', (0, 0), (-1, -1), 1, BORDURE),
+]
 
-    # centrer horizontalement sur la largeur de la page
-    p.drawCentredString(width / 2, y, titre)
-
-    y -= 1*cm
 
-    # Ligne de séparation
-    p.setStrokeColor(secondary_color)
-    p.setLineWidth(1)
-    p.line(MARGIN_LEFT, y, width - MARGIN_RIGHT, y)
-    y -= 0.5*cm
-    
-    # Récupérer toutes les contributions (avec membre)
-    contributions = Contribution.objects.select_related('membre').order_by('membre__nom', '-mois')
-    
-    # Tableau des contributions
-    data = [["Membre", "Code", "Province", "Mois", "Montant (USD)"]]
-    total_general = 0
-    
-    for c in contributions:
-        data.append([
-            f"{c.membre.nom} {c.membre.post_nom}",
-            c.membre.code,
-            c.membre.province,
-            c.mois.strftime('%B %Y'),
-            f"{c.montant:,.2f}"
-        ])
-        total_general += c.montant
-
-    # Ajouter une ligne de total
-    data.append([
-        "TOTAL GENERAL", "", "", "",  # occupe les 4 premières colonnes
-        f"{total_general:,.2f}"       # montant dans la dernière colonne
-    ])
-
-    # Largeur des colonnes
-    col_widths = [4*cm, 3*cm, 4*cm, 5*cm, 3*cm]
-
-    # Création du tableau
-    table = Table(data, colWidths=col_widths)
+def _lignes_historique(groupes, totaux):
+    """
+    Lignes du rapport (type, cellules) dans l'ordre d'affichage, lues par
+    paquets de HISTORIQUE_TAILLE_LOT. `groupes` : sous-totaux par province
+    et / ou par membre. `totaux` (dict) reçoit le total et le nombre de lignes.
+    """
+    par_province = 'province' in groupes
+    par_membre = 'membre' in groupes
+    ordre = (['membre__province'] if par_province else []) + ['membre__nom', 'membre__post_nom', 'membre_id', '-mois']
+    contributions = Contribution.objects.order_by(*ordre).values_list(
+        'membre_id', 'membre__nom', 'membre__post_nom', 'membre__code', 'membre__province', 'mois', 'montant',
+    ).iterator(chunk_size=HISTORIQUE_TAILLE_LOT)
+
+    membre = province = None
+    sous_total_membre = sous_total_province = 0
+    nombre_membre = nombre_province = 0
+    for membre_id, nom, post_nom, code, province_ligne, mois, montant in contributions:
+        # Un membre n'a qu'une province : changer de province, c'est aussi changer de membre
+        if par_membre and membre is not None and membre_id != membre[0]:
+            yield 'sous_total_membre', [f"Sous-total {membre[1]} ({nombre_membre} mois)", "", "", "", f"{sous_total_membre:,.2f}"]
+            sous_total_membre = nombre_membre = 0
+        if par_province and province_ligne != province:
+            if nombre_province:
+                yield 'sous_total_province', [f"Sous-total {province} ({nombre_province} contributions)", "", "", "", f"{sous_total_province:,.2f}"]
+            yield 'groupe', [f"Province : {province_ligne}", "", "", "", ""]
+            sous_total_province = nombre_province = 0
+        membre = (membre_id, f"{nom} {post_nom}")
+        province = province_ligne
+
+        yield 'ligne', [membre[1], code, province_ligne, mois.strftime('%B %Y'), f"{montant:,.2f}"]
+        sous_total_membre += montant
+        sous_total_province += montant
+        nombre_membre += 1
+        nombre_province += 1
+        totaux['total'] += montant
+        totaux['nombre'] += 1
+
+    if par_membre and nombre_membre:
+        yield 'sous_total_membre', [f"Sous-total {membre[1]} ({nombre_membre} mois)", "", "", "", f"{sous_total_membre:,.2f}"]
+    if par_province and nombre_province:
+        yield 'sous_total_province', [f"Sous-total {province} ({nombre_province} contributions)", "", "", "", f"{sous_total_province:,.2f}"]
+    yield 'total', ["TOTAL GENERAL", "", "", "", f"{totaux['total']:,.2f}"]
+
+
+def _style_ligne(type_ligne, rang):
+    """Commandes TableStyle d'une ligne de regroupement (aucune pour une ligne simple)."""
+    if type_ligne == 'ligne':
+        return []
+    fond = {
+        'groupe': PRIMAIRE,
+        'sous_total_membre': CLAIR,
+        'sous_total_province': HISTORIQUE_SOUS_TOTAL,
+        'total': CLAIR,
+    }[type_ligne]
+    commandes = [
+        ('SPAN', (0, rang), (3, rang) if type_ligne != 'groupe' else (-1, rang)),
+        ('ALIGN', (0, rang), (0, rang), 'LEFT'),
+        ('BACKGROUND', (0, rang), (-1, rang), fond),
+        ('FONTNAME', (0, rang), (-1, rang), 'Helvetica-Bold'),
+    ]
+    if type_ligne == 'groupe':
+        commandes.append(('TEXTCOLOR', (0, rang), (-1, rang), colors.white))
+    if type_ligne == 'total':
+        commandes.append(('LINEABOVE', (0, rang), (-1, rang), 1, colors.black))
+    return commandes
+
+
+def _tables_historique(lignes):
+    """Tables de HISTORIQUE_LIGNES_PAR_TABLE lignes (l'en-tête des colonnes est dessiné sur chaque page)."""
+    donnees = []
+    style = []
+    for type_ligne, cellules in lignes:
+        style.extend(_style_ligne(type_ligne, len(donnees)))
+        donnees.append(cellules)
+        if len(donnees) == HISTORIQUE_LIGNES_PAR_TABLE:
+            yield Table(donnees, colWidths=HISTORIQUE_LARGEURS, rowHeights=HISTORIQUE_HAUTEUR_LIGNE,
+                        style=HISTORIQUE_STYLE_LIGNES + style)
+            donnees = []
+            style = []
+    if donnees:
+        yield Table(donnees, colWidths=HISTORIQUE_LARGEURS, rowHeights=HISTORIQUE_HAUTEUR_LIGNE,
+                    style=HISTORIQUE_STYLE_LIGNES + style)
+
+
+# En-tête des colonnes, dessiné par DocumentRenemico en haut de chaque page
+HISTORIQUE_ENTETE_COLONNES = Table(
+    [HISTORIQUE_COLONNES], colWidths=HISTORIQUE_LARGEURS, rowHeights=HISTORIQUE_HAUTEUR_ENTETE,
+    style=[
+        ('BACKGROUND', (0, 0), (-1, 0), PRIMAIRE),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('GRID', (0, 0), (-1, 0), 1, BORDURE),
+    ],
+)
 
-    table.setStyle(TableStyle([
-        # En-tête
-        ('BACKGROUND', (0,0), (-1,0), primary_color),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-        ('ALIGN', (0,0), (-1,0), 'CENTER'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 10),
-        ('BOTTOMPADDING', (0,0), (-1,0), 12),
 
-        # Colonnes (alignement normal)
-        ('ALIGN', (0,1), (0,-2), 'LEFT'),     # Membre
-        ('ALIGN', (1,1), (1,-2), 'CENTER'),   # Code
-        ('ALIGN', (2,1), (2,-2), 'LEFT'),     # Province
-        ('ALIGN', (3,1), (3,-2), 'LEFT'),     # Mois
-        ('ALIGN', (4,1), (4,-2), 'RIGHT'),    # Montant
-
-        # Ligne TOTAL (fusion + style)
-        ('SPAN', (0,-1), (3,-1)),             # fusionner colonnes 0→3
-        ('ALIGN', (0,-1), (0,-1), 'LEFT'),    # "TOTAL GENERAL" aligné à gauche
-        ('ALIGN', (4,-1), (4,-1), 'RIGHT'),   # montant aligné à droite
-        ('BACKGROUND', (0,-1), (-1,-1), light_color),
-        ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
-        ('LINEABOVE', (0,-1), (-1,-1), 1, colors.black),
-
-        # Bordures
-        ('GRID', (0,0), (-1,-2), 1, colors.HexColor("#bdc3c7")),
-        ('FONTSIZE', (0,1), (-1,-1), 9),
-    ]))
-    # Calculer la hauteur du tableau
-    table_height = len(data) * 0.7 * cm
-    table_width, _ = table.wrap(0, 0)
+def tous_historique_pdf(request):
+    """
+    Historique de toutes les contributions, sur autant de pages que nécessaire.
 
-    # Position centrée horizontalement
-    table_x = (width - table_width) / 2
-    table_y = y - table_height
+    ?groupe=province et / ou ?groupe=membre : sous-totaux par province, par membre.
+    Les lignes sont lues par paquets et le document est écrit dans un fichier
+    temporaire : la mémoire ne dépend pas du nombre de contributions.
+    """
+    groupes = [groupe for groupe in HISTORIQUE_GROUPES if groupe in request.GET.getlist('groupe')]
+    sous_titre = "HISTORIQUE DES COTISATIONS DE TOUS LES MEMBRES"
+    if groupes:
+        sous_titre += " — PAR " + " ET PAR ".join(groupe.upper() for groupe in groupes)
 
-    # Vérifier si assez d'espace
-    if table_y < MARGIN_BOTTOM + 5*cm:
-        p.showPage()
-        y = height - MARGIN_TOP
-        table_y = y - table_height
+    totaux = {'total': 0, 'nombre': 0}
 
-    # Dessiner le tableau centré
-    table.drawOn(p, table_x, table_y)
-    y = table_y - 1*cm
+    def contenu():
+        yield from _tables_historique(_lignes_historique(groupes, totaux))
 
-    # Montant total en lettres
-    p.setFillColor(dark_color)
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(MARGIN_LEFT, y, "Total général en lettres:")
-    p.setFont("Helvetica", 10)
-    
-    montant_lettres = nombre_en_lettres(int(total_general)) + " dollars américains"
-    p.drawString(MARGIN_LEFT + 4*cm, y, montant_lettres)
-    y -= 1*cm
+        # Les totaux ne sont connus qu'après la dernière ligne
+        yield Spacer(1, 0.8*cm)
+        montant_lettres = nombre_en_lettres(int(totaux['total'])) + " dollars américains"
+        yield Paragraph(f"<b>Total général en lettres :</b> {montant_lettres}", STYLES['normal'])
 
-    # Générer et ajouter le QR Code
-    qr_data = f"""
+        qr_data = f"""
     RENEMICO - Historique des cotisations de tous les membres
-    Total des cotisations: {total_general:.2f} USD
-    Nombre de contributions: {len(data)-2}
+    Total des cotisations: {totaux['total']:.2f} USD
+    Nombre de contributions: {totaux['nombre']}
     Généré le: {timezone.now().strftime('%d/%m/%Y')}
     """
-    
-    qr_code_path = generer_qr_code(qr_data)
-    p.drawImage(qr_code_path, MARGIN_LEFT, y - 3.5*cm, width=3.5*cm, height=3.5*cm)
-    os.unlink(qr_code_path)  # Supprimer le fichier temporaire
-    
-    # Pied de page
-    y = MARGIN_BOTTOM + 2.5*cm
-    p.setStrokeColor(colors.HexColor('#bdc3c7'))
-    p.setLineWidth(1)
-    p.line(MARGIN_LEFT, y, width - MARGIN_RIGHT, y)
-    
-    p.setFillColor(colors.HexColor('#7f8c8d'))
-    p.setFont("Helvetica-Oblique", 9)
-    p.drawCentredString(width/2, MARGIN_BOTTOM + 1.8*cm, "Merci pour votre confiance et vos cotisations !")
-    p.drawCentredString(width/2, MARGIN_BOTTOM + 1.3*cm, "Ce document est généré automatiquement, pour toute question, contactez-nous à contact@renemico.com")
+        yield QrCodeVectoriel(qr_data, 3.5*cm, niveau='L')
+        yield Spacer(1, 0.5*cm)
+        yield Paragraph("Merci pour votre confiance et vos cotisations !", STYLES['pied'])
+        yield Paragraph("Ce document est généré automatiquement, pour toute question, contactez-nous à contact@renemico.com", STYLES['pied'])
+
+    fichier = tempfile.TemporaryFile()
+    try:
+        DocumentRenemico(
+            fichier, "HISTORIQUE DES COTISATIONS", sous_titre, entete_colonnes=HISTORIQUE_ENTETE_COLONNES,
+        ).build(FluxFlowables(contenu()))
+    except BaseException:
+        fichier.close()
+        raise
+    fichier.seek(0)
+    return FileResponse(fichier, as_attachment=True, filename="Historique_Tous_Membres.pdf", content_type='application/pdf')
 
-    p.showPage()
-    p.save()
-    
-    pdf = buffer.getvalue()
-    buffer.close()
-    response.write(pdf)
-    
-    return response
 
 ###############################################################################################
-import openpyxl
-from openpyxl.utils import get_column_letter
+from identification.tableur import reponse_xlsx
 
 def tous_historique_excel(request):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Historique Contributions"
-
-    # Entêtes
-    ws.append(["Membre", "Code", "Mois", "Montant"])
-
-    contributions = Contribution.objects.select_related('membre').order_by('membre__nom', '-mois')
-
-    for c in contributions:
-        ws.append([
-            f"{c.membre.nom} {c.membre.post_nom}",
-            c.membre.code,
-            c.mois.strftime('%B %Y'),
-            c.montant
-        ])
-
-    # Ajuster la largeur des colonnes
-    for col in ws.columns:
-        max_length = max(len(str(cell.value)) for cell in col)
-        ws.column_dimensions[get_column_letter(col[0].column)].width = max_length + 2
+    contributions = (
+        Contribution.objects.order_by('membre__nom', '-mois')
+        .values_list('membre__nom', 'membre__post_nom', 'membre__code', 'mois', 'montant')
+        .iterator(chunk_size=2000)
+    )
+    lignes = (
+        [f"{nom} {post_nom}", code, mois.strftime('%B %Y'), montant]
+        for nom, post_nom, code, mois, montant in contributions
+    )
 
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return FileResponse(buffer, as_attachment=True, filename="Historique_Tous_Membres.xlsx")
+    # Largeur des colonnes mesurée sur les premières lignes (voir identification/tableur.py)
+    return reponse_xlsx(
+        "Historique_Tous_Membres.xlsx", "Historique Contributions",
+        ["Membre", "Code", "Mois", "Montant"], lignes,
+    )
 
 
 ######################################################################################################
@@ -1271,36 +711,104 @@ import datetime
 from django.http import HttpResponse
 from django.db.models import Sum
 from .models import Operation
-import openpyxl
+from identification.tableur import reponse_xlsx
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
 
 # --- Vue pour exporter en Excel ---
 def export_excel_operations(request):
-    operations = Operation.objects.all()
+    operations = Operation.objects.values_list('date', 'type_operation', 'motif', 'montant').iterator(chunk_size=2000)
 
-    # Créer un fichier Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Opérations"
+    # Contenu
+    lignes = (
+        [date_op.strftime("%d/%m/%Y"), type_operation, motif, montant]
+        for date_op, type_operation, motif, montant in operations
+    )
 
-    # En-tête
-    ws.append(["Date", "Type", "Description", "Montant (USD)"])
+    # Réponse HTTP (XLSX à mémoire constante)
+    return reponse_xlsx("operations.xlsx", "Opérations", ["Date", "Type", "Description", "Montant (USD)"], lignes)
 
-    # Contenu
-    for op in operations:
-        ws.append([op.date.strftime("%d/%m/%Y"), op.type_operation, op.motif, op.montant])
+################################################################################################################
+# --- Exports CSV / JSON Lines en streaming (comptabilité, BI) ---
+from identification.exports import ParametreInvalide, TAILLE_CHUNK_CURSEUR, filtrer_periode, periode_demandee, reponse_export
+from identification.facettes import appliquer_facettes, facettes_selectionnees
 
+COLONNES_EXPORT_CONTRIBUTIONS = [
+    ('id', 'ID'), ('membre_id', 'ID membre'), ('membre__code', 'Code membre'), ('membre__nom', 'Nom'),
+    ('membre__post_nom', 'Post-Nom'), ('membre__province', 'Province'), ('mois', 'Mois'),
+    ('montant', 'Montant'), ('date_paiement', 'Date de paiement'),
+]
 
-    # Réponse HTTP
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response['Content-Disposition'] = 'attachment; filename=operations.xlsx'
-    wb.save(response)
-    return response
+COLONNES_EXPORT_OPERATIONS = [
+    ('id', 'ID'), ('date', 'Date'), ('type_operation', 'Type'), ('motif', 'Motif'),
+    ('montant', 'Montant'), ('percu_par', 'Perçu par'),
+]
+
+
+def export_contributions(request):
+    """Contributions filtrées par membre (recherche, province, statut...) et par mois (?du= / ?au=)."""
+    try:
+        du, au = periode_demandee(request)
+    except ParametreInvalide as e:
+        return HttpResponse(str(e), status=400)
+
+    contributions = Contribution.objects.all()
+    search_query = request.GET.get('search', '')
+    selection = facettes_selectionnees(request)
+    if search_query or selection:
+        membres = appliquer_facettes(Membre.objects.all(), selection)
+        if search_query:
+            membres = rechercher_membres(membres, search_query)
+        contributions = contributions.filter(membre__in=membres.values('id'))
+    contributions = filtrer_periode(contributions, 'mois', du, au).order_by('id')
+
+    lignes = contributions.values_list(*[cle for cle, _ in COLONNES_EXPORT_CONTRIBUTIONS]).iterator(chunk_size=TAILLE_CHUNK_CURSEUR)
+    return reponse_export(request, 'contributions', COLONNES_EXPORT_CONTRIBUTIONS, lignes)
+
+
+def export_operations(request):
+    """Opérations filtrées par type (?type=ENTREE|SORTIE), motif / percepteur (?search=) et date."""
+    try:
+        du, au = periode_demandee(request)
+    except ParametreInvalide as e:
+        return HttpResponse(str(e), status=400)
+
+    operations = Operation.objects.all()
+    type_operation = request.GET.get('type', '')
+    if type_operation in dict(Operation.TYPE_CHOICES):
+        operations = operations.filter(type_operation=type_operation)
+    search_query = request.GET.get('search', '')
+    if search_query:
+        operations = operations.filter(Q(motif__icontains=search_query) | Q(percu_par__icontains=search_query))
+    operations = filtrer_periode(operations, 'date', du, au).order_by('id')
+
+    lignes = operations.values_list(*[cle for cle, _ in COLONNES_EXPORT_OPERATIONS]).iterator(chunk_size=TAILLE_CHUNK_CURSEUR)
+    return reponse_export(request, 'operations', COLONNES_EXPORT_OPERATIONS, lignes)
 
 ################################################################################################################
 # --- Vue pour exporter en PDF ---
+OPERATIONS_LARGEURS = [3*cm, 3*cm, 7.5*cm, 4.5*cm]
+OPERATIONS_LIGNES_PAR_TABLE = 100
+
+OPERATIONS_STYLE_LIGNES = [
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('ALIGN', (3, 0), (3, -1), 'RIGHT'),    # Montant
+    ('LINEBELOW', (0, 0), (-1, -1), 0.5, BORDURE),
+]
+
+OPERATIONS_ENTETE_COLONNES = Table(
+    [["Date", "Type", "Description", "Montant"]], colWidths=OPERATIONS_LARGEURS,
+    style=[
+        ('BACKGROUND', (0, 0), (-1, 0), PRIMAIRE),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('ALIGN', (3, 0), (3, 0), 'RIGHT'),
+    ],
+)
+
 def export_pdf_operations(request, periode):
     today = datetime.date.today()
     queryset = Operation.objects.all()
@@ -1340,43 +848,137 @@ def export_pdf_operations(request, periode):
     response = HttpResponse(content_type="application/pdf")
     response['Content-Disposition'] = f'attachment; filename=rapport_{periode}.pdf'
 
-    p = canvas.Canvas(response, pagesize=A4)
-    width, height = A4
+    def tables():
+        # Données des opérations, par tables de OPERATIONS_LIGNES_PAR_TABLE lignes
+        donnees = []
+        operations = queryset.values_list('date', 'type_operation', 'motif', 'montant').iterator(chunk_size=TAILLE_CHUNK_CURSEUR)
+        for date, type_operation, motif, montant in operations:
+            donnees.append([date.strftime("%d/%m/%Y"), type_operation, motif[:30], f"{montant:,.2f}"])  # Tronquer si trop long
+            if len(donnees) == OPERATIONS_LIGNES_PAR_TABLE:
+                yield Table(donnees, colWidths=OPERATIONS_LARGEURS, style=OPERATIONS_STYLE_LIGNES)
+                donnees = []
+        if donnees:
+            yield Table(donnees, colWidths=OPERATIONS_LARGEURS, style=OPERATIONS_STYLE_LIGNES)
+
+        # Section des totaux
+        yield Spacer(1, 1*cm)
+        yield Paragraph(f"<b>TOTAL ENTRÉES: {total_entrees:,.2f} USD</b>", STYLES['normal'])
+        yield Paragraph(f"<b>TOTAL SORTIES: {total_sorties:,.2f} USD</b>", STYLES['normal'])
+        yield Paragraph(f"<b>SOLDE: {solde:,.2f} USD</b>", STYLES['normal'])
+
+    DocumentRenemico(
+        response, f"RAPPORT {periode.upper()} DES OPÉRATIONS", f"Opérations au {today.strftime('%d/%m/%Y')}",
+        entete_colonnes=OPERATIONS_ENTETE_COLONNES,
+    ).build(FluxFlowables(tables()))
+    return response
 
-    # En-tête du document
-    p.setFont("Helvetica-Bold", 14)
-    p.drawCentredString(width/2, height-2*cm, f"Rapport {periode.upper()} des Opérations")
+################################################################################################################
+# --- Arriérés de cotisation : membres en retard de paiement (voir arrieres.py) ---
+from django.core.paginator import Paginator
+from identification.facettes import FACETTES
+from .arrieres import COTISATION_MENSUELLE, TRIS, arrieres_membres
 
-    # En-têtes de colonnes
-    p.setFont("Helvetica", 10)
-    y = height - 3*cm
-    p.drawString(2*cm, y, "Date")
-    p.drawString(5*cm, y, "Type")
-    p.drawString(9*cm, y, "Description")
-    p.drawString(15*cm, y, "Montant")
-    y -= 0.5*cm
-
-    # Données des opérations
-    for op in queryset:
-        p.drawString(2*cm, y, op.date.strftime("%d/%m/%Y"))
-        p.drawString(5*cm, y, op.type_operation)
-        p.drawString(9*cm, y, op.motif[:30])  # Tronquer si trop long
-        p.drawRightString(19*cm, y, f"{op.montant:,.2f}")
-        y -= 0.5*cm
-        
-        # Nouvelle page si nécessaire
-        if y < 3*cm:
-            p.showPage()
-            y = height - 2*cm
+ARRIERES_PAR_PAGE = 50
+TAILLE_LOT_ARRIERES = 500
 
-    # Section des totaux
-    y -= 1*cm
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(2*cm, y, f"TOTAL ENTRÉES: {total_entrees:,.2f} USD")
-    y -= 0.5*cm
-    p.drawString(2*cm, y, f"TOTAL SORTIES: {total_sorties:,.2f} USD")
-    y -= 0.5*cm
-    p.drawString(2*cm, y, f"SOLDE: {solde:,.2f} USD")
+CHAMPS_MEMBRE_ARRIERES = ['id', 'code', 'nom', 'post_nom', 'prenom', 'province', 'statut', 'date_enregistrement']
 
-    p.save()
-    return response
+COLONNES_EXPORT_ARRIERES = [
+    ('code', 'Code membre'), ('nom', 'Nom'), ('post_nom', 'Post-Nom'), ('prenom', 'Prénom'),
+    ('province', 'Province'), ('statut', 'Statut'), ('date_enregistrement', "Date d'enregistrement"),
+    ('mois_dus', 'Mois dus'), ('mois_payes', 'Mois payés'), ('mois_impayes', 'Mois impayés'),
+    ('serie_en_cours', 'Impayés consécutifs'), ('plus_longue_serie', 'Plus longue série'),
+    ('premier_impaye', 'Premier mois impayé'), ('montant_du', 'Montant dû'),
+]
+
+
+def _entier(request, cle, defaut):
+    valeur = request.GET.get(cle, '')
+    if not valeur:
+        return defaut
+    try:
+        return max(int(valeur), 0)
+    except ValueError:
+        raise ParametreInvalide(f"Nombre invalide pour « {cle} »")
+
+
+def _arrieres_demandes(request):
+    """
+    Arriérés des membres filtrés par l'URL : recherche et facettes (comme la
+    liste des membres), ?au= (date d'arrêt), ?min_mois= (mois impayés),
+    ?serie= (impayés consécutifs jusqu'au mois d'arrêt), ?tri=.
+    """
+    _, date_arret = periode_demandee(request)
+    criteres = {
+        'search_query': request.GET.get('search', ''),
+        'selection': facettes_selectionnees(request),
+        'min_mois': _entier(request, 'min_mois', 1),
+        'serie': _entier(request, 'serie', 0),
+        'tri': request.GET.get('tri', 'montant') if request.GET.get('tri') in TRIS else 'montant',
+    }
+
+    membres = appliquer_facettes(Membre.objects.all(), criteres['selection'])
+    if criteres['search_query']:
+        membres = rechercher_membres(membres, criteres['search_query'])
+
+    resultat = arrieres_membres(membres, date_arret)
+    return resultat.en_retard(criteres['min_mois'], criteres['serie']).trie(criteres['tri']), criteres
+
+
+def arrieres(request):
+    try:
+        resultat, criteres = _arrieres_demandes(request)
+    except ParametreInvalide as e:
+        return HttpResponse(str(e), status=400)
+
+    # Seules les lignes de la page sont complétées par les fiches des membres
+    page_obj = Paginator(range(len(resultat)), ARRIERES_PAR_PAGE).get_page(request.GET.get('page'))
+    positions = list(page_obj.object_list)
+    membres = Membre.objects.in_bulk([int(resultat.membre_ids[i]) for i in positions])
+    lignes = []
+    for position in positions:
+        ligne = resultat.ligne(position)
+        ligne['membre'] = membres.get(ligne['membre_id'])
+        if ligne['membre'] is not None:
+            lignes.append(ligne)
+
+    query_params = request.GET.copy()
+    query_params.pop('page', None)
+
+    return render(request, "arrieres.html", {
+        'lignes': lignes,
+        'page_obj': page_obj,
+        'query_params': query_params.urlencode(),
+        'nombre_en_retard': len(resultat),
+        'total_du': resultat.total_du,
+        'total_mois_impayes': int(resultat.mois_impayes.sum()),
+        'date_arret': resultat.date_arret,
+        'cotisation': COTISATION_MENSUELLE,
+        'facettes': [
+            (nom, libelle, FACETTES[nom], criteres['selection'].get(nom, ''))
+            for nom, libelle in (('province', 'Province'), ('categorie', 'Catégorie'), ('statut', 'Statut'))
+        ],
+        **criteres,
+    })
+
+
+def export_arrieres(request):
+    """Membres en retard (mêmes filtres que la page), dans l'ordre du tri demandé."""
+    try:
+        resultat, _ = _arrieres_demandes(request)
+    except ParametreInvalide as e:
+        return HttpResponse(str(e), status=400)
+
+    def lignes():
+        for debut in range(0, len(resultat), TAILLE_LOT_ARRIERES):
+            positions = range(debut, min(debut + TAILLE_LOT_ARRIERES, len(resultat)))
+            ids = [int(resultat.membre_ids[i]) for i in positions]
+            fiches = {fiche[0]: fiche[1:] for fiche in Membre.objects.filter(id__in=ids).values_list(*CHAMPS_MEMBRE_ARRIERES)}
+            for position in positions:
+                ligne = resultat.ligne(position)
+                fiche = fiches.get(ligne['membre_id'])
+                if fiche is not None:
+                    yield (*fiche, ligne['mois_dus'], ligne['mois_payes'], ligne['mois_impayes'],
+                           ligne['serie_en_cours'], ligne['plus_longue_serie'], ligne['premier_impaye'], ligne['montant_du'])
+
+    return reponse_export(request, 'arrieres', COLONNES_EXPORT_ARRIERES, lignes())
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _installer_index_fts(sender, using, **kwargs):
+    from django.db import connections
+    from .recherche import installer_index_fts
+    installer_index_fts(connections[using])
 
 
 class IdentificationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'identification'
+
+    def ready(self):
+        # Statistiques matérialisées du tableau de bord
+        from . import signals  # noqa: F401
+
+        # Les triggers FTS5 peuvent disparaître lors d'une reconstruction de table SQLite
+        post_migrate.connect(_installer_index_fts, sender=self)
+
+        # Images statiques des PDF : décodées et prétraitées une fois par processus
+        from .ressources import registre
+        registre.precharger()
@@ -0,0 +1,486 @@
+# identification/cartes.py
+"""
+Rendu des cartes de membre en PDF (recto + verso).
+
+- dessiner_carte() dessine les deux pages d'une carte sur un canvas existant
+- rendre_carte_pdf() produit le PDF d'un seul membre
+- generer_lot_pdf() / generer_lot_zip() produisent les cartes de plusieurs
+  membres ; la préparation des photos (décodage, rotation EXIF, JPEG) ou le
+  rendu complet des PDF peut être réparti sur un pool de processus. Le pool
+  n'est utilisé que hors requête web (`manage.py generer_cartes`) : les vues
+  rendent dans le processus courant (workers=1).
+"""
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+from django.db import connections
+from PIL import Image
+from reportlab.lib.colors import black, red, blue
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .flux import FluxZip
+from .models import Membre
+from .photos import lire_derive
+from .qr import QrCodeVectoriel, contenu_qrcode
+from .ressources import registre
+
+
+# Nombre de processus par défaut pour les lots
+WORKERS_PAR_DEFAUT = os.cpu_count() or 1
+
+# Membres lus en une requête par paquet pour les lots ZIP
+TAILLE_PAQUET = 100
+
+
+#################################################################################################
+# Préparation des images
+
+def filigrane_logo():
+    """Logo RENEMICO à 12 % d'opacité (ImageReader préchargé) ou None."""
+    return registre.reader('filigrane')
+
+
+def preparer_photo(photo_path):
+    """
+    Ouvre la photo, applique la rotation EXIF, convertit en RGB
+    et retourne les octets JPEG prêts à être insérés dans le PDF (ou None).
+    """
+    if not (photo_path and os.path.exists(photo_path)):
+        return None
+
+    img = Image.open(photo_path)
+
+    # Vérifier et appliquer la rotation en fonction des métadonnées EXIF
+    try:
+        exif = img._getexif()
+        if exif is not None:
+            orientation = exif.get(0x0112)
+
+            if orientation == 3:
+                img = img.rotate(180, expand=True)
+            elif orientation == 6:
+                img = img.rotate(270, expand=True)
+            elif orientation == 8:
+                img = img.rotate(90, expand=True)
+    except (AttributeError, KeyError, IndexError):
+        # Pas de métadonnées EXIF ou erreur de lecture
+        pass
+
+    # Convertir en RGB si l'image a un canal alpha (RGBA)
+    if img.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=95)
+    return buffer.getvalue()
+
+
+def _chemin_photo(membre):
+    return membre.photo.path if membre.photo else None
+
+
+def photo_carte(membre):
+    """Octets JPEG de la photo de carte : dérivé pré-calculé, sinon préparé depuis l'original."""
+    if not membre.photo:
+        return None
+    photo = lire_derive(membre.photo, 'carte')
+    if photo is None:
+        photo = preparer_photo(_chemin_photo(membre))
+    return photo
+
+
+#################################################################################################
+# Dessin d'une carte
+
+def dessiner_carte(c, membre, photo=None, filigrane=None):
+    """
+    Dessine le recto et le verso de la carte de `membre` sur le canvas `c`.
+
+    `photo` : octets JPEG issus de photo_carte() (lus si absent).
+    `filigrane` : ImageReader issu de filigrane_logo() (préparé si absent).
+    """
+    width, height = landscape(A4)
+    if photo is None:
+        photo = photo_carte(membre)
+    if filigrane is None:
+        filigrane = filigrane_logo()
+
+    # Logo (préchargé par le registre des ressources)
+    logo = registre.reader('logo2')
+
+    if logo:  # Si le logo est trouvé
+        c.drawImage(logo, width - 145, height - 140, width=1.9*inch, height=1.9*inch)
+    else:
+        c.drawString(width - 180, height - 100, "Logo non disponible")
+
+    # Agrandissement et placement des en-têtes, centrés sur la gauche
+    c.setFont("Helvetica-Bold", 25)  # Taille augmentée pour plus de lisibilité
+    c.setFillColor(black)  # Définir la couleur du texte sur noir
+    c.drawCentredString(width / 2 - 65, height - 53, "REPUBLIQUE DEMOCRATIQUE DU CONGO")
+
+    c.setFont("Helvetica-Bold", 24)
+    c.setFillColor(blue)  # Définir la couleur du texte sur rouge
+    c.drawCentredString(width / 2 - 65, height - 83, "REGROUPEMENT DES NEGOCIANTS MINIERS DU CONGO")
+
+    c.setFont("Helvetica-Bold", 36)
+    c.setFillColor(red)  # Définir la couleur du texte sur bleu
+    c.drawCentredString(width / 2 - 65, height - 123, "RENEMICO")
+
+    c.setFont("Helvetica-Bold", 15)
+    c.setFillColor(black)  # Définir la couleur du texte sur noir
+    c.drawCentredString(width / 2 - 65, height - 143, "*******************************************************************************************************************")
+
+    c.setFont("Helvetica-Bold", 40)
+    c.setFillColor(blue)  # Définir la couleur du texte sur bleu
+    c.drawCentredString(width / 2 - 65, height - 178, "CARTE DE MEMBRE")
+
+    # === Ajouter un logo en arrière-plan (filigrane) ===
+    if filigrane:
+        c.drawImage(
+            filigrane,
+            100, 100,  # position bas-gauche (ajuste selon besoin)
+            width - 200, height - 200,  # couvre presque toute la page
+            mask="auto"
+        )
+
+    # Placer la photo du membre à gauche
+    if membre.photo:
+        if photo:
+            # Dessiner l'image dans le PDF
+            c.drawImage(ImageReader(BytesIO(photo)), 10, height - 450, width=2.5*inch, height=3.4*inch)
+        else:
+            c.drawString(60, height - 430, "Photo non disponible")
+
+    # Largeur fixe pour les labels
+    label_width = 180  # largeur réservée pour le texte des labels
+    x_start = 200      # position de départ horizontale
+    x_value_start = x_start + label_width  # position pour les valeurs
+    x_second_column = 700  # position pour SEXE (deuxième colonne)
+
+    # Préparer les informations (sans SEXE, car on le gère à part avec NOM)
+    info_lines = [
+        ("NOM", f"{membre.nom.upper()}"),
+        ("POST-NOM", f"{membre.post_nom.upper()}"),
+        ("PRÉNOM", f"{membre.prenom.upper()}"),
+        ("PROVINCE", f"{membre.get_province_display().upper()}"),
+        ("FONCTION", f"{membre.fonction.upper() if hasattr(membre, 'fonction') else 'NON RENSEIGNÉ'}"),
+        ("CATÉGORIE", f"{membre.get_categorie_display().upper()}"),
+    ]
+
+    # Position verticale de départ
+    y_position = height - 225
+    line_spacing = 45  # espacement entre les lignes
+
+    # Boucle pour dessiner chaque ligne
+    for label, value in info_lines:
+        c.setFont("Helvetica-Bold", 25)
+        c.setFillColor(black)  # couleur noire pour labels et valeurs
+
+        # Dessiner le label
+        c.drawString(x_start, y_position, label)
+
+        # Dessiner la valeur suivie de ":" (collé à la valeur)
+        value_text = f": {value}"
+        c.drawString(x_value_start, y_position, value_text)
+
+        # Cas spécial : NOM → ajouter SEXE à droite (seulement F ou M)
+        if label == "NOM":
+            sexe_label = "SEXE"
+            sexe_value = "M" if membre.get_sexe_display().upper().startswith("M") else "F"
+
+            gap = 10  # petit espace entre label et valeur
+
+            # dessiner le label SEXE
+            c.drawString(x_second_column, y_position, sexe_label)
+
+            # mesurer largeur du label
+            label_width_sexe = c.stringWidth(sexe_label, "Helvetica-Bold", 28)
+
+            # dessiner la valeur juste après le label
+            c.drawString(x_second_column + label_width_sexe + gap, y_position, f": {sexe_value}")
+
+        # Descendre pour la ligne suivante
+        y_position -= line_spacing
+
+    # Informations
+    code_membre = membre.code
+    date_enregistrement = membre.date_enregistrement.strftime('%d-%m-%Y')
+    date_expiration = membre.date_expiration.strftime('%d-%m-%Y') if membre.date_expiration else "NON DÉFINIE"
+
+    # Modifier la police et ajuster la position
+    c.setFont("Helvetica-Bold", 20)
+    c.setFillColor(red)
+    y_position -= 2  # Espacement avant d'ajouter ces informations
+
+    # Positions horizontales pour chaque info
+    x_code = 20
+    x_delivree = 200
+    x_expiration = 500
+
+    # Afficher les titres sur la même ligne
+    c.drawString(x_code, y_position, "CODE")
+    c.drawString(x_delivree, y_position, "Délivrée le")
+    c.drawString(x_expiration, y_position, "Expiration")
+
+    # Espacement vertical pour les valeurs
+    y_position -= 25
+
+    # Changer couleur pour les valeurs
+    c.setFont("Helvetica-Bold", 16)
+    c.setFillColor(black)
+
+    # Afficher les valeurs en dessous des titres correspondants
+    c.drawString(x_code, y_position, code_membre.upper())
+    c.drawString(x_delivree, y_position, date_enregistrement)
+    c.drawString(x_expiration, y_position, date_expiration)
+
+    # === Nouvelle image à ajouter ===
+    logo = registre.reader('pca')
+
+    if logo:  # Si le logo est trouvé
+        c.drawImage(logo, 655, height - 500, width=2.5*inch, height=2.5*inch, mask='auto')  # 'mask=auto' pour gérer la transparence
+    else:
+        c.drawString(480, height - 578, "Logo non disponible")
+
+    ##########################################################################################
+
+    # Dessiner une nouvelle page pour le verso
+    c.showPage()
+
+    # === Ajouter un logo en arrière-plan (filigrane) ===
+    if filigrane:
+        c.drawImage(
+            filigrane,
+            100, 100,  # position bas-gauche (ajuste selon besoin)
+            width - 200, height - 200,  # couvre presque toute la page
+            mask="auto"
+        )
+
+    # Placer le QR code à gauche, sous la photo ou à côté des infos
+    # (vectoriel, depuis la charge signée : même contenu que le PNG enregistré)
+    qr_x = 10       # distance depuis le bord gauche
+    qr_y = height - 225  # ajuster selon la position verticale souhaitée
+    QrCodeVectoriel(contenu_qrcode(membre), 3*inch).drawOn(c, qr_x, qr_y)
+
+    # === DRC ===
+    logo = registre.reader('am')
+
+    if logo:  # Si le logo est trouvé
+        c.drawImage(logo, 700, height - 170, width=1.8*inch, height=1.8*inch, mask='auto')  # 'mask=auto' pour gérer la transparence
+    else:
+        c.drawString(480, height - 578, "Logo non disponible")
+
+    #################################################################################################################################
+
+    # Informations
+    code_membre = membre.code
+    site_membre = membre.site
+
+    # Définir police et couleur
+    c.setFont("Helvetica-Bold", 20)
+    c.setFillColor(black)
+
+    # Position de départ (haut de page - marge)
+    y_position = height - 120
+
+    # Décaler vers la droite (par ex. 350px depuis la gauche)
+    x_label = width - 600   # position des labels
+    x_value = width - 375    # position des valeurs à droite
+
+    # Afficher Code
+    c.drawString(x_label, y_position, "Code Membre")
+    c.drawString(x_value, y_position, f": {code_membre}")
+
+    # Ligne suivante pour Site
+    y_position -= 40
+    c.drawString(x_label, y_position, "Secteur d'Activité (Site)")
+    c.drawString(x_value, y_position, f": {site_membre}")
+
+    # === Nouvelle image à ajouter ===
+    bandeau = registre.obtenir('ap')
+
+    if bandeau:
+        # Nouvelle largeur souhaitée
+        new_width = 11.7*inch  # exemple : augmenter largeur
+
+        # Calcul de la hauteur pour garder le ratio (dimensions lues au chargement)
+        new_height = bandeau.ratio * new_width
+
+        # Dessiner l'image dans le PDF
+        c.drawImage(bandeau.reader, 0, height - 350, width=new_width, height=new_height, mask='auto')
+    else:
+        c.drawString(480, height - 578, "Logo non disponible")
+
+    c.setFont("Helvetica-Bold", 25)
+    c.setFillColor(black)  # Définir la couleur du texte sur black
+    c.drawCentredString(width / 2, height - 480, "Les autorités tant civiles que militaires sont priées d'apporter")
+
+    c.setFont("Helvetica-Bold", 25)
+    c.setFillColor(black)  # Définir la couleur du texte sur black
+    c.drawCentredString(width / 2, height - 510, "leur assistance au porteur de la présente")
+
+    # Fin de la carte : la page suivante commence une nouvelle carte
+    c.showPage()
+
+
+def rendre_carte_pdf(membre, photo=None, filigrane=None):
+    """PDF (octets) de la carte d'un seul membre."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=landscape(A4))
+    dessiner_carte(c, membre, photo=photo, filigrane=filigrane)
+    c.save()
+    return buffer.getvalue()
+
+
+def nom_fichier_carte(membre):
+    return f"carte_{membre.code}_{membre.nom}.pdf"
+
+
+#################################################################################################
+# Sélection des membres d'un lot
+
+def selectionner_membres(province=None, categorie=None, expire_avant=None, ids=None):
+    """Membres d'un lot, filtrés par province, catégorie, date d'expiration ou identifiants."""
+    membres = Membre.objects.all()
+    if ids:
+        membres = membres.filter(id__in=ids)
+    if province:
+        membres = membres.filter(province=province)
+    if categorie:
+        membres = membres.filter(categorie=categorie)
+    if expire_avant:
+        membres = membres.filter(date_expiration__lt=expire_avant)
+    return membres.order_by('province', 'nom', 'post_nom', 'prenom', 'id')
+
+
+#################################################################################################
+# Travail exécuté dans les processus du pool
+
+def _initialiser_worker():
+    # En mode « spawn » (Windows, macOS) le processus fils doit configurer Django
+    import django
+    django.setup()
+
+
+def _preparer_photo_worker(membre_id, photo_path):
+    return membre_id, preparer_photo(photo_path)
+
+
+def _rendre_carte_worker(membre):
+    # Instance lue par le processus parent : aucune requête dans le worker
+    return nom_fichier_carte(membre), rendre_carte_pdf(membre)
+
+
+def _pool(workers):
+    # Les connexions à la base ne doivent pas être partagées avec les processus fils
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_worker)
+
+
+#################################################################################################
+# Lots
+
+def _par_paquets(ids, taille=TAILLE_PAQUET):
+    """Instances des membres `ids`, dans cet ordre, par paquets : une requête (in_bulk) par paquet."""
+    for debut in range(0, len(ids), taille):
+        paquet = ids[debut:debut + taille]
+        trouves = Membre.objects.in_bulk(paquet)
+        yield [trouves[pk] for pk in paquet if pk in trouves]
+
+
+def generer_lot_pdf(membres, fichier, workers=None, progression=None):
+    """
+    Écrit dans `fichier` (ouvert en binaire) un seul PDF contenant les cartes
+    de tous les `membres`.
+
+    Avec plusieurs workers, les photos sans dérivé « carte » sont préparées en
+    parallèle dans le pool ; sinon chaque photo est lue au moment de dessiner
+    sa carte. Le canvas unique est rempli dans le processus courant.
+    `progression(fait, total)` est appelée après chaque carte dessinée.
+    """
+    workers = workers or WORKERS_PAR_DEFAUT
+    membres = list(membres)
+    total = len(membres)
+
+    photos = {}
+    if workers > 1:
+        a_preparer = []
+        for m in membres:
+            if not m.photo:
+                continue
+            photo = lire_derive(m.photo, 'carte')
+            if photo is not None:
+                photos[m.pk] = photo
+            else:
+                a_preparer.append((m.pk, _chemin_photo(m)))
+
+        if len(a_preparer) > 1:
+            with _pool(workers) as pool:
+                futures = [pool.submit(_preparer_photo_worker, pk, chemin) for pk, chemin in a_preparer]
+                for future in as_completed(futures):
+                    pk, photo = future.result()
+                    photos[pk] = photo
+        else:
+            photos.update({pk: preparer_photo(chemin) for pk, chemin in a_preparer})
+
+    filigrane = filigrane_logo()
+    c = canvas.Canvas(fichier, pagesize=landscape(A4))
+    for fait, membre in enumerate(membres, start=1):
+        # photo=None : lue par dessiner_carte
+        dessiner_carte(c, membre, photo=photos.pop(membre.pk, None), filigrane=filigrane)
+        if progression:
+            progression(fait, total)
+    c.save()
+
+
+def generer_lot_zip(membres, workers=None, progression=None):
+    """
+    Générateur d'octets d'un ZIP contenant un PDF par membre.
+
+    Les membres sont lus par paquets de TAILLE_PAQUET (une requête chacun).
+    Avec plusieurs workers, chaque PDF est rendu dans un processus du pool ;
+    le ZIP est produit au fur et à mesure que les cartes sont terminées. Si le
+    générateur est fermé avant la fin (client déconnecté), les cartes pas
+    encore commencées sont annulées au lieu d'être rendues pour rien.
+    """
+    workers = workers or WORKERS_PAR_DEFAUT
+    ids = list(membres.values_list('pk', flat=True)) if hasattr(membres, 'values_list') else [m.pk for m in membres]
+    total = len(ids)
+
+    flux = FluxZip()
+    with zipfile.ZipFile(flux, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        fait = 0
+        if workers > 1 and total > 1:
+            with _pool(workers) as pool:
+                try:
+                    for paquet in _par_paquets(ids):
+                        futures = [pool.submit(_rendre_carte_worker, membre) for membre in paquet]
+                        for future in as_completed(futures):
+                            nom, pdf = future.result()
+                            archive.writestr(nom, pdf)
+                            fait += 1
+                            if progression:
+                                progression(fait, total)
+                            yield flux.vider()
+                except GeneratorExit:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+        else:
+            for paquet in _par_paquets(ids):
+                for membre in paquet:
+                    nom, pdf = _rendre_carte_worker(membre)
+                    archive.writestr(nom, pdf)
+                    fait += 1
+                    if progression:
+                        progression(fait, total)
+                    yield flux.vider()
+    yield flux.vider()
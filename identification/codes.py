@@ -0,0 +1,105 @@
+# identification/codes.py
+"""
+Attribution des codes membres, sans collision.
+
+Les codes sont tirés d'un compteur en base (SequenceCode) : un seul UPDATE
+réserve un bloc de valeurs, quel que soit le nombre de codes demandés
+(import en masse), et l'UPDATE verrouille la ligne du compteur, ce qui rend
+l'attribution sûre entre plusieurs processus.
+
+Format (8 caractères, comme les anciens codes) :
+- 7 caractères base32 de Crockford (0-9, A-Z sans I, L, O, U) obtenus par
+  une permutation du compteur (les codes ne se suivent pas) ;
+- 1 caractère de contrôle (Luhn mod 32) qui détecte les fautes de frappe.
+
+Les anciens codes (8 caractères hexadécimaux tirés d'un UUID) restent
+valables : les codes composés uniquement de caractères hexadécimaux ne sont
+jamais attribués, ce qui exclut toute collision avec eux.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_VALEURS = {c: i for i, c in enumerate(ALPHABET)}
+_HEXADECIMAL = frozenset('0123456789ABCDEF')
+
+LONGUEUR = 8
+_CHIFFRES = LONGUEUR - 1
+_MODULE = len(ALPHABET) ** _CHIFFRES  # 2**35 codes possibles
+
+# Permutation affine de [0, 2**35) : multiplicateur impair => bijection
+_MULTIPLICATEUR = 0x5DEECE66D
+_DECALAGE = 0x2F1A7C3B9
+
+SEQUENCE = 'membre'
+
+
+def _luhn(chiffres):
+    """Caractère de contrôle Luhn mod 32 de la suite de valeurs `chiffres`."""
+    total = 0
+    facteur = 2
+    for valeur in reversed(chiffres):
+        produit = valeur * facteur
+        total += produit // 32 + produit % 32
+        facteur = 3 - facteur
+    return ALPHABET[(32 - total % 32) % 32]
+
+
+def code_depuis_numero(numero):
+    """Code membre (8 caractères) du numéro de séquence `numero`."""
+    valeur = (numero * _MULTIPLICATEUR + _DECALAGE) % _MODULE
+    chiffres = []
+    for _ in range(_CHIFFRES):
+        valeur, reste = divmod(valeur, 32)
+        chiffres.append(reste)
+    chiffres.reverse()
+    return ''.join(ALPHABET[c] for c in chiffres) + _luhn(chiffres)
+
+
+def code_valide(code):
+    """True pour un code attribué ici (contrôle correct) ou un ancien code hexadécimal."""
+    code = (code or '').strip().upper()
+    if len(code) != LONGUEUR:
+        return False
+    if set(code) <= _HEXADECIMAL:
+        return True
+    if any(c not in _VALEURS for c in code):
+        return False
+    return _luhn([_VALEURS[c] for c in code[:-1]]) == code[-1]
+
+
+def _reserver(nombre):
+    """Réserve `nombre` numéros consécutifs ; retourne le premier."""
+    from .models import SequenceCode
+
+    with transaction.atomic():
+        if not SequenceCode.objects.filter(nom=SEQUENCE).update(valeur=F('valeur') + nombre):
+            try:
+                with transaction.atomic():
+                    SequenceCode.objects.create(nom=SEQUENCE, valeur=nombre)
+            except IntegrityError:
+                # Créée entre-temps par un autre processus
+                SequenceCode.objects.filter(nom=SEQUENCE).update(valeur=F('valeur') + nombre)
+        fin = SequenceCode.objects.filter(nom=SEQUENCE).values_list('valeur', flat=True).get()
+    return fin - nombre + 1
+
+
+def allouer_codes(nombre):
+    """
+    `nombre` codes membres inédits, en un UPDATE (plus un par tranche de
+    codes écartés, 1 sur 256 en moyenne).
+    """
+    codes = []
+    while len(codes) < nombre:
+        manquants = nombre - len(codes)
+        premier = _reserver(manquants)
+        for numero in range(premier, premier + manquants):
+            code = code_depuis_numero(numero)
+            if not set(code) <= _HEXADECIMAL:
+                codes.append(code)
+    return codes
+
+
+def allouer_code():
+    return allouer_codes(1)[0]
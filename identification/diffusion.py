@@ -0,0 +1,97 @@
+# identification/diffusion.py
+"""
+Envoi des fichiers média (photos, dérivés, QR codes) sans décodage.
+
+- Le fichier est transmis tel quel par FileResponse (ou délégué au serveur
+  web via X-Sendfile / X-Accel-Redirect, voir MEDIA_ENVOI).
+- ETag fort et Last-Modified calculés à partir de la taille et de la date de
+  modification : un navigateur qui revalide reçoit un 304 sans lecture.
+- Une URL portant `?v=<version>` désigne un contenu figé : elle est mise en
+  cache un an (`immutable`). Sans version, le client revalide à chaque fois.
+  Les fichiers étant nommés par leur contenu (stockage.py), la version se
+  calcule sur le nom seul (`version_nom`), sans accès au disque.
+"""
+import hashlib
+import mimetypes
+import os
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, urlencode
+
+from .stockage import est_adresse
+
+
+# '' (Django envoie le fichier), 'x-sendfile' (Apache, lighttpd) ou 'x-accel-redirect' (nginx)
+MEDIA_ENVOI = getattr(settings, 'MEDIA_ENVOI', '')
+# Emplacement interne nginx correspondant à MEDIA_ROOT (ex. location /media-interne/ { internal; alias ...; })
+MEDIA_ACCEL_PREFIXE = getattr(settings, 'MEDIA_ACCEL_PREFIXE', '/media-interne/')
+
+DUREE_IMMUABLE = 365 * 24 * 3600
+
+
+def etag_fichier(stat):
+    """ETag fort : taille + date de modification en nanosecondes."""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def version_nom(nom, *parametres):
+    """
+    Jeton de version du fichier `nom`, ou None si ce nom n'est pas adressé par
+    contenu (fichier antérieur à `adresser_medias`). `parametres` distinguent
+    les fichiers dérivés d'un même contenu.
+    """
+    if not est_adresse(nom):
+        return None
+    return hashlib.sha1(repr((nom, parametres)).encode('utf-8')).hexdigest()[:16]
+
+
+def url_media(membre_id, champ, version, **parametres):
+    """URL de la vue get_image, avec `?v=version` si le contenu est figé."""
+    url = reverse('identification:get_image', args=[membre_id, champ])
+    if version:
+        parametres['v'] = version
+    return f"{url}?{urlencode(parametres)}" if parametres else url
+
+
+def _reponse_deleguee(nom, chemin, content_type):
+    reponse = HttpResponse(content_type=content_type)
+    if MEDIA_ENVOI == 'x-accel-redirect':
+        reponse['X-Accel-Redirect'] = MEDIA_ACCEL_PREFIXE.rstrip('/') + '/' + nom.replace(os.sep, '/')
+    else:
+        reponse['X-Sendfile'] = chemin
+    return reponse
+
+
+def servir_fichier(request, stockage, nom, content_type=None, version=None):
+    """
+    Réponse HTTP pour le fichier `nom` du `stockage` (FileSystemStorage).
+
+    `version` : jeton attendu dans `?v=` pour servir le fichier comme immuable.
+    Retourne 304 si le client possède déjà cette version, 404 si le fichier
+    a disparu du disque.
+    """
+    chemin = stockage.path(nom)
+    try:
+        stat = os.stat(chemin)
+    except OSError:
+        return HttpResponse("Image non trouvée", status=404)
+
+    etag = etag_fichier(stat)
+    reponse = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if reponse is None:
+        content_type = content_type or mimetypes.guess_type(chemin)[0] or 'application/octet-stream'
+        if MEDIA_ENVOI:
+            reponse = _reponse_deleguee(nom, chemin, content_type)
+        else:
+            reponse = FileResponse(open(chemin, 'rb'), content_type=content_type)
+
+    reponse['ETag'] = etag
+    reponse['Last-Modified'] = http_date(stat.st_mtime)
+    if version and request.GET.get('v') == version:
+        patch_cache_control(reponse, private=True, max_age=DUREE_IMMUABLE, immutable=True)
+    else:
+        patch_cache_control(reponse, private=True, no_cache=True)
+    return reponse
@@ -0,0 +1,122 @@
+# identification/expiration.py
+"""
+État d'expiration des cartes, précalculé et stocké sur le membre.
+
+- Membre.carte_expiree : la carte a dépassé sa date d'expiration
+- Membre.echeance_expiration : 30, 60 ou 90 si la carte expire dans ce délai
+
+Ces champs sont calculés à chaque enregistrement (Membre.normaliser) et
+remis à jour chaque jour, par des UPDATE en masse, par
+`python manage.py balayer_expirations` (à planifier, ex. cron :
+`5 0 * * * python manage.py balayer_expirations`). Le balayage passe aussi
+en inactif les membres encore actifs dont la carte est expirée, quel que
+soit leur drapeau : save() et la migration 0006 marquent carte_expiree
+sans toucher au statut.
+"""
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+
+ECHEANCES = (30, 60, 90)
+
+
+def etat_expiration(date_expiration, aujourd_hui=None):
+    """(carte_expiree, echeance_expiration) pour une date d'expiration."""
+    if not date_expiration:
+        return False, None
+    if isinstance(date_expiration, datetime):
+        date_expiration = date_expiration.date()
+    aujourd_hui = aujourd_hui or timezone.now().date()
+    if date_expiration < aujourd_hui:
+        return True, None
+    jours = (date_expiration - aujourd_hui).days
+    for echeance in ECHEANCES:
+        if jours <= echeance:
+            return False, echeance
+    return False, None
+
+
+def _bornes_echeances(aujourd_hui):
+    """[(échéance, première date, dernière date)] : 30 -> [J, J+30], 60 -> ]J+30, J+60]..."""
+    bornes = []
+    debut = aujourd_hui
+    for echeance in ECHEANCES:
+        fin = aujourd_hui + timedelta(days=echeance)
+        bornes.append((echeance, debut, fin))
+        debut = fin + timedelta(days=1)
+    return bornes
+
+
+def balayer_expirations(aujourd_hui=None):
+    """
+    Met à jour carte_expiree, statut et echeance_expiration de tous les membres
+    en quelques UPDATE, et enregistre un BalayageExpiration.
+    """
+    from .models import BalayageExpiration, Membre
+    from .statistiques import reconstruire_statistiques
+    from .verification import oublier
+
+    aujourd_hui = aujourd_hui or timezone.now().date()
+    membres = Membre.objects.all()
+
+    with transaction.atomic():
+        # 1. Cartes arrivées à expiration : drapeau
+        a_expirer = membres.filter(carte_expiree=False, date_expiration__lt=aujourd_hui)
+        expires = list(a_expirer.values_list('id', 'code'))
+        ids_expires = [membre_id for membre_id, _ in expires]
+        a_expirer.update(carte_expiree=True, echeance_expiration=None)
+
+        # Membres encore actifs avec une carte expirée, drapeau déjà posé ou non
+        a_desactiver = membres.filter(statut='actif', date_expiration__lt=aujourd_hui)
+        codes_desactives = list(a_desactiver.values_list('code', flat=True))
+        desactives = a_desactiver.update(statut='inactif')
+
+        # 2. Cartes prolongées par une mise à jour en masse (sans save())
+        a_revalider = membres.filter(carte_expiree=True, date_expiration__gte=aujourd_hui)
+        codes_revalides = list(a_revalider.values_list('code', flat=True))
+        revalidees = a_revalider.update(carte_expiree=False)
+
+        # 3. Tranches « expire sous 30 / 60 / 90 jours »
+        bornes = _bornes_echeances(aujourd_hui)
+        horizon = bornes[-1][2]
+        echeances_modifiees = (
+            membres.filter(echeance_expiration__isnull=False)
+            .exclude(date_expiration__gte=aujourd_hui, date_expiration__lte=horizon)
+            .update(echeance_expiration=None)
+        )
+        for echeance, debut, fin in bornes:
+            echeances_modifiees += (
+                membres.filter(date_expiration__gte=debut, date_expiration__lte=fin)
+                .exclude(echeance_expiration=echeance)
+                .update(echeance_expiration=echeance)
+            )
+
+        totaux = dict(
+            membres.filter(echeance_expiration__isnull=False)
+            .order_by()
+            .values_list('echeance_expiration')
+            .annotate(n=Count('id'))
+        )
+
+        balayage = BalayageExpiration.objects.create(
+            jour=aujourd_hui,
+            nouvelles_expirations=len(ids_expires),
+            membres_desactives=desactives,
+            cartes_revalidees=revalidees,
+            echeances_modifiees=echeances_modifiees,
+            membres_expires=ids_expires,
+            echeance_30=totaux.get(30, 0),
+            echeance_60=totaux.get(60, 0),
+            echeance_90=totaux.get(90, 0),
+        )
+
+    # Les UPDATE ne passent pas par les signaux : compteurs du tableau de bord
+    # recalculés, fiches de vérification des cartes touchées (expirées,
+    # revalidées, membres désactivés) oubliées
+    if ids_expires or desactives or revalidees:
+        reconstruire_statistiques()
+        oublier(*codes_desactives, *(code for _, code in expires), *codes_revalides)
+    return balayage
@@ -0,0 +1,133 @@
+# identification/exports.py
+"""
+Exports CSV / JSON Lines en streaming (membres, contributions, opérations).
+
+- ?format=csv (défaut) ou ?format=jsonl
+- ?gzip=1 : compression à la volée (fichier .csv.gz / .jsonl.gz)
+- ?du=AAAA-MM-JJ&au=AAAA-MM-JJ : période (le champ dépend de l'export)
+
+Les lignes viennent de `values_list(...).iterator()` : aucun objet modèle
+n'est construit et rien n'est accumulé en mémoire. L'en-tête part avant même
+l'exécution de la requête ; les lignes suivent par paquets de TAILLE_PAQUET.
+"""
+import csv
+import io
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+
+
+TAILLE_PAQUET = 500
+TAILLE_CHUNK_CURSEUR = 2000
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class ParametreInvalide(ValueError):
+    pass
+
+
+def periode_demandee(request):
+    """(du, au) depuis ?du= et ?au= (dates ISO, facultatives)."""
+    bornes = []
+    for cle in ('du', 'au'):
+        valeur = request.GET.get(cle, '')
+        if not valeur:
+            bornes.append(None)
+            continue
+        try:
+            date = parse_date(valeur)
+        except ValueError:
+            date = None
+        if date is None:
+            raise ParametreInvalide(f"Date invalide pour « {cle} » (format attendu : AAAA-MM-JJ)")
+        bornes.append(date)
+    return tuple(bornes)
+
+
+def filtrer_periode(queryset, champ, du, au):
+    if du:
+        queryset = queryset.filter(**{f'{champ}__gte': du})
+    if au:
+        queryset = queryset.filter(**{f'{champ}__lte': au})
+    return queryset
+
+
+#################################################################################################
+# Générateurs
+
+def _par_paquets(tampon, ecrire, lignes):
+    """Écrit les lignes dans `tampon` (via `ecrire`) et le vide tous les TAILLE_PAQUET."""
+    for numero, ligne in enumerate(lignes, start=1):
+        ecrire(ligne)
+        if numero % TAILLE_PAQUET == 0:
+            yield tampon.getvalue().encode('utf-8')
+            tampon.seek(0)
+            tampon.truncate()
+    if tampon.tell():
+        yield tampon.getvalue().encode('utf-8')
+
+
+def generer_csv(entetes, lignes):
+    tampon = io.StringIO()
+    writer = csv.writer(tampon)
+    # L'en-tête part seul : le client reçoit le premier octet avant la requête
+    writer.writerow(entetes)
+    yield tampon.getvalue().encode('utf-8')
+    tampon.seek(0)
+    tampon.truncate()
+    yield from _par_paquets(tampon, writer.writerow, lignes)
+
+
+def generer_jsonl(champs, lignes):
+    tampon = io.StringIO()
+    encodeur = DjangoJSONEncoder(ensure_ascii=False)
+
+    def ecrire(ligne):
+        tampon.write(encodeur.encode(dict(zip(champs, ligne))))
+        tampon.write('\n')
+
+    yield from _par_paquets(tampon, ecrire, lignes)
+
+
+def compresser_gzip(morceaux):
+    """Compression gzip au fil de l'eau ; chaque paquet est vidé pour partir aussitôt."""
+    compresseur = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 : en-tête et somme gzip
+    for morceau in morceaux:
+        yield compresseur.compress(morceau) + compresseur.flush(zlib.Z_SYNC_FLUSH)
+    yield compresseur.flush()
+
+
+#################################################################################################
+# Réponse
+
+def reponse_export(request, nom, colonnes, lignes):
+    """
+    StreamingHttpResponse CSV ou JSON Lines selon ?format=, compressée si ?gzip=1.
+
+    `colonnes` : [(clé JSON, en-tête CSV)] dans l'ordre des valeurs de `lignes`.
+    """
+    format_export = request.GET.get('format', 'csv')
+    if format_export not in FORMATS:
+        return HttpResponse("Format invalide (csv ou jsonl)", status=400)
+
+    if format_export == 'csv':
+        morceaux = generer_csv([entete for _, entete in colonnes], lignes)
+    else:
+        morceaux = generer_jsonl([cle for cle, _ in colonnes], lignes)
+
+    nom_fichier = f"{nom}.{format_export}"
+    if request.GET.get('gzip') in ('1', 'true', 'oui'):
+        response = StreamingHttpResponse(compresser_gzip(morceaux), content_type='application/gzip')
+        nom_fichier += '.gz'
+    else:
+        response = StreamingHttpResponse(morceaux, content_type=FORMATS[format_export])
+
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+    response['X-Accel-Buffering'] = 'no'  # nginx : ne pas retenir le flux
+    return response
@@ -0,0 +1,112 @@
+# identification/facettes.py
+"""
+Filtres à facettes de la liste des membres.
+
+Toutes les facettes (province, catégorie, sexe, statut, état de la carte)
+sont comptées en UNE seule requête d'agrégation : chaque valeur devient un
+`COUNT(*) FILTER (WHERE ...)`. Comme sur un site marchand, le compteur d'une
+facette tient compte des autres filtres actifs mais pas du sien, pour que
+l'on puisse toujours changer de valeur sans repartir de zéro. La même
+requête compte aussi chaque valeur sous TOUS les filtres (`total_filtre`),
+pour les chiffres d'en-tête et les statistiques de la liste filtrée.
+"""
+from django.db.models import Count, Q
+
+from .models import Membre
+
+
+ETAT_CARTE_CHOICES = [
+    ('valide', 'Carte valide'),
+    ('expiree', 'Carte expirée'),
+]
+
+# Tranches précalculées par le balayage quotidien (valeurs GET en texte)
+ECHEANCE_CHOICES = [(str(valeur), libelle) for valeur, libelle in Membre.ECHEANCE_CHOICES]
+
+# Paramètre GET -> choix possibles
+FACETTES = {
+    'province': Membre.PROVINCE_CHOICES,
+    'categorie': Membre.CATEGORIE_CHOICES,
+    'sexe': Membre.SEXE_CHOICES,
+    'statut': Membre.STATUT_CHOICES,
+    'expiration': ETAT_CARTE_CHOICES,
+    'echeance': ECHEANCE_CHOICES,
+}
+
+
+def facettes_selectionnees(request):
+    """Valeurs de facettes demandées dans l'URL (les valeurs inconnues sont ignorées)."""
+    selection = {}
+    for nom, choix in FACETTES.items():
+        valeur = request.GET.get(nom, '')
+        if valeur in dict(choix):
+            selection[nom] = valeur
+    return selection
+
+
+def q_facette(nom, valeur):
+    """Condition Q correspondant à une valeur de facette."""
+    if nom == 'expiration':
+        # État stocké (expiration.py) : lecture indexée, sans comparaison de dates
+        if valeur == 'expiree':
+            return Q(carte_expiree=True)
+        return Q(carte_expiree=False, date_expiration__isnull=False)
+    if nom == 'echeance':
+        return Q(echeance_expiration=int(valeur))
+    return Q(**{nom: valeur})
+
+
+def q_selection(selection, sauf=None):
+    """Combine (ET) les facettes sélectionnées, en omettant éventuellement `sauf`."""
+    q = Q()
+    for nom, valeur in selection.items():
+        if nom != sauf:
+            q &= q_facette(nom, valeur)
+    return q
+
+
+def appliquer_facettes(queryset, selection):
+    return queryset.filter(q_selection(selection))
+
+
+def compter_facettes(queryset, selection):
+    """
+    Retourne `(total, facettes)` en une seule requête.
+
+    - total : nombre de membres correspondant à tous les filtres
+    - facettes : {nom: [{'valeur', 'libelle', 'total', 'total_filtre', 'selectionne'}, ...]}
+      total : compteur de la facette (sans son propre filtre) ;
+      total_filtre : membres de cette valeur parmi la liste filtrée
+    """
+    tous = q_selection(selection)
+    agregats = {'total': Count('id', filter=tous)}
+    cles = []
+    for nom, choix in FACETTES.items():
+        autres = q_selection(selection, sauf=nom)
+        for valeur, libelle in choix:
+            alias = f'f{len(cles)}'
+            cles.append((alias, nom, valeur, libelle))
+            condition = q_facette(nom, valeur)
+            agregats[alias] = Count('id', filter=autres & condition)
+            agregats[f'{alias}_filtre'] = Count('id', filter=tous & condition)
+
+    resultats = queryset.order_by().aggregate(**agregats)
+
+    facettes = {nom: [] for nom in FACETTES}
+    for alias, nom, valeur, libelle in cles:
+        facettes[nom].append({
+            'valeur': valeur,
+            'libelle': libelle,
+            'total': resultats[alias],
+            'total_filtre': resultats[f'{alias}_filtre'],
+            'selectionne': selection.get(nom) == valeur,
+        })
+    return resultats['total'], facettes
+
+
+def compte(facettes, nom, valeur):
+    """Raccourci : membres d'une valeur de facette dans la liste filtrée."""
+    for ligne in facettes[nom]:
+        if ligne['valeur'] == valeur:
+            return ligne['total_filtre']
+    return 0
@@ -0,0 +1,31 @@
+# identification/flux.py
+"""Utilitaires de génération de fichiers au fil de l'eau (réponses en streaming)."""
+
+
+class FluxZip:
+    """
+    Fichier en écriture seule dont on récupère le contenu au fil de l'eau.
+
+    Passé à zipfile.ZipFile (non « seekable » : zipfile écrit alors des
+    descripteurs de données), il permet de produire une archive par morceaux.
+    """
+
+    def __init__(self):
+        self._morceaux = []
+        self._position = 0
+
+    def write(self, data):
+        self._morceaux.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        data = b''.join(self._morceaux)
+        self._morceaux = []
+        return data
@@ -2,6 +2,9 @@ from django import forms
 from .models import Membre
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+
+from .photos import normaliser_photo
 
 class MembreForm(forms.ModelForm):
     # Champ date_naissance personnalisé avec Flatpickr (JJ-MM-AAAA)
@@ -16,7 +19,11 @@ class MembreForm(forms.ModelForm):
     class Meta:
         model = Membre
         fields = '__all__'
-        exclude = ['code', 'qrcode', 'date_enregistrement', 'date_mise_a_jour', 'date_expiration']
+        exclude = [
+            'code', 'qrcode', 'qrcode_empreinte', 'date_enregistrement', 'date_mise_a_jour', 'date_expiration',
+            'carte_expiree', 'echeance_expiration',  # état précalculé (voir expiration.py)
+            'photo_derives',  # tenu par Membre.save (voir photos.py)
+        ]
         widgets = {
             'observations': forms.Textarea(attrs={'rows': 3, 'class': 'form-control'}),
             'adresse': forms.Textarea(attrs={'rows': 2, 'class': 'form-control'}),
@@ -56,6 +63,16 @@ class MembreForm(forms.ModelForm):
     def clean_email(self):
         email = self.cleaned_data.get('email')
         return email
+
+    def clean_photo(self):
+        photo = self.cleaned_data.get('photo')
+        # Seulement pour un nouvel envoi (pas la photo déjà enregistrée)
+        if isinstance(photo, UploadedFile):
+            try:
+                photo = normaliser_photo(photo, photo.name)
+            except ValueError:
+                raise ValidationError("La photo n'est pas une image valide")
+        return photo
     
     def clean_date_naissance(self):
         date_naissance = self.cleaned_data.get('date_naissance')
@@ -0,0 +1,236 @@
+# identification/importation.py
+"""
+Import en masse de membres depuis un fichier CSV ou XLSX.
+
+- Le fichier est lu ligne par ligne (csv.reader / openpyxl en lecture seule).
+- Chaque ligne est validée par MembreForm (mêmes règles que l'enregistrement :
+  âge ≥ 18 ans, téléphone en chiffres, choix valides...).
+- Les membres valides sont insérés par bulk_create, par lots de TAILLE_LOT,
+  avec un bloc de codes réservé en une requête par lot (voir codes.py).
+- Les QR codes de chaque lot inséré sont générés aussitôt (pool de processus
+  partagé par tout l'import), puis le lot est libéré.
+
+bulk_create ne déclenche pas les signaux : les statistiques du tableau de
+bord sont reconstruites en fin d'import.
+"""
+import csv
+import io
+import os
+from datetime import date, datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .codes import allouer_codes
+from .forms import MembreForm
+from .models import Membre
+from .cartes import WORKERS_PAR_DEFAUT, _pool
+from .qr import generer_qrcodes_lot
+from .statistiques import reconstruire_statistiques
+
+
+TAILLE_LOT = 500
+
+# Colonnes reconnues : nom du champ ou libellé usuel (insensible à la casse)
+COLONNES = {
+    'province': 'province',
+    'categorie': 'categorie',
+    'catégorie': 'categorie',
+    'fonction': 'fonction',
+    'site': 'site',
+    'nom': 'nom',
+    'post_nom': 'post_nom',
+    'post-nom': 'post_nom',
+    'postnom': 'post_nom',
+    'prenom': 'prenom',
+    'prénom': 'prenom',
+    'sexe': 'sexe',
+    'date_naissance': 'date_naissance',
+    'date de naissance': 'date_naissance',
+    'lieu_naissance': 'lieu_naissance',
+    'lieu de naissance': 'lieu_naissance',
+    'adresse': 'adresse',
+    'telephone': 'telephone',
+    'téléphone': 'telephone',
+    'email': 'email',
+    'statut': 'statut',
+    'profession': 'profession',
+    'observations': 'observations',
+}
+
+# Champs à choix : la valeur ou le libellé affiché sont acceptés
+CHOIX = {
+    'province': Membre.PROVINCE_CHOICES,
+    'categorie': Membre.CATEGORIE_CHOICES,
+    'sexe': Membre.SEXE_CHOICES,
+    'statut': Membre.STATUT_CHOICES,
+}
+_CORRESPONDANCES_CHOIX = {
+    champ: {cle.lower(): valeur for valeur, libelle in choix for cle in (valeur, libelle)}
+    for champ, choix in CHOIX.items()
+}
+
+
+class RapportImport:
+    """Résultat d'un import : nombre de lignes lues / créées et erreurs par ligne."""
+
+    def __init__(self):
+        self.lignes = 0
+        self.crees = 0
+        self.erreurs = []  # [(numéro de ligne, {champ: [messages]})]
+
+    @property
+    def rejetees(self):
+        return len(self.erreurs)
+
+    def ajouter_erreur(self, numero, erreurs):
+        self.erreurs.append((numero, erreurs))
+
+    def ecrire_csv(self, sortie):
+        """Rapport d'erreurs au format CSV : ligne ; champ ; message."""
+        writer = csv.writer(sortie, delimiter=';')
+        writer.writerow(['ligne', 'champ', 'message'])
+        for numero, erreurs in self.erreurs:
+            for champ, messages in erreurs.items():
+                for message in messages:
+                    writer.writerow([numero, champ, message])
+
+
+#################################################################################################
+# Lecture
+
+def _en_tete(valeur):
+    return COLONNES.get(str(valeur or '').strip().lower())
+
+
+def _lire_csv(fichier):
+    texte = io.TextIOWrapper(fichier, encoding='utf-8-sig', newline='')
+    debut = texte.read(4096)
+    texte.seek(0)
+    try:
+        dialecte = csv.Sniffer().sniff(debut, delimiters=';,\t')
+    except csv.Error:
+        dialecte = csv.excel
+    lecteur = csv.reader(texte, dialecte)
+    colonnes = [_en_tete(c) for c in next(lecteur, [])]
+    for ligne in lecteur:
+        yield colonnes, ligne
+    texte.detach()
+
+
+def _lire_xlsx(fichier):
+    from openpyxl import load_workbook
+
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        lignes = classeur.active.iter_rows(values_only=True)
+        colonnes = [_en_tete(c) for c in next(lignes, ())]
+        for ligne in lignes:
+            yield colonnes, ligne
+    finally:
+        classeur.close()
+
+
+def lire_lignes(fichier, nom):
+    """
+    Générateur de (numéro de ligne, {champ: valeur}) pour un fichier CSV ou XLSX.
+
+    Le numéro est celui de la ligne dans le fichier (l'en-tête est la ligne 1).
+    """
+    fichier = getattr(fichier, 'file', fichier)  # UploadedFile -> fichier binaire sous-jacent
+    extension = os.path.splitext(nom)[1].lower()
+    if extension == '.xlsx':
+        lignes = _lire_xlsx(fichier)
+    elif extension == '.csv':
+        lignes = _lire_csv(fichier)
+    else:
+        raise ValueError("Format non pris en charge (CSV ou XLSX attendu)")
+
+    for numero, (colonnes, valeurs) in enumerate(lignes, start=2):
+        donnees = {
+            champ: valeur for champ, valeur in zip(colonnes, valeurs)
+            if champ and valeur not in (None, '')
+        }
+        if donnees:
+            yield numero, donnees
+
+
+#################################################################################################
+# Validation
+
+def _preparer(donnees):
+    """Valeurs brutes d'une ligne -> données de formulaire."""
+    resultat = {}
+    for champ, valeur in donnees.items():
+        if isinstance(valeur, (datetime, date)):
+            valeur = valeur.strftime('%Y-%m-%d')
+        elif isinstance(valeur, float) and valeur.is_integer():
+            valeur = int(valeur)  # téléphone saisi comme nombre dans Excel
+        valeur = str(valeur).strip()
+        if champ in _CORRESPONDANCES_CHOIX:
+            valeur = _CORRESPONDANCES_CHOIX[champ].get(valeur.lower(), valeur)
+        resultat[champ] = valeur
+    resultat.setdefault('statut', 'actif')
+    return resultat
+
+
+def valider_ligne(donnees):
+    """Membre non enregistré si la ligne est valide, sinon dictionnaire d'erreurs."""
+    form = MembreForm(_preparer(donnees))
+    if not form.is_valid():
+        return None, {champ: list(messages) for champ, messages in form.errors.items()}
+    membre = form.save(commit=False)
+    membre.date_enregistrement = timezone.now().date()
+    membre.normaliser(attribuer_code=False)
+    return membre, None
+
+
+#################################################################################################
+# Insertion
+
+def _inserer(lot):
+    for membre, code in zip(lot, allouer_codes(len(lot))):
+        membre.code = code
+    with transaction.atomic():
+        return Membre.objects.bulk_create(lot)
+
+
+def importer_membres(fichier, nom, workers=None, taille_lot=TAILLE_LOT, progression=None):
+    """
+    Importe les membres du fichier `fichier` (nom `nom`, pour le format).
+
+    `progression(lignes_lues, membres_crees)` est appelée après chaque lot.
+    Retourne un RapportImport.
+    """
+    rapport = RapportImport()
+    workers = workers or WORKERS_PAR_DEFAUT
+    pool = _pool(workers) if workers > 1 else None
+
+    def enregistrer(lot):
+        crees = _inserer(lot)
+        generer_qrcodes_lot(crees, taille_lot=taille_lot, pool=pool)
+        rapport.crees += len(crees)
+        if progression:
+            progression(rapport.lignes, rapport.crees)
+
+    try:
+        lot = []
+        for numero, donnees in lire_lignes(fichier, nom):
+            rapport.lignes += 1
+            membre, erreurs = valider_ligne(donnees)
+            if erreurs:
+                rapport.ajouter_erreur(numero, erreurs)
+                continue
+            lot.append(membre)
+            if len(lot) >= taille_lot:
+                enregistrer(lot)
+                lot = []
+        if lot:
+            enregistrer(lot)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if rapport.crees:
+        reconstruire_statistiques()
+    return rapport
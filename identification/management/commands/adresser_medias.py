@@ -0,0 +1,70 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.core.files.storage import default_storage
+
+from identification.models import Membre
+from identification.photos import DERIVES, nom_derive
+from identification.stockage import StockageContenu, est_adresse, reference_ailleurs
+
+
+class Command(BaseCommand):
+    help = (
+        "Renomme les médias enregistrés avant le stockage adressé par contenu "
+        "(photos et QR codes des membres et des utilisateurs) : fichiers dédupliqués "
+        "et répartis en sous-répertoires."
+    )
+
+    def champs(self):
+        return [
+            (Membre, 'photo', True),
+            (Membre, 'qrcode', False),
+            (get_user_model(), 'photo', False),
+            (get_user_model(), 'qrcode', False),
+        ]
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, StockageContenu):
+            raise CommandError("Le stockage par défaut n'est pas StockageContenu (voir STORAGES)")
+
+        for modele, champ, avec_derives in self.champs():
+            renommes = manquants = 0
+            stockage = modele._meta.get_field(champ).storage
+            lignes = modele.objects.exclude(**{champ: ''}).exclude(**{f'{champ}__isnull': True})
+            for pk, ancien in lignes.values_list('pk', champ).iterator():
+                if est_adresse(ancien):
+                    continue
+                if not stockage.exists(ancien):
+                    manquants += 1
+                    continue
+
+                with stockage.open(ancien, 'rb') as fichier:
+                    nouveau = stockage.save(ancien, File(fichier, ancien))
+                modele.objects.filter(pk=pk).update(**{champ: nouveau})
+
+                if avec_derives:
+                    self.deplacer_derives(stockage, ancien, nouveau)
+                if not reference_ailleurs(modele, champ, ancien):
+                    stockage.delete(ancien)
+                renommes += 1
+
+            self.stdout.write(
+                f"{modele._meta.label}.{champ} : {renommes} fichier(s) renommé(s), "
+                f"{manquants} fichier(s) introuvable(s)."
+            )
+        self.stdout.write(self.style.SUCCESS("Médias adressés par contenu."))
+
+    def deplacer_derives(self, stockage, ancien, nouveau):
+        """Les dérivés suivent l'original ; ceux d'une photo déjà présente sont conservés."""
+        for derive in DERIVES:
+            source = nom_derive(ancien, derive)
+            if not stockage.exists(source):
+                continue
+            cible = nom_derive(nouveau, derive)
+            if stockage.exists(cible):
+                stockage.delete(source)
+            else:
+                os.makedirs(os.path.dirname(stockage.path(cible)), exist_ok=True)
+                os.replace(stockage.path(source), stockage.path(cible))
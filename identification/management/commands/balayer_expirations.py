@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from identification.expiration import balayer_expirations
+
+
+class Command(BaseCommand):
+    help = (
+        "Balayage quotidien des cartes : marque les cartes expirées, passe les membres "
+        "concernés en inactif et met à jour les échéances 30 / 60 / 90 jours."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Jour de référence (AAAA-MM-JJ), aujourd'hui par défaut")
+
+    def handle(self, *args, **options):
+        jour = None
+        if options['date']:
+            jour = parse_date(options['date'])
+            if jour is None:
+                raise CommandError("Date invalide (format attendu : AAAA-MM-JJ)")
+
+        balayage = balayer_expirations(jour)
+        self.stdout.write(self.style.SUCCESS(
+            f"Balayage du {balayage.jour:%d/%m/%Y} : {balayage.nouvelles_expirations} cartes expirées, "
+            f"{balayage.membres_desactives} membres désactivés, {balayage.cartes_revalidees} cartes revalidées, "
+            f"{balayage.echeances_modifiees} échéances modifiées "
+            f"(30 j : {balayage.echeance_30}, 60 j : {balayage.echeance_60}, 90 j : {balayage.echeance_90})."
+        ))
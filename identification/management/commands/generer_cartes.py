@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from identification.cartes import WORKERS_PAR_DEFAUT, generer_lot_pdf, generer_lot_zip, selectionner_membres
+
+
+def _date(valeur):
+    try:
+        return datetime.strptime(valeur, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Date invalide : {valeur} (format attendu : AAAA-MM-JJ)")
+
+
+class Command(BaseCommand):
+    help = "Génère en lot les cartes de membre (un seul PDF ou un ZIP de PDF)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--province', help="Code province, ex. LUALABA")
+        parser.add_argument('--categorie', help="Catégorie, ex. 'Membre Effectif'")
+        parser.add_argument('--expire-avant', type=_date, help="Cartes expirant avant cette date (AAAA-MM-JJ)")
+        parser.add_argument('--ids', help="Identifiants séparés par des virgules")
+        parser.add_argument('--format', choices=['pdf', 'zip'], default='pdf')
+        parser.add_argument('--sortie', required=True, help="Fichier de sortie")
+        parser.add_argument('--workers', type=int, default=WORKERS_PAR_DEFAUT, help="Nombre de processus")
+
+    def handle(self, *args, **options):
+        ids = None
+        if options['ids']:
+            try:
+                ids = [int(i) for i in options['ids'].split(',') if i.strip()]
+            except ValueError:
+                raise CommandError("Liste d'identifiants invalide")
+
+        membres = selectionner_membres(
+            province=options['province'],
+            categorie=options['categorie'],
+            expire_avant=options['expire_avant'],
+            ids=ids,
+        )
+        total = membres.count()
+        if not total:
+            raise CommandError("Aucun membre ne correspond à ces critères")
+
+        def progression(fait, total):
+            self.stdout.write(f"\r{fait}/{total} cartes", ending='')
+            self.stdout.flush()
+
+        with open(options['sortie'], 'wb') as fichier:
+            if options['format'] == 'zip':
+                for morceau in generer_lot_zip(membres, workers=options['workers'], progression=progression):
+                    fichier.write(morceau)
+            else:
+                generer_lot_pdf(membres, fichier, workers=options['workers'], progression=progression)
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f"{total} carte(s) générée(s) dans {options['sortie']}"))
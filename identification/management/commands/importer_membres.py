@@ -0,0 +1,51 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from identification.cartes import WORKERS_PAR_DEFAUT
+from identification.importation import TAILLE_LOT, importer_membres
+
+
+class Command(BaseCommand):
+    help = "Importe des membres depuis un fichier CSV ou XLSX (insertion par lots, QR codes en parallèle)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Fichier .csv ou .xlsx (ligne 1 : en-têtes)")
+        parser.add_argument('--rapport', help="Fichier CSV où écrire les erreurs ligne par ligne")
+        parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT, help="Membres insérés par requête")
+        parser.add_argument('--workers', type=int, default=WORKERS_PAR_DEFAUT, help="Processus pour les QR codes")
+
+    def handle(self, *args, **options):
+        chemin = options['fichier']
+        if not os.path.exists(chemin):
+            raise CommandError(f"Fichier introuvable : {chemin}")
+
+        def progression(lues, crees):
+            self.stdout.write(f"\r{lues} lignes lues, {crees} membres créés", ending='')
+            self.stdout.flush()
+
+        with open(chemin, 'rb') as fichier:
+            try:
+                rapport = importer_membres(
+                    fichier, chemin,
+                    workers=options['workers'],
+                    taille_lot=options['taille_lot'],
+                    progression=progression,
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write('')
+        for numero, erreurs in rapport.erreurs[:20]:
+            details = "; ".join(f"{champ} : {' '.join(messages)}" for champ, messages in erreurs.items())
+            self.stderr.write(f"Ligne {numero} — {details}")
+        if rapport.rejetees > 20:
+            self.stderr.write(f"... et {rapport.rejetees - 20} autre(s) ligne(s) rejetée(s)")
+
+        if options['rapport']:
+            with open(options['rapport'], 'w', newline='', encoding='utf-8') as sortie:
+                rapport.ecrire_csv(sortie)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{rapport.crees} membre(s) importé(s), {rapport.rejetees} ligne(s) rejetée(s) sur {rapport.lignes}."
+        ))
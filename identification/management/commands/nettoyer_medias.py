@@ -0,0 +1,55 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from identification.nettoyage import dossiers_medias, orphelins, references_medias, supprimer_dossiers_vides
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les photos, dérivés et QR codes qui ne sont plus référencés par aucun "
+        "membre ni utilisateur (membres supprimés, QR codes régénérés...)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--simulation', '--dry-run', action='store_true', dest='simulation',
+            help="Lister les fichiers orphelins sans les supprimer",
+        )
+        parser.add_argument(
+            '--delai', type=float, default=24,
+            help="Ignorer les fichiers modifiés depuis moins de DELAI heures (24 par défaut)",
+        )
+
+    def handle(self, *args, **options):
+        racine = str(settings.MEDIA_ROOT)
+        simulation = options['simulation']
+        dossiers = dossiers_medias()
+
+        references = references_medias()
+        self.stdout.write(f"{len(references)} fichier(s) référencé(s) dans {', '.join(dossiers)}.")
+
+        nombre = total = erreurs = 0
+        for nom, taille in orphelins(racine, references, delai=options['delai'] * 3600, dossiers=dossiers):
+            if options['verbosity'] >= 2 or simulation:
+                self.stdout.write(f"  {nom} ({taille} octets)")
+            if not simulation:
+                try:
+                    os.remove(os.path.join(racine, nom))
+                except OSError as e:
+                    erreurs += 1
+                    self.stderr.write(f"{nom} : {e}")
+                    continue
+            nombre += 1
+            total += taille
+
+        if not simulation:
+            for dossier in dossiers:
+                supprimer_dossiers_vides(racine, dossier)
+
+        action = "à supprimer" if simulation else "supprimé(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{nombre} fichier(s) orphelin(s) {action}, {total / 1024 / 1024:.1f} Mo"
+            + (f", {erreurs} erreur(s)." if erreurs else ".")
+        ))
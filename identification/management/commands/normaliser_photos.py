@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from identification.models import Membre
+from identification.photos import (
+    derive_existe, derives_complets, generer_derives, normaliser_photo, supprimer_derives,
+)
+from identification.stockage import StockageContenu, reference_ailleurs
+
+
+class Command(BaseCommand):
+    help = "Normalise les photos envoyées avant la normalisation automatique et génère leurs dérivés."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tout', action='store_true', help="Retraiter aussi les photos qui ont déjà des dérivés")
+
+    def handle(self, *args, **options):
+        traitees = erreurs = 0
+        for membre in Membre.objects.exclude(photo='').exclude(photo__isnull=True).only('id', 'photo', 'photo_derives').iterator():
+            photo = membre.photo
+            if not options['tout'] and derive_existe(photo):
+                if not membre.photo_derives and derives_complets(photo):
+                    Membre.objects.filter(pk=membre.pk).update(photo_derives=True)
+                continue
+            try:
+                with photo.open('rb') as fichier:
+                    contenu = normaliser_photo(fichier, photo.name)
+                ancien_nom = photo.name
+                stockage = photo.storage
+                nom_cible = photo.field.generate_filename(membre, contenu.name)
+                # Contenu déjà en mémoire : l'original peut être remplacé sous le même nom
+                if nom_cible == ancien_nom and not isinstance(stockage, StockageContenu):
+                    stockage.delete(ancien_nom)
+                nouveau_nom = stockage.save(nom_cible, contenu)
+                # update() : pas de signaux ni de save() pour un simple changement de fichier
+                Membre.objects.filter(pk=membre.pk).update(photo=nouveau_nom)
+                # Photos dédupliquées : l'ancienne peut encore servir à un autre membre
+                if (
+                    nouveau_nom != ancien_nom
+                    and stockage.exists(ancien_nom)
+                    and not reference_ailleurs(Membre, 'photo', ancien_nom)
+                ):
+                    stockage.delete(ancien_nom)
+                    supprimer_derives(ancien_nom, stockage)
+                photo.name = nouveau_nom
+                if options['tout'] or not derives_complets(photo):
+                    generer_derives(photo)
+                Membre.objects.filter(pk=membre.pk).update(photo_derives=True)
+                traitees += 1
+            except (OSError, ValueError) as e:
+                erreurs += 1
+                self.stderr.write(f"Membre {membre.pk} ({photo.name}) : {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"{traitees} photo(s) normalisée(s), {erreurs} erreur(s)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from identification.statistiques import reconstruire_statistiques
+
+
+class Command(BaseCommand):
+    help = "Recalcule entièrement les statistiques matérialisées du tableau de bord identification."
+
+    def handle(self, *args, **options):
+        stats = reconstruire_statistiques()
+        self.stdout.write(self.style.SUCCESS(
+            f"Statistiques reconstruites : {stats.membres_actifs} actifs, "
+            f"{stats.membres_inactifs} inactifs, {stats.cartes_expirees} cartes expirées, "
+            f"{stats.nombre_contributions} contributions."
+        ))
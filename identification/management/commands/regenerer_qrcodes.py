@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from identification.cartes import WORKERS_PAR_DEFAUT
+from identification.models import Membre
+from identification.qr import empreinte_qrcode, generer_qrcodes_lot
+
+
+class Command(BaseCommand):
+    help = (
+        "Régénère les QR codes dont le contenu a changé (nouveau format signé, "
+        "renouvellement de la clé de signature...) ou dont le fichier manque."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tout', action='store_true', help="Régénérer tous les QR codes")
+        parser.add_argument('--taille-lot', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=WORKERS_PAR_DEFAUT)
+
+    def handle(self, *args, **options):
+        taille_lot = options['taille_lot']
+        lot = []
+        regeneres = 0
+        for membre in Membre.objects.order_by('id').iterator(chunk_size=taille_lot):
+            if (
+                options['tout']
+                or not membre.qrcode
+                or membre.qrcode_empreinte != empreinte_qrcode(membre)
+                or not membre.qrcode.storage.exists(membre.qrcode.name)
+            ):
+                lot.append(membre)
+            if len(lot) >= taille_lot:
+                generer_qrcodes_lot(lot, workers=options['workers'], taille_lot=taille_lot)
+                regeneres += len(lot)
+                lot = []
+        if lot:
+            generer_qrcodes_lot(lot, workers=options['workers'], taille_lot=taille_lot)
+            regeneres += len(lot)
+
+        self.stdout.write(self.style.SUCCESS(f"{regeneres} QR code(s) régénéré(s)."))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from identification.signature import ChargeInvalide, verifier_charge
+
+
+class Command(BaseCommand):
+    help = (
+        "Vérifie hors ligne (sans base de données, mais avec la clé de signature du "
+        "serveur) le contenu lu dans le QR code d'une carte : signature, code, "
+        "catégorie et expiration."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('charges', nargs='+', help="Texte lu dans le QR code (RNM:...)")
+        parser.add_argument('--photo', help="Vignette à comparer à l'empreinte signée (fichier JPEG)")
+
+    def handle(self, *args, **options):
+        photo = None
+        if options['photo']:
+            try:
+                with open(options['photo'], 'rb') as fichier:
+                    photo = fichier.read()
+            except OSError as e:
+                raise CommandError(f"Photo illisible : {e}")
+
+        invalides = 0
+        for charge in options['charges']:
+            try:
+                carte = verifier_charge(charge)
+            except ChargeInvalide as e:
+                invalides += 1
+                self.stdout.write(self.style.ERROR(f"INVALIDE : {e}"))
+                continue
+
+            expiration = carte.date_expiration.strftime('%d/%m/%Y') if carte.date_expiration else "aucune"
+            message = f"Code {carte.code} — {carte.categorie} — expire le {expiration}"
+            if photo is not None:
+                message += " — photo conforme" if carte.photo_correspond(photo) else " — PHOTO DIFFÉRENTE"
+            if carte.expiree() or (photo is not None and not carte.photo_correspond(photo)):
+                invalides += 1
+                self.stdout.write(self.style.WARNING(f"AUTHENTIQUE, NON VALIDE : {message}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"VALIDE : {message}"))
+
+        if invalides:
+            raise CommandError(f"{invalides} carte(s) non valide(s)")
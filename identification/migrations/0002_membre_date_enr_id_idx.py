@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(fields=['-date_enregistrement', 'id'], name='membre_date_enr_id_idx'),
+        ),
+    ]
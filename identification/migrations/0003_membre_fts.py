@@ -0,0 +1,24 @@
+# Index plein texte FTS5 des membres (SQLite uniquement, voir recherche.py)
+
+from django.db import migrations
+
+
+def creer_index(apps, schema_editor):
+    from identification.recherche import installer_index_fts
+    installer_index_fts(schema_editor.connection)
+
+
+def supprimer_index(apps, schema_editor):
+    from identification.recherche import supprimer_index_fts
+    supprimer_index_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identification', '0002_membre_date_enr_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
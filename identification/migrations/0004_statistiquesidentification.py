@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identification', '0003_membre_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiquesIdentification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('membres_actifs', models.IntegerField(default=0)),
+                ('membres_inactifs', models.IntegerField(default=0)),
+                ('cartes_valides', models.IntegerField(default=0)),
+                ('cartes_expirees', models.IntegerField(default=0)),
+                ('cartes_renouvelees', models.IntegerField(default=0)),
+                ('membres_avec_duplicata', models.IntegerField(default=0)),
+                ('total_contributions', models.BigIntegerField(default=0)),
+                ('nombre_contributions', models.IntegerField(default=0)),
+                ('total_entrees', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_sorties', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('date_calcul', models.DateField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Statistiques identification',
+                'verbose_name_plural': 'Statistiques identification',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identification', '0004_statistiquesidentification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membre',
+            name='qrcode_empreinte',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:08
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def initialiser_etat(apps, schema_editor):
+    """
+    Drapeau et tranches des cartes existantes. Les membres déjà expirés mais
+    encore actifs sont passés en inactif par le balayage quotidien.
+    """
+    Membre = apps.get_model('identification', 'Membre')
+    aujourd_hui = timezone.now().date()
+    Membre.objects.filter(date_expiration__lt=aujourd_hui).update(carte_expiree=True)
+    debut = aujourd_hui
+    for echeance in (30, 60, 90):
+        fin = aujourd_hui + timedelta(days=echeance)
+        Membre.objects.filter(date_expiration__gte=debut, date_expiration__lte=fin).update(
+            echeance_expiration=echeance
+        )
+        debut = fin + timedelta(days=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identification', '0005_membre_qrcode_empreinte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalayageExpiration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_execution', models.DateTimeField(auto_now_add=True)),
+                ('jour', models.DateField()),
+                ('nouvelles_expirations', models.IntegerField(default=0)),
+                ('membres_desactives', models.IntegerField(default=0)),
+                ('cartes_revalidees', models.IntegerField(default=0)),
+                ('echeances_modifiees', models.IntegerField(default=0)),
+                ('membres_expires', models.JSONField(blank=True, default=list)),
+                ('echeance_30', models.IntegerField(default=0)),
+                ('echeance_60', models.IntegerField(default=0)),
+                ('echeance_90', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Balayage des expirations',
+                'verbose_name_plural': 'Balayages des expirations',
+                'ordering': ['-date_execution'],
+            },
+        ),
+        migrations.AddField(
+            model_name='membre',
+            name='carte_expiree',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='membre',
+            name='echeance_expiration',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(30, 'Expire sous 30 jours'), (60, 'Expire sous 60 jours'), (90, 'Expire sous 90 jours')], null=True),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(fields=['date_expiration'], name='membre_date_expiration_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(fields=['carte_expiree', 'statut'], name='membre_expiree_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(fields=['echeance_expiration'], name='membre_echeance_idx'),
+        ),
+        migrations.RunPython(initialiser_etat, migrations.RunPython.noop),
+    ]
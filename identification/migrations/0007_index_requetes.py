@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identification', '0006_membre_expiration_balayage'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='membre',
+            name='membre_expiree_statut_idx',
+        ),
+        migrations.AddIndex(
+            model_name='duplicata',
+            index=models.Index(fields=['-date_creation'], name='duplicata_date_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(condition=models.Q(('carte_expiree', True)), fields=['statut'], name='membre_expirees_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(fields=['statut', 'sexe'], name='membre_statut_sexe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(fields=['sexe'], name='membre_sexe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(fields=['province', 'categorie'], name='membre_province_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(fields=['categorie'], name='membre_categorie_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(condition=models.Q(('carte_renouvelee', True)), fields=['-date_mise_a_jour'], name='membre_renouvelee_idx'),
+        ),
+    ]
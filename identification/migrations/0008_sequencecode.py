@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identification', '0007_index_requetes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCode',
+            fields=[
+                ('nom', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('valeur', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Séquence de codes',
+                'verbose_name_plural': 'Séquences de codes',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+def initialiser_drapeau(apps, schema_editor):
+    """Photos existantes : drapeau posé si tous leurs dérivés sont déjà écrits."""
+    from identification.photos import derives_complets
+
+    Membre = apps.get_model('identification', 'Membre')
+    avec_derives = []
+    for membre in Membre.objects.exclude(photo='').exclude(photo__isnull=True).only('id', 'photo').iterator():
+        if derives_complets(membre.photo):
+            avec_derives.append(membre.pk)
+        if len(avec_derives) >= 500:
+            Membre.objects.filter(pk__in=avec_derives).update(photo_derives=True)
+            avec_derives = []
+    Membre.objects.filter(pk__in=avec_derives).update(photo_derives=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identification', '0008_sequencecode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membre',
+            name='photo_derives',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(initialiser_drapeau, migrations.RunPython.noop),
+    ]
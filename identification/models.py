@@ -1,9 +1,14 @@
 from django.db import models
 from django.utils import timezone
-import uuid
 from datetime import timedelta
 from django.core.exceptions import ValidationError
 
+from .codes import allouer_code
+from .expiration import etat_expiration
+from .diffusion import url_media, version_nom
+from .photos import derives_complets, generer_derives, supprimer_derives, url_photo
+from .stockage import reference_ailleurs
+
 class Membre(models.Model):
     SEXE_CHOICES = [
         ('M', 'Masculin'),
@@ -50,6 +55,13 @@ class Membre(models.Model):
         ('actif', 'Actif'),
         ('inactif', 'Inactif'),
     ]
+
+    # Jours restants avant l'expiration de la carte (voir expiration.py)
+    ECHEANCE_CHOICES = [
+        (30, 'Expire sous 30 jours'),
+        (60, 'Expire sous 60 jours'),
+        (90, 'Expire sous 90 jours'),
+    ]
     
     # Informations de base
     code = models.CharField(max_length=20, unique=True, blank=True)
@@ -72,11 +84,17 @@ class Membre(models.Model):
     # Identification
     photo = models.ImageField(upload_to='photos/', blank=True, null=True)
     qrcode = models.ImageField(upload_to='qrcodes/', blank=True, null=True)
+    qrcode_empreinte = models.CharField(max_length=64, blank=True, default='')  # sha256 du contenu encodé (voir qr.py)
+    photo_derives = models.BooleanField(default=False)  # dérivés de la photo écrits (voir photos.py)
     
     # Dates
     date_enregistrement = models.DateField(default=timezone.now)
     date_mise_a_jour = models.DateField(auto_now=True)
     date_expiration = models.DateField(null=True, blank=True)  # <- Ajouter ce champ
+
+    # État de la carte précalculé (à l'enregistrement et par `manage.py balayer_expirations`)
+    carte_expiree = models.BooleanField(default=False)
+    echeance_expiration = models.PositiveSmallIntegerField(choices=ECHEANCE_CHOICES, null=True, blank=True)
     
     # Autres
     statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='actif')
@@ -103,11 +121,36 @@ class Membre(models.Model):
         verbose_name = "Membre"
         verbose_name_plural = "Membres"
         ordering = ['nom', 'post_nom', 'prenom']
+        indexes = [
+            # Pagination par curseur de la liste (voir pagination.py)
+            models.Index(fields=['-date_enregistrement', 'id'], name='membre_date_enr_id_idx'),
+            # Balayage quotidien des expirations et compteurs du tableau de bord
+            models.Index(fields=['date_expiration'], name='membre_date_expiration_idx'),
+            # Cartes expirées : index partiel (SQLite n'utilise pas un index ordinaire pour `WHERE carte_expiree`)
+            models.Index(fields=['statut'], condition=models.Q(carte_expiree=True), name='membre_expirees_idx'),
+            models.Index(fields=['echeance_expiration'], name='membre_echeance_idx'),
+            # Facettes et compteurs de la liste (statut, sexe, province, catégorie)
+            models.Index(fields=['statut', 'sexe'], name='membre_statut_sexe_idx'),
+            models.Index(fields=['sexe'], name='membre_sexe_idx'),
+            models.Index(fields=['province', 'categorie'], name='membre_province_cat_idx'),
+            models.Index(fields=['categorie'], name='membre_categorie_idx'),
+            # Liste des cartes renouvelées : index partiel, seules ces lignes y figurent
+            models.Index(
+                fields=['-date_mise_a_jour'],
+                condition=models.Q(carte_renouvelee=True),
+                name='membre_renouvelee_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nom} {self.post_nom} {self.prenom} ({self.code})"
 
-    def save(self, *args, **kwargs):
+    def normaliser(self, attribuer_code=True):
+        """
+        Majuscules, code et date d'expiration : appliqué par save() et par l'import en masse.
+
+        L'import attribue les codes par blocs (attribuer_code=False, voir codes.py).
+        """
         # ✅ Conversion automatique en MAJUSCULES
         if self.nom:
             self.nom = self.nom.upper()
@@ -126,16 +169,64 @@ class Membre(models.Model):
         if self.adresse:
             self.adresse = self.adresse.upper()
         
-        # ✅ Génération automatique du code si absent
-        if not self.code:
-            self.code = str(uuid.uuid4())[:8].upper()
+        # ✅ Code attribué par le compteur si absent (sans collision possible)
+        if not self.code and attribuer_code:
+            self.code = allouer_code()
 
         # ✅ Date d’expiration auto si vide
         if not self.date_expiration:
             self.date_expiration = self.date_enregistrement + timedelta(days=3*365)
 
+        # ✅ État de la carte tenu à jour à chaque écriture
+        self.carte_expiree, self.echeance_expiration = etat_expiration(self.date_expiration)
+
+    def save(self, *args, **kwargs):
+        self.normaliser()
+
+        # ✅ Nouvelle photo : dérivés (avatar, vignette, carte) générés après l'écriture du fichier
+        nouvelle_photo = bool(self.photo) and not self.photo._committed
+        if nouvelle_photo or not self.photo:
+            self.photo_derives = False
+        ancienne = None
+        if nouvelle_photo and self.pk:
+            ancienne = Membre.objects.filter(pk=self.pk).values_list('photo', flat=True).first()
+
         super().save(*args, **kwargs)
 
+        if nouvelle_photo:
+            # Photos nommées par leur contenu : une photo identique garde ses dérivés,
+            # et ceux de l'ancienne ne sont supprimés que si plus personne ne l'utilise
+            if ancienne and ancienne != self.photo.name and not reference_ailleurs(Membre, 'photo', ancienne):
+                supprimer_derives(ancienne, self.photo.storage)
+            if not derives_complets(self.photo):
+                generer_derives(self.photo)
+            # Les URLs des dérivés sont ensuite construites sans interroger le stockage
+            Membre.objects.filter(pk=self.pk).update(photo_derives=True)
+            self.photo_derives = True
+
+    # URLs versionnées (?v=) : servies par get_image avec Cache-Control immutable
+    @property
+    def photo_url(self):
+        return url_photo(self.pk, self.photo.name, self.photo_derives)
+
+    @property
+    def photo_avatar_url(self):
+        return url_photo(self.pk, self.photo.name, self.photo_derives, 'avatar')
+
+    @property
+    def photo_vignette_url(self):
+        return url_photo(self.pk, self.photo.name, self.photo_derives, 'vignette')
+
+    @property
+    def photo_carte_url(self):
+        return url_photo(self.pk, self.photo.name, self.photo_derives, 'carte')
+
+    @property
+    def qrcode_url(self):
+        if not self.qrcode:
+            return ''
+        return url_media(self.pk, 'qrcode', version_nom(self.qrcode.name))
+
     @property
     def est_expiree(self):
         """Retourne True si la carte est expirée"""
@@ -154,7 +245,92 @@ class Duplicata(models.Model):
     date_creation = models.DateTimeField(auto_now_add=True)
     numero_carte = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            # Liste des duplicatas, du plus récent au plus ancien
+            models.Index(fields=['-date_creation'], name='duplicata_date_creation_idx'),
+        ]
+
     def __str__(self):
         return f"Duplicata de {self.membre.nom} ({self.date_creation.date()})"
 
 
+
+###############################################################################################################
+
+class StatistiquesIdentification(models.Model):
+    """
+    Statistiques du tableau de bord, matérialisées sur une seule ligne (pk=1).
+
+    Mises à jour par incréments depuis les signaux (voir signals.py),
+    reconstruites par `python manage.py reconstruire_statistiques`.
+    Les compteurs de cartes valides / expirées dépendent de la date :
+    ils sont recalculés au premier accès de chaque jour (voir statistiques.py).
+    """
+    membres_actifs = models.IntegerField(default=0)
+    membres_inactifs = models.IntegerField(default=0)
+    cartes_valides = models.IntegerField(default=0)
+    cartes_expirees = models.IntegerField(default=0)
+    cartes_renouvelees = models.IntegerField(default=0)
+    membres_avec_duplicata = models.IntegerField(default=0)
+
+    # Finance
+    total_contributions = models.BigIntegerField(default=0)
+    nombre_contributions = models.IntegerField(default=0)
+    total_entrees = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_sorties = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Jour pour lequel cartes_valides / cartes_expirees sont exacts
+    date_calcul = models.DateField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Statistiques identification"
+        verbose_name_plural = "Statistiques identification"
+
+    def __str__(self):
+        return f"Statistiques au {self.date_calcul:%d/%m/%Y}"
+
+
+
+###############################################################################################################
+
+class BalayageExpiration(models.Model):
+    """Journal du balayage quotidien des expirations (voir expiration.py)."""
+    date_execution = models.DateTimeField(auto_now_add=True)
+    jour = models.DateField()
+
+    # Changements effectués par ce balayage
+    nouvelles_expirations = models.IntegerField(default=0)
+    membres_desactives = models.IntegerField(default=0)
+    cartes_revalidees = models.IntegerField(default=0)
+    echeances_modifiees = models.IntegerField(default=0)
+    membres_expires = models.JSONField(default=list, blank=True)  # identifiants des cartes expirées ce jour
+
+    # État après le balayage
+    echeance_30 = models.IntegerField(default=0)
+    echeance_60 = models.IntegerField(default=0)
+    echeance_90 = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Balayage des expirations"
+        verbose_name_plural = "Balayages des expirations"
+        ordering = ['-date_execution']
+
+    def __str__(self):
+        return f"Balayage du {self.jour:%d/%m/%Y} : {self.nouvelles_expirations} expiration(s)"
+
+
+
+###############################################################################################################
+
+class SequenceCode(models.Model):
+    """Compteur des codes membres (voir codes.py) : une ligne par séquence."""
+    nom = models.CharField(max_length=30, primary_key=True)
+    valeur = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Séquence de codes"
+        verbose_name_plural = "Séquences de codes"
+
+    def __str__(self):
+        return f"{self.nom} : {self.valeur}"
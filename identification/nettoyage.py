@@ -0,0 +1,125 @@
+# identification/nettoyage.py
+"""
+Recherche des médias orphelins (fichiers qui ne sont plus référencés).
+
+1. Les noms référencés par Membre.photo / qrcode et CustomUser.photo / qrcode
+   sont lus en flux (`values_list(...).iterator()`) et réduits à une clé
+   compacte : l'empreinte binaire (32 octets) pour un nom adressé par contenu,
+   le chemin sans extension sinon.
+2. Les répertoires de ces champs sont parcourus avec os.scandir ; un fichier
+   est orphelin si ni sa propre clé, ni (pour un nom de dérivé de photo)
+   celle de l'original ne sont référencées. La clé du fichier lui-même est
+   vérifiée d'abord : un original nommé comme un dérivé (« x_carte.jpg »)
+   reste conservé.
+
+Les fichiers modifiés depuis moins de `delai` sont ignorés : un envoi est
+écrit sur le disque avant que la ligne qui le référence soit enregistrée.
+En cas de doute (même racine, extension différente), le fichier est conservé.
+"""
+import os
+import re
+import time
+
+from django.contrib.auth import get_user_model
+
+from .photos import DERIVES
+from .stockage import PREFIXE_TEMPORAIRE
+
+
+TAILLE_CHUNK = 5000
+
+_EMPREINTE = re.compile(r'^[0-9a-f]{64}$')
+_DERIVE = re.compile(r'^(.*)_(%s)\.jpg$' % '|'.join(DERIVES))
+
+
+def champs_medias():
+    """[(modèle, champ)] des fichiers médias référencés en base."""
+    from .models import Membre
+
+    utilisateur = get_user_model()
+    return [(Membre, 'photo'), (Membre, 'qrcode'), (utilisateur, 'photo'), (utilisateur, 'qrcode')]
+
+
+def cle(nom):
+    """Clé compacte d'un fichier : empreinte binaire, ou chemin relatif sans extension."""
+    racine = os.path.splitext(nom.replace(os.sep, '/'))[0]
+    base = racine.rsplit('/', 1)[-1]
+    if _EMPREINTE.match(base):
+        return bytes.fromhex(base)
+    return racine
+
+
+def est_reference(nom, references):
+    """`nom` est-il référencé, lui-même ou (nom de dérivé de photo) par son original ?"""
+    if cle(nom) in references:
+        return True
+    correspondance = _DERIVE.match(nom.replace(os.sep, '/'))
+    return bool(correspondance) and cle(correspondance.group(1)) in references
+
+
+def references_medias(champs=None):
+    """Ensemble des clés des fichiers référencés."""
+    references = set()
+    for modele, champ in champs or champs_medias():
+        noms = (
+            modele._base_manager.exclude(**{champ: ''})
+            .exclude(**{f'{champ}__isnull': True})
+            .values_list(champ, flat=True)
+            .iterator(chunk_size=TAILLE_CHUNK)
+        )
+        references.update(cle(nom) for nom in noms)
+    return references
+
+
+def dossiers_medias(champs=None):
+    """Répertoires (relatifs à MEDIA_ROOT) où ces champs enregistrent leurs fichiers."""
+    dossiers = set()
+    for modele, champ in champs or champs_medias():
+        upload_to = modele._meta.get_field(champ).upload_to
+        if isinstance(upload_to, str) and upload_to.strip('/'):
+            dossiers.add(upload_to.strip('/'))
+    return sorted(dossiers)
+
+
+def _parcourir(racine, dossier):
+    """(chemin relatif, DirEntry) de tous les fichiers sous `dossier`, sans récursion Python."""
+    pile = [os.path.join(racine, dossier)]
+    while pile:
+        chemin = pile.pop()
+        try:
+            entrees = os.scandir(chemin)
+        except FileNotFoundError:
+            continue
+        with entrees:
+            for entree in entrees:
+                if entree.is_dir(follow_symlinks=False):
+                    pile.append(entree.path)
+                elif entree.is_file(follow_symlinks=False):
+                    yield os.path.relpath(entree.path, racine).replace(os.sep, '/'), entree
+
+
+def orphelins(racine, references, delai=24 * 3600, dossiers=None):
+    """
+    Générateur de (chemin relatif, taille) des fichiers orphelins sous `racine`.
+
+    `dossiers` : répertoires parcourus (ceux des champs médias par défaut).
+    """
+    limite = time.time() - delai
+    for dossier in dossiers if dossiers is not None else dossiers_medias():
+        for nom, entree in _parcourir(racine, dossier):
+            stat = entree.stat(follow_symlinks=False)
+            if stat.st_mtime > limite:
+                continue
+            if os.path.basename(nom).startswith(PREFIXE_TEMPORAIRE) or not est_reference(nom, references):
+                yield nom, stat.st_size
+
+
+def supprimer_dossiers_vides(racine, dossier):
+    """Supprime les sous-répertoires vides (niveaux de répartition) sous `dossier`."""
+    base = os.path.join(racine, dossier)
+    for chemin, _, _ in os.walk(base, topdown=False):
+        if chemin != base:
+            try:
+                os.rmdir(chemin)  # échoue (sans effet) si le répertoire n'est pas vide
+            except OSError:
+                pass
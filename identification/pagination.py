@@ -0,0 +1,119 @@
+# identification/pagination.py
+"""
+Pagination par curseur (keyset) pour la liste des membres.
+
+Au lieu d'un OFFSET (dont le coût augmente avec la profondeur de la page),
+chaque page repart de la dernière ligne affichée : la requête reste la même
+quelle que soit la page demandée ou la taille de la table.
+"""
+import base64
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+
+
+# Taille de page par défaut et taille maximale acceptée via ?per_page=
+MEMBRES_PAR_PAGE = getattr(settings, 'MEMBRES_PAR_PAGE', 50)
+MEMBRES_PAR_PAGE_MAX = getattr(settings, 'MEMBRES_PAR_PAGE_MAX', 200)
+
+
+def encoder_curseur(membre):
+    """Encode la position (date_enregistrement, id) d'un membre en jeton URL."""
+    brut = f"{membre.date_enregistrement.isoformat()}|{membre.pk}"
+    return base64.urlsafe_b64encode(brut.encode()).decode().rstrip('=')
+
+
+def decoder_curseur(jeton):
+    """Décode un jeton de curseur. Retourne None si le jeton est invalide."""
+    if not jeton:
+        return None
+    try:
+        remplissage = '=' * (-len(jeton) % 4)
+        brut = base64.urlsafe_b64decode(jeton + remplissage).decode()
+        date_str, pk = brut.split('|')
+        return date.fromisoformat(date_str), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def taille_de_page(request, defaut=None):
+    """Lit ?per_page= en le bornant entre 1 et MEMBRES_PAR_PAGE_MAX."""
+    defaut = defaut or MEMBRES_PAR_PAGE
+    try:
+        taille = int(request.GET.get('per_page', defaut))
+    except (TypeError, ValueError):
+        taille = defaut
+    return max(1, min(taille, MEMBRES_PAR_PAGE_MAX))
+
+
+class PageCurseur:
+    """Page de résultats avec jetons « suivant » / « précédent »."""
+
+    def __init__(self, objets, next_token=None, previous_token=None, per_page=MEMBRES_PAR_PAGE):
+        self.object_list = objets
+        self.next_token = next_token
+        self.previous_token = previous_token
+        self.per_page = per_page
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_token is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_token is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def paginer_membres(queryset, request, per_page=None):
+    """
+    Pagine un queryset de Membre par curseur, ordre `-date_enregistrement, id`.
+
+    Paramètres GET :
+    - after  : jeton de la dernière ligne de la page précédente (page suivante)
+    - before : jeton de la première ligne de la page courante (page précédente)
+    - per_page : taille de page
+    """
+    per_page = per_page or taille_de_page(request)
+    apres = decoder_curseur(request.GET.get('after'))
+    avant = decoder_curseur(request.GET.get('before'))
+
+    if avant and not apres:
+        # Page précédente : on parcourt dans l'ordre inverse puis on retourne
+        d, pk = avant
+        qs = queryset.filter(
+            Q(date_enregistrement__gt=d) | Q(date_enregistrement=d, id__lt=pk)
+        ).order_by('date_enregistrement', '-id')
+        lignes = list(qs[:per_page + 1])
+        plus = len(lignes) > per_page
+        lignes = lignes[:per_page][::-1]
+        if lignes:
+            # Il existe forcément une page après (celle d'où l'on vient)
+            next_token = encoder_curseur(lignes[-1])
+            previous_token = encoder_curseur(lignes[0]) if plus else None
+            return PageCurseur(lignes, next_token, previous_token, per_page)
+        # Jeton périmé : on retombe sur la première page
+        apres = None
+
+    qs = queryset.order_by('-date_enregistrement', 'id')
+    if apres:
+        d, pk = apres
+        qs = qs.filter(
+            Q(date_enregistrement__lt=d) | Q(date_enregistrement=d, id__gt=pk)
+        )
+    lignes = list(qs[:per_page + 1])
+    plus = len(lignes) > per_page
+    lignes = lignes[:per_page]
+    next_token = encoder_curseur(lignes[-1]) if (plus and lignes) else None
+    previous_token = encoder_curseur(lignes[0]) if (apres and lignes) else None
+    return PageCurseur(lignes, next_token, previous_token, per_page)
@@ -0,0 +1,144 @@
+# identification/photos.py
+"""
+Normalisation des photos de membres et génération de leurs dérivés.
+
+À l'envoi (MembreForm.clean_photo) la photo est tournée selon l'EXIF,
+convertie en RGB, limitée à PHOTO_TAILLE_MAX pixels et ré-encodée en JPEG.
+À l'enregistrement (Membre.save) les dérivés sont écrits à côté de
+l'original : photos/<nom>_avatar.jpg, photos/<nom>_vignette.jpg,
+photos/<nom>_carte.jpg. L'original étant nommé par son contenu (voir
+stockage.py), une photo déjà envoyée réutilise ses dérivés.
+Membre.photo_derives indique qu'ils sont écrits : leurs URLs (liste,
+fiche) sont construites sans interroger le stockage.
+
+Les photos envoyées avant cette normalisation sont traitées par
+`python manage.py normaliser_photos`.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .diffusion import url_media, version_nom
+from .stockage import ecrire_sous_nom
+
+
+# Plus grand côté de la photo d'origine conservée
+PHOTO_TAILLE_MAX = getattr(settings, 'PHOTO_TAILLE_MAX', 1600)
+
+QUALITE_JPEG = 90
+
+# nom -> (largeur, hauteur, recadrer)
+#   avatar   : liste des membres (32 et 50 px, x2 pour les écrans haute densité)
+#   vignette : fiche et modification du membre (200 px, x2)
+#   carte    : photo de la carte PDF (2,5 x 3,4 in à 300 dpi), proportions conservées
+DERIVES = {
+    'avatar': (100, 100, True),
+    'vignette': (400, 400, True),
+    'carte': (750, 1020, False),
+}
+
+
+def _ouvrir_normalisee(fichier):
+    """Image PIL orientée selon l'EXIF, en RGB (transparence sur fond blanc)."""
+    img = Image.open(fichier)
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        fond = Image.new('RGB', img.size, (255, 255, 255))
+        fond.paste(img, mask=img.split()[-1])
+        img = fond
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+
+def _jpeg(img):
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=QUALITE_JPEG, optimize=True)
+    return buffer.getvalue()
+
+
+def normaliser_photo(fichier, nom):
+    """
+    Photo envoyée -> ContentFile JPEG normalisé nommé `<nom sans extension>.jpg`.
+
+    Lève une ValueError si le fichier n'est pas une image lisible.
+    """
+    try:
+        img = _ouvrir_normalisee(fichier)
+    except (OSError, SyntaxError) as e:
+        raise ValueError(f"Image illisible : {e}")
+    img.thumbnail((PHOTO_TAILLE_MAX, PHOTO_TAILLE_MAX), Image.Resampling.LANCZOS)
+    racine, _ = os.path.splitext(os.path.basename(nom))
+    return ContentFile(_jpeg(img), name=f"{racine}.jpg")
+
+
+def nom_derive(nom, derive):
+    """photos/abc.jpg -> photos/abc_<derive>.jpg"""
+    racine, _ = os.path.splitext(nom)
+    return f"{racine}_{derive}.jpg"
+
+
+def generer_derives(photo):
+    """Écrit (ou remplace) les dérivés du FieldFile `photo` à côté de l'original."""
+    stockage = photo.storage
+    with stockage.open(photo.name, 'rb') as fichier:
+        img = _ouvrir_normalisee(fichier)
+        img.load()
+
+    for derive, (largeur, hauteur, recadrer) in DERIVES.items():
+        if recadrer:
+            copie = ImageOps.fit(img, (largeur, hauteur), Image.Resampling.LANCZOS)
+        else:
+            copie = img.copy()
+            copie.thumbnail((largeur, hauteur), Image.Resampling.LANCZOS)
+        ecrire_sous_nom(stockage, nom_derive(photo.name, derive), ContentFile(_jpeg(copie)))
+
+
+def derives_complets(photo):
+    return all(derive_existe(photo, derive) for derive in DERIVES)
+
+
+def supprimer_derives(nom, stockage):
+    for derive in DERIVES:
+        chemin = nom_derive(nom, derive)
+        if stockage.exists(chemin):
+            stockage.delete(chemin)
+
+
+def derive_existe(photo, derive='carte'):
+    return bool(photo) and photo.storage.exists(nom_derive(photo.name, derive))
+
+
+def version_photo(nom, derive=None):
+    """Version (?v=) de l'original `nom` ou de son dérivé, fixé par l'original et ses paramètres."""
+    if derive:
+        return version_nom(nom, DERIVES[derive], QUALITE_JPEG)
+    return version_nom(nom)
+
+
+def url_photo(membre_id, nom, derives_ecrits, derive=None):
+    """
+    URL versionnée (vue get_image) de la photo `nom` ou de son dérivé `derive`.
+
+    Tant que les dérivés ne sont pas écrits (Membre.photo_derives), l'original
+    est servi à leur place. Aucun accès au stockage.
+    """
+    if not nom:
+        return ''
+    version = version_photo(nom, derive if derives_ecrits else None)
+    if derive:
+        return url_media(membre_id, 'photo', version, taille=derive)
+    return url_media(membre_id, 'photo', version)
+
+
+def lire_derive(photo, derive='carte'):
+    """Octets JPEG du dérivé, ou None s'il n'a pas encore été généré."""
+    if not derive_existe(photo, derive):
+        return None
+    with photo.storage.open(nom_derive(photo.name, derive), 'rb') as fichier:
+        return fichier.read()
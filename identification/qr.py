@@ -0,0 +1,226 @@
+# identification/qr.py
+"""
+QR code des cartes de membre.
+
+Le QR code porte une charge compacte signée (code, expiration, catégorie,
+empreinte de la vignette ; voir signature.py), vérifiable hors ligne par
+`python manage.py verifier_qrcode`. Les membres dont le code ou la catégorie
+ne peuvent pas être encodés gardent l'ancien texte en clair.
+
+Les PDF (cartes, factures, historiques) dessinent le QR code en vectoriel
+(QrCodeVectoriel) : aucun PNG à encoder ni à relire, netteté à toute échelle.
+Le PNG enregistré sur le membre ne sert plus qu'à l'affichage web.
+
+Le contenu encodé est haché et l'empreinte est conservée sur le membre
+(Membre.qrcode_empreinte) : le PNG n'est régénéré que si ce contenu change.
+Le fichier est nommé par son contenu (voir stockage.py) et l'ancien est
+supprimé ; avec un stockage classique il est réécrit sous le même nom
+(qrcodes/qrcode_<pk>.png).
+"""
+import hashlib
+import itertools
+from io import BytesIO
+
+import qrcode
+from django.core.files.base import ContentFile
+from reportlab.lib.colors import black, white
+from reportlab.platypus import Flowable
+
+from .photos import lire_derive
+from .signature import ChargeInvalide, encoder_charge
+from .stockage import StockageContenu
+
+
+def texte_qrcode(membre):
+    """Ancien contenu en clair (membres dont la charge signée n'est pas encodable)."""
+    date_enregistrement = membre.date_enregistrement.strftime('%d-%m-%Y')
+    return (
+        f"Code : {membre.code}\n"
+        f"Nom : {membre.nom}\n"
+        f"Post-Nom : {membre.post_nom}\n"
+        f"Prénom : {membre.prenom}\n"
+        f"Catégorie : {membre.categorie}\n"
+        f"Date d'enregistrement : {date_enregistrement}\n"
+        "À vérifier l’authenticité sur www.renemico.com"
+    )
+
+
+def contenu_qrcode(membre):
+    """Texte encodé dans le QR code de la carte : charge signée."""
+    vignette = lire_derive(membre.photo, 'vignette') if membre.photo else None
+    try:
+        return encoder_charge(membre.code, membre.categorie, membre.date_expiration, photo=vignette)
+    except ChargeInvalide:
+        return texte_qrcode(membre)
+
+
+def _empreinte(contenu):
+    return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+
+def empreinte_qrcode(membre):
+    return _empreinte(contenu_qrcode(membre))
+
+
+def nom_fichier_qrcode(membre):
+    return f'qrcode_{membre.pk}.png'
+
+
+def image_qrcode(contenu, size=200):
+    """Octets PNG du QR code de `contenu`, redimensionné à size x size."""
+    # Charge courte (mode alphanumérique) : la correction M reste en version 2 ou 3
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(contenu)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    img = img.resize((size, size))
+
+    image_stream = BytesIO()
+    img.save(image_stream, format='PNG')
+    return image_stream.getvalue()
+
+
+class QrCodeVectoriel(Flowable):
+    """
+    QR code de `contenu` en chemins vectoriels, carré de `taille` points
+    (marge blanche de 4 modules comprise). Flowable platypus, ou placé sur
+    un canvas par drawOn(c, x, y).
+
+    Mêmes modules que le PNG (bibliothèque qrcode, sans rendu d'image) ;
+    les modules sombres contigus d'une ligne forment un seul rectangle et
+    le tout est rempli en une seule opération.
+    """
+
+    MARGE = 4  # modules
+    NIVEAUX = {
+        'L': qrcode.constants.ERROR_CORRECT_L,
+        'M': qrcode.constants.ERROR_CORRECT_M,
+        'Q': qrcode.constants.ERROR_CORRECT_Q,
+        'H': qrcode.constants.ERROR_CORRECT_H,
+    }
+
+    def __init__(self, contenu, taille, niveau='M'):
+        super().__init__()
+        self.taille = taille
+        qr = qrcode.QRCode(error_correction=self.NIVEAUX[niveau], border=0)
+        qr.add_data(contenu)
+        qr.make(fit=True)
+        self.modules = qr.get_matrix()
+
+    def wrap(self, largeur_disponible, hauteur_disponible):
+        return self.taille, self.taille
+
+    def draw(self):
+        module = self.taille / (len(self.modules) + 2*self.MARGE)
+        chemin = self.canv.beginPath()
+        for rang, ligne in enumerate(self.modules):
+            y = self.taille - (rang + self.MARGE + 1)*module
+            colonne = self.MARGE
+            for sombre, groupe in itertools.groupby(ligne):
+                longueur = len(list(groupe))
+                if sombre:
+                    chemin.rect(colonne*module, y, longueur*module, module)
+                colonne += longueur
+
+        # Fond blanc : la marge reste lisible sur un filigrane
+        self.canv.setFillColor(white)
+        self.canv.rect(0, 0, self.taille, self.taille, stroke=0, fill=1)
+        self.canv.setFillColor(black)
+        self.canv.drawPath(chemin, stroke=0, fill=1)
+
+
+def enregistrer_png(membre, png):
+    """
+    Écrit `png` à la place du QR code actuel de `membre` et met à jour le nom
+    sur l'instance (sans toucher à la base). Retourne le nom du fichier.
+    """
+    field = membre.qrcode.field
+    stockage = membre.qrcode.storage
+    nom = field.generate_filename(membre, nom_fichier_qrcode(membre))
+
+    # Stockage classique : réécriture sur place, le nom du fichier ne change pas
+    if not isinstance(stockage, StockageContenu) and stockage.exists(nom):
+        stockage.delete(nom)
+    nom = stockage.save(nom, ContentFile(png))
+
+    # Ancien QR code (le contenu porte le code du membre : jamais partagé)
+    ancien = membre.qrcode.name
+    if ancien and ancien != nom and stockage.exists(ancien):
+        stockage.delete(ancien)
+
+    membre.qrcode.name = nom
+    return nom
+
+
+def ecrire_qrcode(membre, png, empreinte):
+    """
+    Écrit `png` et enregistre nom + empreinte par un UPDATE ciblé
+    (ni save() complet, ni signaux).
+    """
+    from .models import Membre
+
+    nom = enregistrer_png(membre, png)
+    Membre.objects.filter(pk=membre.pk).update(qrcode=nom, qrcode_empreinte=empreinte)
+    membre.qrcode_empreinte = empreinte
+
+
+def mettre_a_jour_qrcode(membre, forcer=False):
+    """
+    Régénère le QR code de `membre` (déjà enregistré) si son contenu a changé
+    ou si le fichier manque. Retourne True si le fichier a été réécrit.
+    """
+    # Contenu calculé une fois (signature + empreinte de la vignette) : il
+    # sert à la fois à l'empreinte et à l'image
+    contenu = contenu_qrcode(membre)
+    empreinte = _empreinte(contenu)
+    if (
+        not forcer
+        and membre.qrcode
+        and membre.qrcode_empreinte == empreinte
+        and membre.qrcode.storage.exists(membre.qrcode.name)
+    ):
+        return False
+
+    ecrire_qrcode(membre, image_qrcode(contenu), empreinte)
+    return True
+
+
+def _image_qrcode_worker(membre_id, contenu):
+    return membre_id, image_qrcode(contenu)
+
+
+def generer_qrcodes_lot(membres, workers=None, taille_lot=500, pool=None):
+    """
+    QR codes de nombreux membres déjà enregistrés (import en masse).
+
+    L'encodage PNG est réparti sur un pool de processus (`pool` fourni par
+    l'appelant, sinon créé pour l'appel) ; les fichiers sont écrits et les
+    noms / empreintes enregistrés par bulk_update dans le processus courant.
+    """
+    from .cartes import WORKERS_PAR_DEFAUT, _pool
+    from .models import Membre
+
+    workers = workers or WORKERS_PAR_DEFAUT
+    membres = {m.pk: m for m in membres}
+    contenus = {pk: contenu_qrcode(m) for pk, m in membres.items()}
+
+    if pool is not None and len(contenus) > 1:
+        pngs = dict(pool.map(_image_qrcode_worker, contenus.keys(), contenus.values(), chunksize=50))
+    elif workers > 1 and len(contenus) > 1:
+        with _pool(workers) as pool:
+            pngs = dict(pool.map(_image_qrcode_worker, contenus.keys(), contenus.values(), chunksize=50))
+    else:
+        pngs = {pk: image_qrcode(contenu) for pk, contenu in contenus.items()}
+
+    for pk, png in pngs.items():
+        membre = membres[pk]
+        enregistrer_png(membre, png)
+        membre.qrcode_empreinte = _empreinte(contenus[pk])
+
+    Membre.objects.bulk_update(membres.values(), ['qrcode', 'qrcode_empreinte'], batch_size=taille_lot)
@@ -0,0 +1,146 @@
+# identification/recherche.py
+"""
+Recherche plein texte des membres.
+
+Sous SQLite, la recherche passe par la table virtuelle FTS5
+`identification_membre_fts` (créée par la migration 0003), maintenue à jour
+par des triggers à chaque INSERT / UPDATE / DELETE sur `identification_membre`.
+Sur un autre moteur, on retombe sur les filtres `icontains` d'origine.
+
+SQLite reconstruit la table des membres lors de certaines migrations
+(ALTER TABLE émulé), ce qui supprime les triggers : `installer_index_fts`
+est donc aussi rappelée après chaque `migrate` (voir apps.py).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+TABLE_FTS = 'identification_membre_fts'
+
+# Champs indexés (même liste que l'ancienne recherche icontains)
+CHAMPS_RECHERCHE = ['nom', 'post_nom', 'prenom', 'code', 'province', 'categorie', 'statut']
+
+
+_COLONNES = ', '.join(CHAMPS_RECHERCHE)
+_NOUVELLES = ', '.join(f'new.{c}' for c in CHAMPS_RECHERCHE)
+_ANCIENNES = ', '.join(f'old.{c}' for c in CHAMPS_RECHERCHE)
+
+SQL_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE_FTS} USING fts5(
+        {_COLONNES},
+        content='identification_membre',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+"""
+
+SQL_TRIGGERS = {
+    f'{TABLE_FTS}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_ai AFTER INSERT ON identification_membre BEGIN
+            INSERT INTO {TABLE_FTS}(rowid, {_COLONNES}) VALUES (new.id, {_NOUVELLES});
+        END
+    """,
+    f'{TABLE_FTS}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_ad AFTER DELETE ON identification_membre BEGIN
+            INSERT INTO {TABLE_FTS}({TABLE_FTS}, rowid, {_COLONNES}) VALUES ('delete', old.id, {_ANCIENNES});
+        END
+    """,
+    f'{TABLE_FTS}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_au AFTER UPDATE OF {_COLONNES} ON identification_membre BEGIN
+            INSERT INTO {TABLE_FTS}({TABLE_FTS}, rowid, {_COLONNES}) VALUES ('delete', old.id, {_ANCIENNES});
+            INSERT INTO {TABLE_FTS}(rowid, {_COLONNES}) VALUES (new.id, {_NOUVELLES});
+        END
+    """,
+}
+
+
+def fts_disponible(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def installer_index_fts(conn=None):
+    """
+    Crée la table FTS5 et ses triggers s'ils manquent (idempotent).
+
+    Si quelque chose a dû être (re)créé, l'index est reconstruit pour
+    rattraper les écritures faites pendant que les triggers étaient absents.
+    """
+    conn = conn or connection
+    if not fts_disponible(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s OR name IN (%s, %s, %s)",
+            [TABLE_FTS, *SQL_TRIGGERS],
+        )
+        existants = {nom for (nom,) in cursor.fetchall()}
+        if existants >= {TABLE_FTS, *SQL_TRIGGERS}:
+            return
+        cursor.execute(SQL_TABLE)
+        for sql in SQL_TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {TABLE_FTS}({TABLE_FTS}) VALUES('rebuild')")
+
+
+def supprimer_index_fts(conn=None):
+    conn = conn or connection
+    if not fts_disponible(conn):
+        return
+    with conn.cursor() as cursor:
+        for nom in SQL_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nom}")
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE_FTS}")
+
+
+def construire_requete_fts(terme):
+    """
+    Transforme la saisie utilisateur en requête FTS5 sûre.
+
+    Chaque mot devient un préfixe entre guillemets (`"kabi"*`) et tous les mots
+    doivent être présents : « kabi lua » trouve « KABILA » de « LUALABA ».
+    """
+    mots = re.findall(r'\w+', terme or '')
+    return ' '.join(f'"{mot}"*' for mot in mots)
+
+
+def _recherche_icontains(queryset, terme):
+    filtre = Q()
+    for champ in CHAMPS_RECHERCHE:
+        filtre |= Q(**{f'{champ}__icontains': terme})
+    return queryset.filter(filtre)
+
+
+def rechercher_membres(queryset, terme, classer=False):
+    """
+    Filtre `queryset` sur `terme`.
+
+    Si `classer` est vrai, les résultats sont triés par pertinence (bm25),
+    sinon l'ordre du queryset est conservé (utile pour la pagination).
+    """
+    terme = (terme or '').strip()
+    if not terme:
+        return queryset
+    if not fts_disponible():
+        return _recherche_icontains(queryset, terme)
+
+    requete = construire_requete_fts(terme)
+    if not requete:
+        return queryset
+
+    resultats = queryset.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {TABLE_FTS} WHERE {TABLE_FTS} MATCH %s', [requete])
+    )
+    if classer:
+        # Rang bm25 (plus petit = plus pertinent), lu par rowid pour chaque membre retenu
+        table = queryset.model._meta.db_table
+        rang = RawSQL(
+            f'SELECT rank FROM {TABLE_FTS} WHERE {TABLE_FTS} MATCH %s AND rowid = {table}.id',
+            [requete],
+        )
+        return resultats.annotate(rang=rang).order_by('rang')
+    return resultats
+
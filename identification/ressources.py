@@ -0,0 +1,122 @@
+# identification/ressources.py
+"""
+Registre des images statiques utilisées dans les PDF (cartes, factures, historiques).
+
+Chaque image est trouvée (finders), décodée, redimensionnée à sa taille
+d'impression maximale et, pour le filigrane, rendue transparente UNE seule
+fois par processus. Les vues récupèrent ensuite un ImageReader prêt à
+l'emploi : plus de recherche de fichier ni de travail PIL par requête.
+
+Le fichier source est re-vérifié (date de modification) au plus toutes les
+`PDF_RESSOURCES_VERIFICATION` secondes : une image remplacée est rechargée
+sans redémarrer le serveur.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from PIL import Image, ImageEnhance
+from reportlab.lib.utils import ImageReader
+
+
+# Intervalle (secondes) entre deux vérifications de la date de modification
+INTERVALLE_VERIFICATION = getattr(settings, 'PDF_RESSOURCES_VERIFICATION', 60)
+
+
+def _filigrane(img):
+    """Logo à 12 % d'opacité pour le fond des cartes."""
+    img = img.convert("RGBA")
+    enhancer = ImageEnhance.Brightness(img.split()[3])  # canal alpha
+    img.putalpha(enhancer.enhance(0.12))
+    return img
+
+
+# nom -> (fichier statique, plus grand côté en pixels, traitement éventuel)
+# Le plus grand côté correspond à ~300 dpi à la taille où l'image est imprimée.
+RESSOURCES = {
+    'logo1': ('images/logo1.png', 300, None),      # en-tête des factures (2,5 cm)
+    'logo2': ('images/logo2.png', 600, None),      # en-tête des cartes (1,9 in)
+    'filigrane': ('images/logo2.png', 600, _filigrane),
+    'pca': ('images/pca.png', 750, None),          # signature (2,5 in)
+    'am': ('images/am.png', 540, None),            # armoiries (1,8 in)
+    'ap': ('images/ap.png', 3510, None),           # bandeau du verso (11,7 in)
+}
+
+
+class RessourceImage:
+    """Image prête pour ReportLab : ImageReader décodé + dimensions d'origine."""
+
+    def __init__(self, chemin, mtime, reader, largeur, hauteur):
+        self.chemin = chemin
+        self.mtime = mtime
+        self.reader = reader
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.verifie_le = time.monotonic()
+
+    @property
+    def ratio(self):
+        """Hauteur / largeur, pour conserver les proportions à l'impression."""
+        return self.hauteur / self.largeur
+
+
+class RegistreRessources:
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        self._ressources = {}
+        self._verrou = threading.Lock()
+
+    def _charger(self, nom):
+        fichier, cote_max, traitement = self.definitions[nom]
+        chemin = finders.find(fichier)
+        if not (chemin and os.path.exists(chemin)):
+            return None
+
+        with Image.open(chemin) as img:
+            img.load()
+        largeur, hauteur = img.size
+        if max(img.size) > cote_max:
+            img.thumbnail((cote_max, cote_max), Image.Resampling.LANCZOS)
+        if traitement:
+            img = traitement(img)
+
+        reader = ImageReader(img)
+        reader.getRGBData()  # décodage (et canal alpha) mis en cache dans le reader
+        return RessourceImage(chemin, os.path.getmtime(chemin), reader, largeur, hauteur)
+
+    def _a_jour(self, ressource):
+        if time.monotonic() - ressource.verifie_le < INTERVALLE_VERIFICATION:
+            return True
+        try:
+            a_jour = os.path.getmtime(ressource.chemin) == ressource.mtime
+        except OSError:
+            a_jour = False
+        ressource.verifie_le = time.monotonic()
+        return a_jour
+
+    def obtenir(self, nom):
+        """RessourceImage pour `nom`, ou None si le fichier est introuvable."""
+        ressource = self._ressources.get(nom)
+        if ressource is not None and self._a_jour(ressource):
+            return ressource
+        with self._verrou:
+            ressource = self._charger(nom)
+            self._ressources[nom] = ressource
+        return ressource
+
+    def reader(self, nom):
+        ressource = self.obtenir(nom)
+        return ressource.reader if ressource else None
+
+    def precharger(self):
+        for nom in self.definitions:
+            try:
+                self.obtenir(nom)
+            except Exception as e:
+                print(f"❌ Ressource PDF « {nom} » non chargée :", e)
+
+
+registre = RegistreRessources(RESSOURCES)
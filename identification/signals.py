@@ -0,0 +1,143 @@
+# identification/signals.py
+"""
+Maintien incrémental de StatistiquesIdentification.
+
+Chaque enregistrement / suppression de Membre, Duplicata, Contribution ou
+Operation applique la différence entre l'état avant et l'état après.
+Les opérations en masse (QuerySet.update, bulk_create) ne déclenchent pas
+de signaux : relancer `reconstruire_statistiques` après ce type d'opération.
+
+Les mêmes signaux retirent du cache la fiche de vérification du membre
+(voir verification.py).
+"""
+from decimal import Decimal
+
+from django.db.models import Count
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from finance.models import Contribution, Operation
+from .models import Membre, Duplicata, StatistiquesIdentification
+from .statistiques import PK, appliquer_deltas, etat_carte
+from .verification import oublier
+
+
+CHAMP_CARTE = {'valide': 'cartes_valides', 'expiree': 'cartes_expirees'}
+CHAMP_STATUT = {'actif': 'membres_actifs', 'inactif': 'membres_inactifs'}
+CHAMP_OPERATION = {'ENTREE': 'total_entrees', 'SORTIE': 'total_sorties'}
+
+
+def _ajouter(deltas, champ, valeur):
+    if champ:
+        deltas[champ] = deltas.get(champ, 0) + valeur
+
+
+def _etat_membre(statut, carte_renouvelee, date_expiration, carte_expiree):
+    # Drapeau stocké, comme basculer_jour : les deltas et le recomptage quotidien
+    # classent chaque carte de la même façon
+    return {
+        CHAMP_STATUT.get(statut): 1,
+        CHAMP_CARTE.get(etat_carte(carte_expiree, date_expiration)): 1,
+        'cartes_renouvelees': 1 if carte_renouvelee else 0,
+    }
+
+
+def _appliquer_etats(avant, apres):
+    deltas = {}
+    for champ, valeur in (avant or {}).items():
+        _ajouter(deltas, champ, -valeur)
+    for champ, valeur in (apres or {}).items():
+        _ajouter(deltas, champ, valeur)
+    appliquer_deltas(**deltas)
+
+
+def _ancienne_version(sender, instance, champs):
+    if instance.pk is None:
+        return None
+    return sender.objects.filter(pk=instance.pk).values(*champs).first()
+
+
+# --- Membre ------------------------------------------------------------------
+
+CHAMPS_MEMBRE = ('statut', 'carte_renouvelee', 'date_expiration', 'carte_expiree')
+
+
+@receiver(pre_save, sender=Membre)
+def membre_avant_enregistrement(sender, instance, **kwargs):
+    ancien = _ancienne_version(sender, instance, CHAMPS_MEMBRE)
+    instance._stats_avant = _etat_membre(**ancien) if ancien else None
+
+
+@receiver(post_save, sender=Membre)
+def membre_enregistre(sender, instance, **kwargs):
+    apres = _etat_membre(instance.statut, instance.carte_renouvelee, instance.date_expiration, instance.carte_expiree)
+    _appliquer_etats(getattr(instance, '_stats_avant', None), apres)
+    oublier(instance.code)
+
+
+@receiver(post_delete, sender=Membre)
+def membre_supprime(sender, instance, **kwargs):
+    avant = _etat_membre(instance.statut, instance.carte_renouvelee, instance.date_expiration, instance.carte_expiree)
+    _appliquer_etats(avant, None)
+    oublier(instance.code)
+
+
+# --- Duplicata ---------------------------------------------------------------
+# « Membres ayant au moins un duplicata » : recompté sur la table des
+# duplicatas (petite, indexée sur membre_id), ce qui reste exact même
+# lors des suppressions en cascade.
+
+def _recompter_duplicatas():
+    total = Duplicata.objects.aggregate(n=Count('membre', distinct=True))['n']
+    StatistiquesIdentification.objects.filter(pk=PK).update(membres_avec_duplicata=total)
+
+
+@receiver(post_save, sender=Duplicata)
+def duplicata_enregistre(sender, instance, **kwargs):
+    _recompter_duplicatas()
+
+
+@receiver(post_delete, sender=Duplicata)
+def duplicata_supprime(sender, instance, **kwargs):
+    _recompter_duplicatas()
+
+
+# --- Contribution ------------------------------------------------------------
+
+@receiver(pre_save, sender=Contribution)
+def contribution_avant_enregistrement(sender, instance, **kwargs):
+    ancien = _ancienne_version(sender, instance, ('montant',))
+    instance._stats_avant = {'total_contributions': ancien['montant'], 'nombre_contributions': 1} if ancien else None
+
+
+@receiver(post_save, sender=Contribution)
+def contribution_enregistree(sender, instance, **kwargs):
+    apres = {'total_contributions': instance.montant, 'nombre_contributions': 1}
+    _appliquer_etats(getattr(instance, '_stats_avant', None), apres)
+
+
+@receiver(post_delete, sender=Contribution)
+def contribution_supprimee(sender, instance, **kwargs):
+    _appliquer_etats({'total_contributions': instance.montant, 'nombre_contributions': 1}, None)
+
+
+# --- Operation ---------------------------------------------------------------
+
+def _etat_operation(type_operation, montant):
+    return {CHAMP_OPERATION.get(type_operation): Decimal(montant)}
+
+
+@receiver(pre_save, sender=Operation)
+def operation_avant_enregistrement(sender, instance, **kwargs):
+    ancien = _ancienne_version(sender, instance, ('type_operation', 'montant'))
+    instance._stats_avant = _etat_operation(**ancien) if ancien else None
+
+
+@receiver(post_save, sender=Operation)
+def operation_enregistree(sender, instance, **kwargs):
+    _appliquer_etats(getattr(instance, '_stats_avant', None), _etat_operation(instance.type_operation, instance.montant))
+
+
+@receiver(post_delete, sender=Operation)
+def operation_supprimee(sender, instance, **kwargs):
+    _appliquer_etats(_etat_operation(instance.type_operation, instance.montant), None)
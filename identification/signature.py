@@ -0,0 +1,214 @@
+# identification/signature.py
+"""
+Contenu signé et compact des QR codes, vérifiable hors ligne.
+
+Le QR code porte `RNM:` suivi d'une charge binaire encodée en base32
+(caractères du mode alphanumérique des QR codes : ~31 à 44 caractères,
+version 2 ou 3 au lieu d'une version 9 pour l'ancien texte) :
+
+    octet 0      version (4 bits) | numéro de clé (4 bits)
+    octet 1      catégorie (6 bits) | 0x80 si une empreinte de photo suit
+    octets 2-6   code membre (8 caractères base32 de Crockford, 40 bits)
+    octets 7-8   date d'expiration (jours depuis le 01/01/2000, 0xFFFF : aucune)
+    [8 octets]   empreinte SHA-256 tronquée de la vignette du membre
+    10 octets    signature HMAC-SHA256 tronquée de tout ce qui précède
+
+La vérification (`verifier_charge`) ne consulte pas la base : seule la clé
+est nécessaire. Les clés sont numérotées (QR_CLES_SIGNATURE) pour permettre
+leur renouvellement : les cartes signées avec une ancienne clé restent
+vérifiables tant que celle-ci est conservée.
+
+La signature est symétrique (HMAC) : qui peut vérifier une carte peut aussi
+en signer. La vérification se fait donc côté serveur uniquement (vue de
+vérification, `manage.py verifier_qrcode` sur le serveur) ; la clé n'est
+jamais remise à un poste de contrôle. Une signature asymétrique (Ed25519,
+64 octets) doublerait la taille de la charge et donc la version du QR code.
+"""
+import base64
+import hashlib
+import hmac
+import struct
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+
+from .codes import ALPHABET as ALPHABET_CODE
+
+
+VERSION = 1
+PREFIXE = 'RNM:'
+EPOQUE = date(2000, 1, 1)
+SANS_EXPIRATION = 0xFFFF
+
+TAILLE_SIGNATURE = 10
+TAILLE_EMPREINTE_PHOTO = 8
+PHOTO_PRESENTE = 0x80
+
+# Ordre figé (l'indice est dans la charge) : ajouter les catégories en fin de liste
+CATEGORIES = [
+    'Membre Honneur',
+    'Membre Effectif',
+    'Membre Fondateur',
+    'Membre Co-fondateur',
+]
+
+_VALEURS_CODE = {c: i for i, c in enumerate(ALPHABET_CODE)}
+
+_ENTETE = struct.Struct('>BB5sH')
+
+
+class ChargeInvalide(ValueError):
+    pass
+
+
+class CarteSignee:
+    """Contenu d'un QR code dont la signature a été vérifiée."""
+
+    def __init__(self, code, categorie, date_expiration, empreinte_photo, cle):
+        self.code = code
+        self.categorie = categorie
+        self.date_expiration = date_expiration
+        self.empreinte_photo = empreinte_photo
+        self.cle = cle
+
+    def expiree(self, aujourd_hui=None):
+        aujourd_hui = aujourd_hui or date.today()
+        return self.date_expiration is not None and self.date_expiration < aujourd_hui
+
+    def photo_correspond(self, contenu):
+        """True si `contenu` (octets de la vignette) est la photo signée."""
+        return self.empreinte_photo is not None and hmac.compare_digest(
+            self.empreinte_photo, empreinte_photo(contenu)
+        )
+
+
+#################################################################################################
+# Clés
+
+def cles_signature():
+    """{numéro: clé (octets)} : QR_CLES_SIGNATURE, ou une clé dérivée de SECRET_KEY."""
+    cles = getattr(settings, 'QR_CLES_SIGNATURE', None)
+    if not cles:
+        derivee = hmac.new(settings.SECRET_KEY.encode('utf-8'), b'renemico-qrcode', hashlib.sha256).digest()
+        return {0: derivee}
+    return {int(numero): cle.encode('utf-8') if isinstance(cle, str) else cle for numero, cle in cles.items()}
+
+
+def cle_active():
+    cles = cles_signature()
+    numero = getattr(settings, 'QR_CLE_ACTIVE', max(cles))
+    return numero, cles[numero]
+
+
+def _signature(cle, donnees):
+    return hmac.new(cle, donnees, hashlib.sha256).digest()[:TAILLE_SIGNATURE]
+
+
+#################################################################################################
+# Encodage
+
+def empreinte_photo(contenu):
+    return hashlib.sha256(contenu).digest()[:TAILLE_EMPREINTE_PHOTO]
+
+
+def _code_binaire(code):
+    valeur = 0
+    for caractere in code.upper():
+        if caractere not in _VALEURS_CODE:
+            raise ChargeInvalide(f"Code non encodable : {code}")
+        valeur = valeur * 32 + _VALEURS_CODE[caractere]
+    if len(code) != 8:
+        raise ChargeInvalide(f"Code non encodable : {code}")
+    return valeur.to_bytes(5, 'big')
+
+
+def _code_texte(octets):
+    valeur = int.from_bytes(octets, 'big')
+    caracteres = []
+    for _ in range(8):
+        valeur, reste = divmod(valeur, 32)
+        caracteres.append(ALPHABET_CODE[reste])
+    return ''.join(reversed(caracteres))
+
+
+def encoder_charge(code, categorie, date_expiration, photo=None, cle=None, numero_cle=None):
+    """
+    Texte signé à placer dans le QR code.
+
+    `photo` : octets de la vignette (facultatif). `cle` / `numero_cle` : clé
+    de signature, la clé active par défaut.
+    """
+    if cle is None:
+        numero_cle, cle = cle_active()
+    if not 0 <= numero_cle <= 15:
+        raise ChargeInvalide("Le numéro de clé doit être compris entre 0 et 15")
+
+    try:
+        indice = CATEGORIES.index(categorie)
+    except ValueError:
+        raise ChargeInvalide(f"Catégorie inconnue : {categorie}")
+
+    jours = SANS_EXPIRATION
+    if date_expiration:
+        if isinstance(date_expiration, datetime):
+            date_expiration = date_expiration.date()
+        jours = (date_expiration - EPOQUE).days
+        if not 0 <= jours < SANS_EXPIRATION:
+            raise ChargeInvalide(f"Date d'expiration hors limites : {date_expiration}")
+
+    drapeaux = indice | (PHOTO_PRESENTE if photo else 0)
+    donnees = _ENTETE.pack((VERSION << 4) | numero_cle, drapeaux, _code_binaire(code), jours)
+    if photo:
+        donnees += empreinte_photo(photo)
+    donnees += _signature(cle, donnees)
+    return PREFIXE + base64.b32encode(donnees).decode('ascii').rstrip('=')
+
+
+def verifier_charge(texte, cles=None):
+    """
+    CarteSignee décodée de `texte` (contenu lu dans le QR code).
+
+    Lève ChargeInvalide si le texte n'est pas une charge, si la clé est
+    inconnue ou si la signature ne correspond pas. Aucun accès à la base.
+    """
+    texte = (texte or '').strip().upper()
+    if not texte.startswith(PREFIXE):
+        raise ChargeInvalide("Ce QR code n'est pas une carte RENEMICO signée")
+    encode = texte[len(PREFIXE):]
+    try:
+        donnees = base64.b32decode(encode + '=' * (-len(encode) % 8))
+    except (ValueError, TypeError):
+        raise ChargeInvalide("Charge illisible")
+    # Bits de remplissage non nuls : une seule écriture valable par charge
+    if base64.b32encode(donnees).decode('ascii').rstrip('=') != encode:
+        raise ChargeInvalide("Charge illisible")
+
+    if len(donnees) < _ENTETE.size + TAILLE_SIGNATURE:
+        raise ChargeInvalide("Charge tronquée")
+    version_cle, drapeaux, code, jours = _ENTETE.unpack_from(donnees)
+    if version_cle >> 4 != VERSION:
+        raise ChargeInvalide(f"Version de charge non prise en charge : {version_cle >> 4}")
+
+    avec_photo = bool(drapeaux & PHOTO_PRESENTE)
+    attendu = _ENTETE.size + (TAILLE_EMPREINTE_PHOTO if avec_photo else 0) + TAILLE_SIGNATURE
+    if len(donnees) != attendu:
+        raise ChargeInvalide("Charge tronquée")
+
+    numero_cle = version_cle & 0x0F
+    cle = (cles if cles is not None else cles_signature()).get(numero_cle)
+    if cle is None:
+        raise ChargeInvalide(f"Clé de signature inconnue : {numero_cle}")
+    signe, signature = donnees[:-TAILLE_SIGNATURE], donnees[-TAILLE_SIGNATURE:]
+    if not hmac.compare_digest(signature, _signature(cle, signe)):
+        raise ChargeInvalide("Signature invalide : carte falsifiée ou modifiée")
+
+    indice = drapeaux & 0x3F
+    if indice >= len(CATEGORIES):
+        raise ChargeInvalide(f"Catégorie inconnue : {indice}")
+    return CarteSignee(
+        code=_code_texte(code),
+        categorie=CATEGORIES[indice],
+        date_expiration=None if jours == SANS_EXPIRATION else EPOQUE + timedelta(days=jours),
+        empreinte_photo=signe[_ENTETE.size:] if avec_photo else None,
+        cle=numero_cle,
+    )
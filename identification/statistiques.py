@@ -0,0 +1,110 @@
+# identification/statistiques.py
+"""
+Lecture et maintenance de la table StatistiquesIdentification.
+
+- obtenir_statistiques() : lecture d'une ligne (+ bascule quotidienne)
+- reconstruire_statistiques() : recalcul complet depuis les tables sources
+- appliquer_deltas() : incréments atomiques (F()) utilisés par les signaux
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Membre, StatistiquesIdentification
+
+
+PK = 1
+
+
+# Cartes valides / expirées : état précalculé (voir expiration.py), indexé
+Q_CARTE_VALIDE = Q(carte_expiree=False, date_expiration__isnull=False)
+Q_CARTE_EXPIREE = Q(carte_expiree=True)
+
+
+def etat_carte(carte_expiree, date_expiration):
+    """'valide', 'expiree' ou None, selon le drapeau stocké (comme Q_CARTE_*)."""
+    if carte_expiree:
+        return 'expiree'
+    return 'valide' if date_expiration else None
+
+
+def _compter_cartes():
+    return Membre.objects.aggregate(
+        cartes_valides=Count('id', filter=Q_CARTE_VALIDE),
+        cartes_expirees=Count('id', filter=Q_CARTE_EXPIREE),
+    )
+
+
+def reconstruire_statistiques():
+    """Recalcule toutes les statistiques à partir de zéro."""
+    from finance.models import Contribution, Operation
+
+    aujourd_hui = timezone.now().date()
+    valeurs = Membre.objects.aggregate(
+        membres_actifs=Count('id', filter=Q(statut='actif')),
+        membres_inactifs=Count('id', filter=Q(statut='inactif')),
+        cartes_valides=Count('id', filter=Q_CARTE_VALIDE),
+        cartes_expirees=Count('id', filter=Q_CARTE_EXPIREE),
+        cartes_renouvelees=Count('id', filter=Q(carte_renouvelee=True)),
+    )
+    valeurs['membres_avec_duplicata'] = Membre.objects.filter(duplicata_set__isnull=False).distinct().count()
+
+    contributions = Contribution.objects.aggregate(total=Sum('montant'), nombre=Count('id'))
+    valeurs['total_contributions'] = contributions['total'] or 0
+    valeurs['nombre_contributions'] = contributions['nombre']
+
+    operations = Operation.objects.aggregate(
+        entrees=Sum('montant', filter=Q(type_operation='ENTREE')),
+        sorties=Sum('montant', filter=Q(type_operation='SORTIE')),
+    )
+    valeurs['total_entrees'] = operations['entrees'] or 0
+    valeurs['total_sorties'] = operations['sorties'] or 0
+    valeurs['date_calcul'] = aujourd_hui
+
+    stats, _ = StatistiquesIdentification.objects.update_or_create(pk=PK, defaults=valeurs)
+    return stats
+
+
+def basculer_jour(stats=None):
+    """
+    Recalcule les compteurs dépendant de la date si la ligne date d'un jour précédent.
+
+    Une seule requête d'agrégation, au plus une fois par jour. Les drapeaux
+    d'expiration sont tenus par le balayage quotidien (voir expiration.py),
+    jamais lancé depuis une requête web.
+    """
+    aujourd_hui = timezone.now().date()
+    if stats is not None and stats.date_calcul == aujourd_hui:
+        return stats
+    with transaction.atomic():
+        stats = StatistiquesIdentification.objects.select_for_update().filter(pk=PK).first()
+        if stats is None:
+            return reconstruire_statistiques()
+        if stats.date_calcul != aujourd_hui:
+            for champ, valeur in _compter_cartes().items():
+                setattr(stats, champ, valeur)
+            stats.date_calcul = aujourd_hui
+            stats.save(update_fields=['cartes_valides', 'cartes_expirees', 'date_calcul'])
+    return stats
+
+
+def obtenir_statistiques():
+    """Ligne de statistiques à jour (créée au premier appel)."""
+    stats = StatistiquesIdentification.objects.filter(pk=PK).first()
+    if stats is None:
+        return reconstruire_statistiques()
+    return basculer_jour(stats)
+
+
+def appliquer_deltas(**deltas):
+    """
+    Applique des incréments atomiques, ex. appliquer_deltas(membres_actifs=1).
+
+    Sans effet tant que la ligne n'existe pas : elle sera construite
+    complète au premier accès.
+    """
+    deltas = {champ: valeur for champ, valeur in deltas.items() if valeur}
+    if deltas:
+        StatistiquesIdentification.objects.filter(pk=PK).update(
+            **{champ: F(champ) + valeur for champ, valeur in deltas.items()}
+        )
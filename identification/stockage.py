@@ -0,0 +1,122 @@
+# identification/stockage.py
+"""
+Stockage des médias adressé par contenu.
+
+Un fichier envoyé dans `photos/` (ou `qrcodes/`, `users/photos/`...) est
+enregistré sous l'empreinte SHA-256 de son contenu, répartie sur deux
+niveaux de sous-répertoires :
+
+    photos/3f/a2/3fa2...c9.jpg
+
+- deux envois identiques donnent le même fichier (dédupliqué) ;
+- réenregistrer un contenu existant ne réécrit rien (idempotent) ;
+- aucun répertoire ne dépasse quelques milliers d'entrées (256 x 256).
+
+Les dérivés (photos/3f/a2/3fa2...c9_vignette.jpg) gardent un nom fixe,
+calculé à partir de celui de l'original : ils sont écrits par
+`ecrire_sous_nom`. Un fichier pouvant être partagé par plusieurs lignes, on
+ne le supprime qu'après avoir vérifié qu'il n'est plus référencé
+(`reference_ailleurs`) ; les fichiers qui ne le sont plus du tout (membres
+supprimés...) sont nettoyés par `python manage.py nettoyer_medias`.
+
+Les fichiers enregistrés avant ce stockage sont renommés (et dédupliqués)
+par `python manage.py adresser_medias`.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+
+
+TAILLE_LECTURE = 64 * 1024
+PREFIXE_TEMPORAIRE = '.ecriture-'
+
+_NOM_ADRESSE = re.compile(r'(^|/)([0-9a-f]{2})/([0-9a-f]{2})/\2\3[0-9a-f]{60}\.\w+$')
+
+
+def empreinte_contenu(contenu):
+    """SHA-256 hexadécimal d'un File Django (relu depuis le début, puis rembobiné)."""
+    empreinte = hashlib.sha256()
+    if hasattr(contenu, 'seek'):
+        contenu.seek(0)
+    for morceau in contenu.chunks(TAILLE_LECTURE):
+        empreinte.update(morceau.encode('utf-8') if isinstance(morceau, str) else morceau)
+    if hasattr(contenu, 'seek'):
+        contenu.seek(0)
+    return empreinte.hexdigest()
+
+
+def nom_adresse(nom, empreinte):
+    """photos/portrait.JPG + empreinte -> photos/3f/a2/3fa2....jpg"""
+    dossier = os.path.dirname(nom)
+    extension = os.path.splitext(nom)[1].lower()
+    return os.path.join(dossier, empreinte[:2], empreinte[2:4], empreinte + extension).replace(os.sep, '/')
+
+
+def est_adresse(nom):
+    """True si `nom` est déjà un nom adressé par contenu."""
+    return bool(nom and _NOM_ADRESSE.search(nom))
+
+
+class StockageContenu(FileSystemStorage):
+    """FileSystemStorage dont save() nomme les fichiers par l'empreinte de leur contenu."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        nom = nom_adresse(name, empreinte_contenu(content))
+        validate_file_name(nom, allow_relative_path=True)
+        if not self.exists(nom):
+            self._ecrire_atomique(nom, content)
+        # Contenu déjà présent : rien à écrire, même nom
+        return nom
+
+    def _ecrire_atomique(self, nom, content):
+        """
+        Fichier temporaire puis os.replace : deux processus qui enregistrent le
+        même contenu en même temps produisent le même fichier complet.
+        """
+        chemin = self.path(nom)
+        dossier = os.path.dirname(chemin)
+        os.makedirs(dossier, exist_ok=True)
+        fd, temporaire = tempfile.mkstemp(dir=dossier, prefix=PREFIXE_TEMPORAIRE)
+        try:
+            with os.fdopen(fd, 'wb') as sortie:
+                for morceau in content.chunks(TAILLE_LECTURE):
+                    sortie.write(morceau.encode('utf-8') if isinstance(morceau, str) else morceau)
+            os.chmod(temporaire, self.file_permissions_mode or 0o644)
+            os.replace(temporaire, chemin)
+        except BaseException:
+            if os.path.exists(temporaire):
+                os.unlink(temporaire)
+            raise
+
+    def enregistrer_sous(self, name, content):
+        """Écrit `content` sous le nom exact `name`, en remplaçant le fichier existant."""
+        if self.exists(name):
+            self.delete(name)
+        return self._save(name, content).replace('\\', '/')
+
+
+def ecrire_sous_nom(stockage, nom, contenu):
+    """Écrit `contenu` sous `nom` (dérivés), quel que soit le stockage."""
+    if isinstance(stockage, StockageContenu):
+        return stockage.enregistrer_sous(nom, contenu)
+    if stockage.exists(nom):
+        stockage.delete(nom)
+    return stockage.save(nom, contenu)
+
+
+def reference_ailleurs(modele, champ, nom, pk=None):
+    """True si une autre ligne de `modele` référence le fichier `nom` dans `champ`."""
+    lignes = modele.objects.filter(**{champ: nom})
+    if pk is not None:
+        lignes = lignes.exclude(pk=pk)
+    return lignes.exists()
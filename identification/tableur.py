@@ -0,0 +1,126 @@
+# identification/tableur.py
+"""
+Export XLSX à mémoire constante, avec openpyxl en écriture seule.
+
+- Les lignes sont parcourues UNE fois (queryset.iterator()) et ajoutées à un
+  classeur `Workbook(write_only=True)` : openpyxl les sérialise au fur et à
+  mesure dans un fichier temporaire, sans garder de cellules en mémoire.
+- La largeur des colonnes doit être fixée avant la première ligne : à moins
+  d'être donnée par l'appelant, elle est mesurée sur les TAILLE_ECHANTILLON
+  premières lignes, gardées en mémoire le temps de la mesure.
+- Le classeur terminé est enregistré dans un fichier temporaire, envoyé au
+  client par morceaux (FileResponse).
+
+La mémoire utilisée ne dépend pas du nombre de lignes.
+"""
+import re
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain, islice
+
+from django.http import FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+
+CONTENT_TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+LARGEUR_MAX = 60
+TAILLE_ECHANTILLON = 1000
+FORMAT_DATE = 'DD/MM/YYYY'
+FORMAT_DATE_HEURE = 'DD/MM/YYYY HH:MM'
+
+_NOM_FEUILLE_INTERDIT = re.compile(r'[\[\]:*?/\\]')
+
+
+def _texte(valeur):
+    """Texte affiché dans la cellule (mesure des largeurs)."""
+    if isinstance(valeur, datetime):
+        return valeur.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valeur, date):
+        return valeur.strftime('%d/%m/%Y')
+    return str(valeur)
+
+
+def _cellule(feuille, valeur):
+    """Valeur prête pour openpyxl : nombres tels quels, dates formatées, le reste en texte nettoyé."""
+    if valeur is None or isinstance(valeur, (bool, int, float, Decimal)):
+        return valeur
+    if isinstance(valeur, (date, datetime)):
+        if isinstance(valeur, datetime) and timezone.is_aware(valeur):
+            # Excel ne connaît pas les fuseaux : heure locale
+            valeur = timezone.make_naive(valeur)
+        cellule = WriteOnlyCell(feuille, valeur)
+        cellule.number_format = FORMAT_DATE_HEURE if isinstance(valeur, datetime) else FORMAT_DATE
+        return cellule
+    # Caractères de contrôle interdits en XML (openpyxl les refuse)
+    return ILLEGAL_CHARACTERS_RE.sub('', str(valeur))
+
+
+def _nom_feuille(nom):
+    nom = _NOM_FEUILLE_INTERDIT.sub(' ', nom).strip()[:31]
+    return nom or 'Feuille1'
+
+
+def _mesurer(entetes, echantillon):
+    """Largeur de chaque colonne : plus longue valeur + 2, plafonnée à LARGEUR_MAX."""
+    mesures = [len(str(e)) for e in entetes]
+    for valeurs in echantillon:
+        for i, valeur in enumerate(valeurs):
+            taille = len(_texte(valeur)) if valeur is not None else 0
+            if i >= len(mesures):
+                mesures.append(taille)
+            elif taille > mesures[i]:
+                mesures[i] = taille
+    return [min(m + 2, LARGEUR_MAX) for m in mesures]
+
+
+def ecrire_xlsx(fichier, feuille, entetes, lignes, largeurs=None):
+    """
+    Écrit dans `fichier` (chemin ou fichier binaire) un classeur XLSX d'une feuille.
+
+    `lignes` : itérable de séquences de valeurs (str, nombres, dates, None).
+    `largeurs` : None (mesurées sur les premières lignes), une largeur
+    commune, ou une liste de largeurs.
+    """
+    classeur = Workbook(write_only=True)
+    ws = classeur.create_sheet(_nom_feuille(feuille))
+
+    lignes = iter(lignes)
+    echantillon = []
+    if largeurs is None:
+        echantillon = [list(valeurs) for valeurs in islice(lignes, TAILLE_ECHANTILLON)]
+        largeurs = _mesurer(entetes, echantillon)
+    elif isinstance(largeurs, (int, float)):
+        largeurs = [largeurs] * len(entetes)
+    for i, largeur in enumerate(largeurs, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = largeur
+
+    gras = Font(bold=True)
+    ligne_entetes = []
+    for entete in entetes:
+        cellule = WriteOnlyCell(ws, entete)
+        cellule.font = gras
+        ligne_entetes.append(cellule)
+    ws.append(ligne_entetes)
+
+    for valeurs in chain(echantillon, lignes):
+        ws.append([_cellule(ws, valeur) for valeur in valeurs])
+    classeur.save(fichier)
+
+
+def reponse_xlsx(nom_fichier, feuille, entetes, lignes, largeurs=None):
+    """FileResponse d'un export XLSX (voir ecrire_xlsx), lu depuis un fichier temporaire."""
+    fichier = tempfile.TemporaryFile()
+    try:
+        ecrire_xlsx(fichier, feuille, entetes, lignes, largeurs)
+    except BaseException:
+        fichier.close()
+        raise
+    fichier.seek(0)
+    return FileResponse(fichier, as_attachment=True, filename=nom_fichier, content_type=CONTENT_TYPE_XLSX)
@@ -1,3 +1,465 @@
-from django.test import TestCase
+import os
+import re
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from openpyxl import load_workbook
+from PIL import Image
+
+from .codes import ALPHABET, allouer_code, allouer_codes, code_depuis_numero, code_valide
+from .expiration import balayer_expirations
+from .facettes import compte, compter_facettes
+from .models import Duplicata, Membre, SequenceCode, StatistiquesIdentification
+from .nettoyage import orphelins, references_medias
+from .recherche import rechercher_membres
+from .signature import ChargeInvalide, encoder_charge, verifier_charge
+from .statistiques import PK, obtenir_statistiques, reconstruire_statistiques
+from .tableur import ecrire_xlsx, reponse_xlsx
+from .verification import verifier
+
+
+SQLITE = connection.vendor == 'sqlite'
+
+# Ligne de plan « SCAN <table> » sans index : parcours complet de la table
+_SCAN_COMPLET = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+
+
+class PlanRequeteMixin:
+    """Assertions sur EXPLAIN QUERY PLAN (SQLite) des requêtes des vues."""
+
+    def plan(self, queryset):
+        return queryset.explain()
+
+    def assertSansScanComplet(self, queryset):
+        plan = self.plan(queryset)
+        scans = _SCAN_COMPLET.findall(plan)
+        self.assertFalse(scans, f"Parcours complet de {', '.join(scans)} :\n{queryset.query}\n{plan}")
+
+    def assertUtiliseIndex(self, queryset, index):
+        self.assertSansScanComplet(queryset)
+        plan = self.plan(queryset)
+        self.assertIn(index, plan, f"Index {index} non utilisé :\n{queryset.query}\n{plan}")
+
+
+@skipUnless(SQLITE, "Plans de requête écrits pour SQLite (EXPLAIN QUERY PLAN)")
+class IndexMembreTests(PlanRequeteMixin, TestCase):
+    """Les requêtes fréquentes sur les membres passent par un index."""
+
+    jour = date(2025, 1, 1)
+
+    def test_statut(self):
+        # Compteurs actifs / inactifs (finance.liste_membres_finance, facettes)
+        self.assertUtiliseIndex(Membre.objects.filter(statut='actif').order_by(), 'membre_statut_sexe_idx')
+
+    def test_statut_et_sexe(self):
+        qs = Membre.objects.filter(statut='actif', sexe='F').order_by()
+        self.assertUtiliseIndex(qs, 'membre_statut_sexe_idx')
+
+    def test_sexe(self):
+        self.assertUtiliseIndex(Membre.objects.filter(sexe='F').order_by(), 'membre_sexe_idx')
+
+    def test_province(self):
+        self.assertUtiliseIndex(Membre.objects.filter(province='KINSHASA').order_by(), 'membre_province_cat_idx')
+
+    def test_province_et_categorie(self):
+        qs = Membre.objects.filter(province='KINSHASA', categorie='Membre Effectif').order_by()
+        self.assertUtiliseIndex(qs, 'membre_province_cat_idx')
+
+    def test_categorie(self):
+        qs = Membre.objects.filter(categorie='Membre Effectif').order_by()
+        self.assertUtiliseIndex(qs, 'membre_categorie_idx')
+
+    def test_cartes_renouvelees(self):
+        # Vue cartes_renouvelees_liste : index partiel, déjà dans l'ordre voulu
+        qs = Membre.objects.filter(carte_renouvelee=True).order_by('-date_mise_a_jour')
+        self.assertUtiliseIndex(qs, 'membre_renouvelee_idx')
+        self.assertNotIn('TEMP B-TREE', self.plan(qs))
+
+    def test_cartes_expirees(self):
+        self.assertUtiliseIndex(Membre.objects.filter(carte_expiree=True).order_by(), 'membre_expirees_idx')
+
+    def test_balayage_nouvelles_expirations(self):
+        qs = Membre.objects.filter(carte_expiree=False, date_expiration__lt=self.jour)
+        self.assertUtiliseIndex(qs, 'membre_date_expiration_idx')
+
+    def test_echeance(self):
+        qs = Membre.objects.filter(echeance_expiration=30).order_by()
+        self.assertUtiliseIndex(qs, 'membre_echeance_idx')
+
+    def test_periode_enregistrement(self):
+        # Export des membres (?du / ?au)
+        qs = Membre.objects.filter(date_enregistrement__gte=self.jour, date_enregistrement__lte=self.jour)
+        self.assertUtiliseIndex(qs.order_by('id'), 'membre_date_enr_id_idx')
+
+    def test_pagination_par_curseur(self):
+        qs = Membre.objects.order_by('-date_enregistrement', 'id')
+        self.assertUtiliseIndex(qs[:21], 'membre_date_enr_id_idx')
+        suite = qs.filter(Q(date_enregistrement__lt=self.jour) | Q(date_enregistrement=self.jour, id__gt=1))
+        self.assertUtiliseIndex(suite[:21], 'membre_date_enr_id_idx')
+        self.assertNotIn('TEMP B-TREE', self.plan(suite[:21]))
+
+    def test_liste_duplicatas(self):
+        qs = Duplicata.objects.select_related('membre').order_by('-date_creation')
+        self.assertUtiliseIndex(qs, 'duplicata_date_creation_idx')
+
+
+def creer_membre(**champs):
+    valeurs = dict(
+        nom="Kabila", post_nom="Mwamba", prenom="Jean", sexe='M', province='LUALABA',
+        categorie='Membre Effectif', date_naissance=date(1980, 1, 1), lieu_naissance="Kolwezi",
+    )
+    valeurs.update(champs)
+    return Membre.objects.create(**valeurs)
+
+
+class BalayageExpirationTests(TestCase):
+    """Balayage quotidien (expiration.py) : statut des membres dont la carte est expirée."""
+
+    def setUp(self):
+        # Codes réattribués d'un test à l'autre : pas de fiche de vérification héritée
+        cache.clear()
+
+    def test_membre_deja_marque_expire_desactive(self):
+        # save() pose carte_expiree sans toucher au statut
+        membre = creer_membre(date_expiration=date(2020, 1, 1))
+        self.assertTrue(membre.carte_expiree)
+        self.assertEqual(membre.statut, 'actif')
+
+        balayage = balayer_expirations(date(2025, 1, 1))
+
+        membre.refresh_from_db()
+        self.assertEqual(membre.statut, 'inactif')
+        self.assertEqual(balayage.membres_desactives, 1)
+
+    def test_fiche_de_verification_oubliee(self):
+        membre = creer_membre(date_expiration=date(2024, 6, 1))
+        self.assertFalse(verifier(membre.code, date(2025, 1, 1))['valide'])
+
+        # Prolongation en masse (sans signaux) : la fiche en cache garde l'ancienne date
+        Membre.objects.filter(pk=membre.pk).update(date_expiration=date(2027, 6, 1))
+        balayer_expirations(date(2025, 1, 1))
+
+        resultat = verifier(membre.code, date(2025, 1, 1))
+        self.assertTrue(resultat['valide'])
+        self.assertEqual(resultat['date_expiration'], '2027-06-01')
+
+    def test_carte_valide_reste_active(self):
+        membre = creer_membre(date_expiration=date(2030, 1, 1))
+        balayer_expirations(date(2025, 1, 1))
+        membre.refresh_from_db()
+        self.assertEqual(membre.statut, 'actif')
+        self.assertFalse(membre.carte_expiree)
+
+
+class CompteursCartesTests(TestCase):
+    """Les deltas des signaux et la bascule quotidienne comptent les cartes de la même façon."""
+
+    CHAMPS = ('membres_actifs', 'membres_inactifs', 'cartes_valides', 'cartes_expirees')
+
+    def compteurs(self):
+        stats = StatistiquesIdentification.objects.get(pk=PK)
+        return {champ: getattr(stats, champ) for champ in self.CHAMPS}
+
+    def recompte(self):
+        stats = reconstruire_statistiques()
+        return {champ: getattr(stats, champ) for champ in self.CHAMPS}
+
+    def test_enregistrement_balayage_bascule(self):
+        aujourd_hui = timezone.now().date()
+        membre = creer_membre(date_expiration=aujourd_hui + timedelta(days=400))
+        creer_membre(nom="Tshala", date_expiration=aujourd_hui + timedelta(days=400))
+        # Carte expirée depuis le dernier balayage : le drapeau stocké dit encore « valide »
+        Membre.objects.filter(pk=membre.pk).update(date_expiration=aujourd_hui - timedelta(days=1))
+        reconstruire_statistiques()
+
+        membre = Membre.objects.get(pk=membre.pk)
+        membre.telephone = '0990000000'
+        membre.save()
+        enregistre = self.compteurs()
+        self.assertEqual(enregistre, self.recompte())
+        self.assertEqual(enregistre['cartes_expirees'], 1)
+
+        balayer_expirations(aujourd_hui)
+        self.assertEqual(self.compteurs(), self.recompte())
+
+        StatistiquesIdentification.objects.filter(pk=PK).update(date_calcul=aujourd_hui - timedelta(days=1))
+        bascule = obtenir_statistiques()
+        self.assertEqual({champ: getattr(bascule, champ) for champ in self.CHAMPS}, self.recompte())
+
+
+class NettoyageMediasTests(TestCase):
+    """Médias orphelins (nettoyage.py) : un fichier référencé n'est jamais signalé."""
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        self.racine = dossier.name
+        os.makedirs(os.path.join(self.racine, 'photos'))
+
+    def fichier(self, nom):
+        chemin = os.path.join(self.racine, nom)
+        with open(chemin, 'wb') as f:
+            f.write(b'x')
+        ancien = time.time() - 7 * 24 * 3600
+        os.utime(chemin, (ancien, ancien))
+
+    def orphelins(self):
+        return {nom for nom, _ in orphelins(self.racine, references_medias(), dossiers=['photos'])}
+
+    def test_original_nomme_comme_un_derive_conserve(self):
+        membre = creer_membre()
+        Membre.objects.filter(pk=membre.pk).update(photo='photos/photo_carte.jpg')
+        for nom in ('photos/photo_carte.jpg', 'photos/photo_carte_vignette.jpg', 'photos/perdue.jpg'):
+            self.fichier(nom)
+
+        # L'original et son dérivé sont conservés, seule la photo non référencée est orpheline
+        self.assertEqual(self.orphelins(), {'photos/perdue.jpg'})
+
+
+class PhotoDerivesTests(TestCase):
+    """URLs des photos (photos.py) : versionnées, résolues d'après Membre.photo_derives sans accès au stockage."""
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglages = override_settings(MEDIA_ROOT=dossier.name)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+    def creer_avec_photo(self):
+        contenu = BytesIO()
+        Image.new('RGB', (300, 400), (120, 80, 40)).save(contenu, 'JPEG')
+        membre = Membre(
+            nom="Kabila", post_nom="Mwamba", prenom="Jean", sexe='M', province='LUALABA',
+            categorie='Membre Effectif', date_naissance=date(1980, 1, 1), lieu_naissance="Kolwezi",
+        )
+        # Fichier non encore écrit, comme à l'envoi d'un formulaire
+        membre.photo = ContentFile(contenu.getvalue(), name='photo.jpg')
+        membre.save()
+        return Membre.objects.get(pk=membre.pk)
+
+    def taille_servie(self, url):
+        reponse = self.client.get(url)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertIn('immutable', reponse['Cache-Control'])
+        return Image.open(BytesIO(b''.join(reponse.streaming_content))).size
+
+    def test_derives_ecrits_a_l_enregistrement(self):
+        membre = self.creer_avec_photo()
+        self.assertTrue(membre.photo_derives)
+        with mock.patch.object(membre.photo.storage, 'exists', side_effect=AssertionError):
+            url = membre.photo_avatar_url
+        self.assertEqual(self.taille_servie(url), (100, 100))
+        self.assertEqual(self.taille_servie(membre.photo_url), (300, 400))
+
+    def test_photo_non_traitee_sert_l_original(self):
+        membre = self.creer_avec_photo()
+        Membre.objects.filter(pk=membre.pk).update(photo_derives=False)
+        membre.refresh_from_db()
+        self.assertEqual(self.taille_servie(membre.photo_avatar_url), (300, 400))
+
+    def test_version_inconnue_revalidee(self):
+        membre = self.creer_avec_photo()
+        reponse = self.client.get(membre.photo_avatar_url.split('&v=')[0] + '&v=perimee')
+        self.assertIn('no-cache', reponse['Cache-Control'])
+
+
+@override_settings(QR_CLES_SIGNATURE={0: 'ancienne-cle', 1: 'nouvelle-cle'}, QR_CLE_ACTIVE=1)
+class SignatureQrcodeTests(TestCase):
+    """Charge signée des QR codes (signature.py) : aller-retour, falsification, clés, expiration."""
+
+    def charge(self, **champs):
+        valeurs = dict(code='3899AH66', categorie='Membre Effectif', date_expiration=date(2027, 5, 31))
+        valeurs.update(champs)
+        return encoder_charge(**valeurs)
+
+    def test_aller_retour(self):
+        carte = verifier_charge(self.charge(photo=b'vignette'))
+        self.assertEqual(carte.code, '3899AH66')
+        self.assertEqual(carte.categorie, 'Membre Effectif')
+        self.assertEqual(carte.date_expiration, date(2027, 5, 31))
+        self.assertEqual(carte.cle, 1)
+        self.assertTrue(carte.photo_correspond(b'vignette'))
+        self.assertFalse(carte.photo_correspond(b'autre photo'))
+
+    def test_charge_modifiee_rejetee(self):
+        charge = self.charge()
+        for position in range(len('RNM:'), len(charge)):
+            remplacement = 'A' if charge[position] != 'A' else 'B'
+            falsifiee = charge[:position] + remplacement + charge[position + 1:]
+            with self.assertRaises(ChargeInvalide):
+                verifier_charge(falsifiee)
+
+    def test_renouvellement_de_cle(self):
+        ancienne = self.charge(cle=b'ancienne-cle', numero_cle=0)
+        self.assertEqual(verifier_charge(ancienne).cle, 0)
+        # Clé retirée de la configuration : les cartes qu'elle a signées sont refusées
+        with self.assertRaises(ChargeInvalide):
+            verifier_charge(ancienne, cles={1: b'nouvelle-cle'})
+        # Même numéro, autre clé : signature invalide
+        with self.assertRaises(ChargeInvalide):
+            verifier_charge(ancienne, cles={0: b'cle-compromise'})
+
+    def test_expiration(self):
+        carte = verifier_charge(self.charge())
+        self.assertFalse(carte.expiree(date(2027, 5, 31)))
+        self.assertTrue(carte.expiree(date(2027, 6, 1)))
+        self.assertFalse(verifier_charge(self.charge(date_expiration=None)).expiree())
+
+
+class TableurTests(TestCase):
+    """Exports XLSX (tableur.py) relus par openpyxl : texte échappé, dates, nombres, largeurs."""
+
+    def relire(self, lignes, **options):
+        sortie = BytesIO()
+        ecrire_xlsx(sortie, 'Membres: 2025/01', ['Nom', 'Date', 'Montant'], lignes, **options)
+        sortie.seek(0)
+        return load_workbook(sortie)
+
+    def test_valeurs(self):
+        heure = timezone.make_aware(datetime(2025, 3, 4, 10, 30))
+        classeur = self.relire([
+            ['<b>Kabila & fils</b> "RDC"', date(2025, 1, 31), 12],
+            ['Contrôle\x01\x1f', heure, Decimal('10.50')],
+            [None, None, True],
+        ])
+        self.assertEqual(classeur.sheetnames, ['Membres  2025 01'])
+        feuille = classeur.active
+        lignes = list(feuille.iter_rows(values_only=True))
+        self.assertEqual(lignes[0], ('Nom', 'Date', 'Montant'))
+        self.assertTrue(feuille['A1'].font.b)
+        self.assertEqual(lignes[1], ('<b>Kabila & fils</b> "RDC"', datetime(2025, 1, 31), 12))
+        self.assertEqual(feuille['B2'].number_format, 'DD/MM/YYYY')
+        self.assertEqual(lignes[2], ('Contrôle', timezone.make_naive(heure), 10.5))
+        self.assertEqual(lignes[3], (None, None, True))
+
+    def test_largeurs(self):
+        feuille = self.relire([['x' * 100, date(2025, 1, 1), 1]]).active
+        self.assertEqual(feuille.column_dimensions['A'].width, 60)
+        self.assertEqual(feuille.column_dimensions['B'].width, 12)
+        self.assertEqual(feuille.column_dimensions['C'].width, 9)
+        commune = self.relire([], largeurs=20).active
+        self.assertEqual(commune.column_dimensions['C'].width, 20)
+
+    def test_reponse(self):
+        reponse = reponse_xlsx('membres.xlsx', 'Membres', ['Code'], (['A%d' % i] for i in range(3000)))
+        self.assertIn('attachment; filename="membres.xlsx"', reponse['Content-Disposition'])
+        classeur = load_workbook(BytesIO(b''.join(reponse.streaming_content)), read_only=True)
+        self.assertEqual(sum(1 for _ in classeur.active.iter_rows()), 3001)
+
+
+class FacettesTests(TestCase):
+    """Facettes de la liste (facettes.py) : compteurs par valeur et chiffres de la liste filtrée."""
+
+    def test_statut_selectionne(self):
+        creer_membre()
+        creer_membre(nom="Tshala", sexe='F')
+        creer_membre(nom="Mutombo", statut='inactif')
+
+        total, facettes = compter_facettes(Membre.objects.all(), {'statut': 'inactif'})
+
+        self.assertEqual(total, 1)
+        # Le compteur de la facette ignore son propre filtre...
+        statuts = {f['valeur']: f['total'] for f in facettes['statut']}
+        self.assertEqual(statuts, {'actif': 2, 'inactif': 1})
+        # ... les chiffres d'en-tête portent sur la liste filtrée
+        self.assertEqual(compte(facettes, 'statut', 'actif'), 0)
+        self.assertEqual(compte(facettes, 'statut', 'inactif'), 1)
+        self.assertEqual(compte(facettes, 'sexe', 'F'), 0)
+        self.assertEqual(compte(facettes, 'sexe', 'M'), 1)
+
+
+class RechercheTests(TestCase):
+    """Recherche des membres (recherche.py) : préfixes FTS5, classement bm25, repli icontains."""
+
+    def setUp(self):
+        creer_membre(nom="Kabila", post_nom="Mwamba", prenom="Jean", province='LUALABA')
+        # Le moins pertinent pour « ilunga » est créé en premier : l'ordre des ids ne classe pas
+        creer_membre(nom="Tshala", post_nom="Ilunga", prenom="Marie", province='KINSHASA')
+        creer_membre(nom="Ilunga", post_nom="Ilunga", prenom="Paul", province='KINSHASA')
+
+    def noms(self, terme, **options):
+        return [m.nom for m in rechercher_membres(Membre.objects.order_by('id'), terme, **options)]
+
+    @skipUnless(SQLITE, "Index plein texte FTS5 (SQLite)")
+    def test_prefixes(self):
+        self.assertEqual(self.noms("kabi lua"), ["KABILA"])
+        self.assertEqual(self.noms("ilun kin"), ["TSHALA", "ILUNGA"])
+        # Préfixes de mots seulement
+        self.assertEqual(self.noms("abila"), [])
+
+    @skipUnless(SQLITE, "Index plein texte FTS5 (SQLite)")
+    def test_classement(self):
+        # « Ilunga » deux fois (nom et post-nom) : plus pertinent
+        self.assertEqual(self.noms("ilunga", classer=True), ["ILUNGA", "TSHALA"])
+        self.assertEqual(self.noms("ilunga marie", classer=True), ["TSHALA"])
+
+    def test_repli_sans_fts(self):
+        with mock.patch('identification.recherche.fts_disponible', return_value=False):
+            self.assertEqual(self.noms("abila"), ["KABILA"])
+            self.assertEqual(self.noms("ilung", classer=True), ["TSHALA", "ILUNGA"])
+
+
+class CodesMembresTests(TestCase):
+    """Attribution des codes (codes.py) : unicité, caractère de contrôle, anciens codes hexadécimaux."""
+
+    HEXADECIMAL = set('0123456789ABCDEF')
+
+    def test_codes_uniques(self):
+        codes = allouer_codes(500) + allouer_codes(500) + [allouer_code() for _ in range(20)]
+        self.assertEqual(len(set(codes)), len(codes))
+        for code in codes:
+            self.assertEqual(len(code), 8)
+            self.assertTrue(set(code) <= set(ALPHABET), code)
+            self.assertTrue(code_valide(code), code)
+        # Un seul compteur, avancé d'au moins un numéro par code
+        self.assertGreaterEqual(SequenceCode.objects.get().valeur, len(codes))
+
+    def test_code_altere_refuse(self):
+        code = allouer_code()
+        self.assertTrue(code_valide(code.lower()))
+        # Toute faute de frappe sur un caractère est détectée...
+        for position in range(len(code)):
+            for caractere in ALPHABET:
+                if caractere == code[position]:
+                    continue
+                altere = code[:position] + caractere + code[position + 1:]
+                if set(altere) <= self.HEXADECIMAL:
+                    continue  # ancien code, accepté tel quel
+                self.assertFalse(code_valide(altere), altere)
+        # ... ainsi que l'inversion de deux caractères voisins différents
+        for position in range(len(code) - 1):
+            a, b = code[position], code[position + 1]
+            inverse = code[:position] + b + a + code[position + 2:]
+            if a != b and not set(inverse) <= self.HEXADECIMAL:
+                self.assertFalse(code_valide(inverse), inverse)
+        self.assertFalse(code_valide(code[:-1]))
+        self.assertFalse(code_valide(code[:-1] + 'I'))
+        self.assertFalse(code_valide(''))
+        self.assertFalse(code_valide(None))
+
+    def test_anciens_codes_hexadecimaux(self):
+        self.assertTrue(code_valide('a1b2c3d4'))
+        # Premier numéro donnant un code hexadécimal : jamais attribué
+        numero = next(n for n in range(1, 100000) if set(code_depuis_numero(n)) <= self.HEXADECIMAL)
+        ecarte = code_depuis_numero(numero)
+        SequenceCode.objects.create(nom='membre', valeur=numero - 1)
+
+        codes = allouer_codes(2)
+
+        self.assertNotIn(ecarte, codes)
+        self.assertEqual(codes, [code_depuis_numero(numero + 1), code_depuis_numero(numero + 2)])
+        for code in codes:
+            self.assertFalse(set(code) <= self.HEXADECIMAL, code)
+        # Le numéro écarté est consommé, puis un numéro de plus réservé
+        self.assertEqual(SequenceCode.objects.get().valeur, numero + 2)
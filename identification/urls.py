@@ -20,12 +20,15 @@ app_name = "identification"
 urlpatterns = [
     path('dashboard/', dashboard, name='dashboard'),
     path('enregistrement/', enregistrement_membre, name='enregistrement_membre'),
+    path('importer/', views.importer_membres, name='importer_membres'),
     path('liste/', liste, name='liste'),
     path("export-excel/", views.export_excel, name="export_excel"),
+    path("export/membres/", views.export_membres, name="export_membres"),
     path('detail/<int:membre_id>/', views.detail_membre, name='detail_membre'),
     path('modifier/<int:membre_id>/', views.modifier_membre, name='modifier_membre'),
     # URL pour générer le PDF d'un membre
     path('membre/<int:membre_id>/pdf/', views.generate_pdf, name='generate_pdf'),
+    path('cartes/lot/', views.generer_cartes_lot, name='generer_cartes_lot'),
     ############################################################################################################
 
     path('carte/<int:membre_id>/', generer_carte, name='generer_carte'),
@@ -33,6 +36,7 @@ urlpatterns = [
     path('supprimer/<int:membre_id>/', supprimer_membre, name='supprimer_membre'),
     path('qrcode/<int:pk>/', afficher_qrcode, name='afficher_qrcode'),
     path('image/<int:membre_id>/<str:field_name>/', get_image, name='get_image'),
+    path('verifier/<str:code>/', views.verifier_carte, name='verifier_carte'),
     ############################################################################################################
     path("reactiver/<int:membre_id>/", views.reactiver_carte, name="reactiver_carte"),
     path('cartes-renouvelees/', views.cartes_renouvelees_liste, name='cartes_renouvelees_liste'),
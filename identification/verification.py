@@ -0,0 +1,98 @@
+# identification/verification.py
+"""
+Vérification d'une carte par son code (lecture du QR code aux points de contrôle).
+
+La fiche d'un code est lue au travers du cache Django (`verification:<code>`) :
+- en cas d'absence, une seule requête `values()` sur l'index unique du code,
+  limitée aux champs utiles (aucune instance Membre n'est construite) ;
+- les codes inconnus sont aussi mis en cache, plus brièvement ;
+- un code mal formé (caractère de contrôle faux) est rejeté sans requête.
+
+La fiche en cache ne contient que des données stables ; la validité (statut
+et date d'expiration comparée au jour) est évaluée à chaque lecture. Le cache
+est invalidé à l'enregistrement / la suppression du membre (signals.py) et
+par le balayage des expirations pour les cartes dont il change l'état.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .codes import code_valide
+from .photos import url_photo
+
+
+DUREE_CACHE = getattr(settings, 'VERIFICATION_CACHE_DUREE', 300)
+DUREE_CACHE_INCONNU = getattr(settings, 'VERIFICATION_CACHE_DUREE_INCONNU', 30)
+
+CHAMPS = (
+    'id', 'code', 'nom', 'post_nom', 'prenom', 'categorie',
+    'statut', 'date_expiration', 'photo', 'photo_derives',
+)
+
+INCONNU = 'inconnu'
+
+
+def normaliser_code(code):
+    return (code or '').strip().upper()
+
+
+def cle_cache(code):
+    return f'verification:{code}'
+
+
+def oublier(*codes):
+    """Retire du cache les fiches des codes donnés."""
+    codes = [normaliser_code(c) for c in codes if c]
+    if codes:
+        cache.delete_many([cle_cache(c) for c in codes])
+
+
+def _charger(code):
+    from .models import Membre
+
+    ligne = Membre.objects.filter(code=code).values(*CHAMPS).first()
+    if ligne is None:
+        return None
+    return {
+        'code': ligne['code'],
+        'nom': ' '.join(filter(None, (ligne['nom'], ligne['post_nom'], ligne['prenom']))),
+        'categorie': ligne['categorie'],
+        'statut': ligne['statut'],
+        'date_expiration': ligne['date_expiration'].isoformat() if ligne['date_expiration'] else None,
+        # URL versionnée de la vignette : le client la garde en cache
+        'photo': url_photo(ligne['id'], ligne['photo'], ligne['photo_derives'], 'vignette'),
+    }
+
+
+def fiche(code):
+    """Fiche en cache du membre de code `code`, ou None s'il n'existe pas."""
+    code = normaliser_code(code)
+    if not code_valide(code):
+        return None
+    cle = cle_cache(code)
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = _charger(code)
+        if resultat is None:
+            cache.set(cle, INCONNU, DUREE_CACHE_INCONNU)
+        else:
+            cache.set(cle, resultat, DUREE_CACHE)
+    return None if resultat == INCONNU else resultat
+
+
+def verifier(code, aujourd_hui=None):
+    """
+    Résultat de vérification : fiche du membre + `valide`, `carte_expiree`
+    (ou None si le code est inconnu).
+    """
+    resultat = fiche(code)
+    if resultat is None:
+        return None
+    aujourd_hui = (aujourd_hui or timezone.now().date()).isoformat()
+    expiration = resultat['date_expiration']
+    expiree = expiration is not None and expiration < aujourd_hui  # dates ISO : ordre lexicographique
+    return {
+        **resultat,
+        'carte_expiree': expiree,
+        'valide': resultat['statut'] == 'actif' and expiration is not None and not expiree,
+    }
@@ -12,51 +12,41 @@ import qrcode
 from PIL import Image, ExifTags
 from .forms import MembreForm
 from .models import Membre
+from .qr import mettre_a_jour_qrcode
 from django.shortcuts import render
 from .models import Membre
 from django.utils import timezone
 from django.db.models import Sum
 from finance.models import Operation
 from finance.models import Contribution
+from .statistiques import obtenir_statistiques
 
 
 # Vue pour le tableau de bord identification
 ##################################################################################################
 
 def dashboard(request):
-    today = timezone.now().date()
+    # Une seule ligne lue : statistiques matérialisées (voir statistiques.py / signals.py)
+    stats = obtenir_statistiques()
 
-    # Membres actifs
-    membres_actifs = Membre.objects.filter(statut="actif").count()
-
-    # Membres inactifs
-    membres_inactifs = Membre.objects.filter(statut="inactif").count()
-
-    # Cartes valides (non expirées)
-    cartes_valides = Membre.objects.filter(date_expiration__gte=today).count()
-
-    # Cartes expirées
-    cartes_expirees = Membre.objects.filter(date_expiration__lt=today).count()
-
-    # Cartes renouvelées
-    cartes_renouvelees = Membre.objects.filter(carte_renouvelee=True).count()
+    membres_actifs = stats.membres_actifs
+    membres_inactifs = stats.membres_inactifs
+    cartes_valides = stats.cartes_valides
+    cartes_expirees = stats.cartes_expirees
+    cartes_renouvelees = stats.cartes_renouvelees
 
     # Duplicatas # Comptage des membres ayant au moins 1 duplicata
-    duplicatas = Membre.objects.filter(duplicata_set__isnull=False).distinct().count()
+    duplicatas = stats.membres_avec_duplicata
 
-    total_contributions = Contribution.objects.aggregate(Sum('montant'))['montant__sum'] or 0
-        
-    # Autres données de statistiques que vous pourriez vouloir
-    nombre_contributions = Contribution.objects.count()
+    total_contributions = stats.total_contributions
+    nombre_contributions = stats.nombre_contributions
     moyenne_contributions = total_contributions / nombre_contributions if nombre_contributions > 0 else 0
 
     # Finance
-    total_entrees = Operation.objects.filter(type_operation="ENTREE").aggregate(Sum('montant'))['montant__sum'] or 0
-    total_sorties = Operation.objects.filter(type_operation="SORTIE").aggregate(Sum('montant'))['montant__sum'] or 0
+    total_entrees = stats.total_entrees
+    total_sorties = stats.total_sorties
     solde = total_entrees - total_sorties
 
-
-
     context = {
         "membres_actifs": membres_actifs,
         "membres_inactifs": membres_inactifs,
@@ -105,10 +95,8 @@ def enregistrement_membre(request):
                 # Sauvegarde initiale
                 membre.save()
                 
-                # Génération du QR code
-                qr_code = generer_qrcode(membre)
-                membre.qrcode.save(f'qrcode_{membre.pk}.png', qr_code)
-                membre.save()
+                # Génération du QR code (écrit avec son empreinte, sans second save())
+                mettre_a_jour_qrcode(membre)
                 
                 enregistrement_reussi = True
                 return redirect('identification:liste')
@@ -134,52 +122,69 @@ def enregistrement_membre(request):
 from django.shortcuts import render
 from django.db.models import Q, Count
 from .models import Membre
+from .pagination import paginer_membres
+from .recherche import rechercher_membres
+from .facettes import facettes_selectionnees, compter_facettes, appliquer_facettes, compte
 
 def liste(request):
     membres = Membre.objects.all()
-     # Membres actifs
-    membres_actifs = Membre.objects.filter(statut="actif").count()
-
-    # Membres inactifs
-    membres_inactifs = Membre.objects.filter(statut="inactif").count()
-
-    # Ajoutez ces lignes dans votre vue
-    hommes_count = Membre.objects.filter(sexe="M").count()
-    femmes_count = Membre.objects.filter(sexe="F").count()
 
     # Recherche
     search_query = request.GET.get('search', '')
     if search_query:
-        membres = membres.filter(
-            Q(nom__icontains=search_query) |
-            Q(post_nom__icontains=search_query) |
-            Q(prenom__icontains=search_query) |
-            Q(code__icontains=search_query) |
-            Q(province__icontains=search_query) |
-            Q(categorie__icontains=search_query) |
-            Q(statut__icontains=search_query)  # ✅ ajouté
-        )
+        # Index plein texte FTS5 (préfixes) au lieu de sept LIKE '%x%'
+        membres = rechercher_membres(membres, search_query)
+
+    # Facettes : province, catégorie, sexe, statut, état de la carte
+    selection = facettes_selectionnees(request)
+
+    # Total + compteurs de toutes les facettes en une seule requête
+    total_membres, facettes = compter_facettes(membres, selection)
+
+    # Chiffres d'en-tête : sur la liste filtrée (toutes les facettes appliquées)
+    membres_actifs = compte(facettes, 'statut', 'actif')
+    membres_inactifs = compte(facettes, 'statut', 'inactif')
+    hommes_count = compte(facettes, 'sexe', 'M')
+    femmes_count = compte(facettes, 'sexe', 'F')
 
     # Tri par date d'enregistrement (du plus récent au plus ancien)
-    membres = membres.order_by('-date_enregistrement')
+    membres = appliquer_facettes(membres, selection).order_by('-date_enregistrement', 'id')
 
-    # Total
-    total_membres = membres.count()
+    # Pagination par curseur : seule la page courante est lue et affichée
+    page_obj = paginer_membres(membres, request)
 
-    # Statistiques (par sexe, catégorie, province)
-    stats_sexes = membres.values('sexe').annotate(total=Count('sexe'))
-    stats_categories = membres.values('categorie').annotate(total=Count('categorie'))
-    stats_provinces = membres.values('province').annotate(total=Count('province'))
-    
+    # Paramètres à conserver dans les liens de pagination
+    query_params = request.GET.copy()
+    for cle in ('after', 'before'):
+        query_params.pop(cle, None)
+
+    # Statistiques (par sexe, catégorie, province) de la liste filtrée, issues des facettes
+    stats_sexes = [{'sexe': f['valeur'], 'total': f['total_filtre']} for f in facettes['sexe'] if f['total_filtre']]
+    stats_categories = [
+        {'categorie': f['valeur'], 'total': f['total_filtre']} for f in facettes['categorie'] if f['total_filtre']
+    ]
+    stats_provinces = [
+        {'province': f['valeur'], 'total': f['total_filtre']} for f in facettes['province'] if f['total_filtre']
+    ]
 
     context = {
-        'membres': membres,
+        'membres': page_obj,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages,
+        'query_params': query_params.urlencode(),
         'total_membres': total_membres,
         'membres_actifs': membres_actifs,  # Ajouté
         'membres_inactifs': membres_inactifs,  # Ajouté
         'hommes_count': hommes_count,
         'femmes_count': femmes_count,
         'search_query': search_query,
+        'facettes': facettes,
+        'selected_categorie': selection.get('categorie', ''),
+        'selected_province': selection.get('province', ''),
+        'selected_sexe': selection.get('sexe', ''),
+        'selected_statut': selection.get('statut', ''),
+        'selected_expiration': selection.get('expiration', ''),
+        'selected_echeance': selection.get('echeance', ''),
         'stats_sexes': stats_sexes,
         'stats_categories': stats_categories,
         'stats_provinces': stats_provinces,
@@ -194,47 +199,95 @@ def liste(request):
 ######################################################################################
 
 
+######################################################################################
+# Import en masse (CSV / XLSX)
+from . import importation
+
+def importer_membres(request):
+    rapport = None
+    erreur = None
+
+    if request.method == 'POST':
+        fichier = request.FILES.get('fichier')
+        if not fichier:
+            erreur = "Choisissez un fichier CSV ou XLSX."
+        else:
+            try:
+                # QR codes encodés dans le processus de la requête (workers=1) ;
+                # les gros fichiers passent par `manage.py importer_membres`
+                rapport = importation.importer_membres(fichier, fichier.name, workers=1)
+            except ValueError as e:
+                erreur = str(e)
+            except Exception as e:
+                erreur = "Le fichier n'a pas pu être lu."
+                print("❌ Erreur lors de l'import :", e)
+
+    return render(request, 'importer.html', {'rapport': rapport, 'erreur': erreur})
+
 ######################################################################################
 # identification/views.py
-from django.http import HttpResponse
-from openpyxl import Workbook
-from .models import Membre
+from .tableur import reponse_xlsx
 
 def export_excel(request):
-    # Création du fichier Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Membres"
-
     # En-têtes du tableau
     headers = [
         "Code", "Nom", "Post-Nom", "Prénom", "Sexe",
         "Catégorie", "Province", "Statut"
     ]
-    ws.append(headers)
 
-    # Récupération des données
+    # Parcours unique de la table, sans charger tous les membres en mémoire
+    membres = Membre.objects.values_list(
+        'code', 'nom', 'post_nom', 'prenom', 'sexe', 'categorie', 'province', 'statut'
+    ).iterator(chunk_size=2000)
+
+    sexes = dict(Membre.SEXE_CHOICES)
+    categories = dict(Membre.CATEGORIE_CHOICES)
+    provinces = dict(Membre.PROVINCE_CHOICES)
+    lignes = (
+        [
+            code,
+            nom,
+            post_nom,
+            prenom,
+            sexes.get(sexe, sexe),
+            categories.get(categorie, categorie),
+            provinces.get(province, province),
+            "Actif" if statut == "actif" else "Inactif"
+        ]
+        for code, nom, post_nom, prenom, sexe, categorie, province, statut in membres
+    )
+
+    # Fichier Excel écrit à mémoire constante (voir tableur.py)
+    return reponse_xlsx("membres.xlsx", "Membres", headers, lignes)
+
+######################################################################################
+# Exports CSV / JSON Lines en streaming (mêmes filtres que la liste)
+from .exports import ParametreInvalide, TAILLE_CHUNK_CURSEUR, filtrer_periode, periode_demandee, reponse_export
+
+COLONNES_EXPORT_MEMBRES = [
+    ('id', 'ID'), ('code', 'Code'), ('nom', 'Nom'), ('post_nom', 'Post-Nom'), ('prenom', 'Prénom'),
+    ('sexe', 'Sexe'), ('date_naissance', 'Date de naissance'), ('lieu_naissance', 'Lieu de naissance'),
+    ('province', 'Province'), ('categorie', 'Catégorie'), ('fonction', 'Fonction'), ('site', 'Site'),
+    ('telephone', 'Téléphone'), ('email', 'Email'), ('statut', 'Statut'),
+    ('date_enregistrement', "Date d'enregistrement"), ('date_expiration', "Date d'expiration"),
+]
+
+def export_membres(request):
+    try:
+        du, au = periode_demandee(request)
+    except ParametreInvalide as e:
+        return HttpResponse(str(e), status=400)
+
     membres = Membre.objects.all()
+    search_query = request.GET.get('search', '')
+    if search_query:
+        membres = rechercher_membres(membres, search_query)
+    membres = appliquer_facettes(membres, facettes_selectionnees(request))
+    membres = filtrer_periode(membres, 'date_enregistrement', du, au).order_by('id')
 
-    for membre in membres:
-        ws.append([
-            membre.code,
-            membre.nom,
-            membre.post_nom,
-            membre.prenom,
-            membre.get_sexe_display(),
-            membre.get_categorie_display(),
-            membre.get_province_display(),
-            "Actif" if membre.statut == "actif" else "Inactif"
-        ])
-
-    # Réponse HTTP avec fichier Excel
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename="membres.xlsx"'
-    wb.save(response)
-    return response
+    # La requête ne s'exécute qu'au premier paquet, après l'envoi de l'en-tête
+    lignes = membres.values_list(*[cle for cle, _ in COLONNES_EXPORT_MEMBRES]).iterator(chunk_size=TAILLE_CHUNK_CURSEUR)
+    return reponse_export(request, 'membres', COLONNES_EXPORT_MEMBRES, lignes)
 
 ######################################################################################
 
@@ -263,10 +316,8 @@ def modifier_membre(request, membre_id):
                 membre.date_mise_a_jour = timezone.now().date()
                 membre.save()
 
-                # ⚡ Si tu veux regénérer un QR code à chaque modification :
-                qr_code = generer_qrcode(membre)
-                membre.qrcode.save(f'qrcode_{membre.pk}.png', qr_code)
-                membre.save()
+                # ⚡ QR code regénéré seulement si son contenu a changé
+                mettre_a_jour_qrcode(membre)
 
                 modification_reussie = True
                 return redirect('identification:detail_membre', membre_id=membre.id)
@@ -292,10 +343,7 @@ def modifier_membre(request, membre_id):
 def generer_carte(request, membre_id):
     membre = get_object_or_404(Membre, id=membre_id)
     
-    if not membre.qrcode:
-        qr_code = generer_qrcode(membre)
-        membre.qrcode.save(f'qrcode_{membre.pk}.png', qr_code)
-        membre.save()
+    mettre_a_jour_qrcode(membre)
     
     return render(request, 'carte.html', {'membre': membre})
 
@@ -305,60 +353,21 @@ def generer_carte(request, membre_id):
 def renouveler_carte(request, membre_id):
     membre = get_object_or_404(Membre, id=membre_id)
     membre.date_mise_a_jour = timezone.now()
-    
-    # Regénérer le QR code
-    qr_code = generer_qrcode(membre)
-    membre.qrcode.save(f'qrcode_{membre.pk}.png', qr_code)
     membre.save()
     
-    return redirect('generer_carte', membre_id=membre.id)
-
-#########################################################################################
-# Fonction pour générer le QR code
-def generer_qrcode(membre, size=200):
-    date_enregistrement = membre.date_enregistrement.strftime('%d-%m-%Y')
-    
-
-    content = (
-    f"Code : {membre.code}\n"
-    f"Nom : {membre.nom}\n"
-    f"Post-Nom : {membre.post_nom}\n"
-    f"Prénom : {membre.prenom}\n"
-    f"Catégorie : {membre.categorie}\n"
-    f"Date d'enregistrement : {date_enregistrement}\n"
-    "À vérifier l’authenticité sur www.renemico.com"
-)
-
+    # Le contenu du QR code ne change pas au renouvellement : réécrit seulement s'il manque
+    mettre_a_jour_qrcode(membre)
     
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(content)
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
-    img = img.resize((size, size))
-
-    image_stream = BytesIO()
-    img.save(image_stream, format='PNG')
-    image_stream.seek(0)
-
-    return ContentFile(image_stream.getvalue(), f'qrcode_{membre.pk}.png')
+    return redirect('generer_carte', membre_id=membre.id)
 
 ##########################################################################################
 # Vue pour afficher le QR code
 def afficher_qrcode(request, pk):
     membre = get_object_or_404(Membre, pk=pk)
     
-    if not membre.qrcode:
-        qr_code = generer_qrcode(membre)
-        membre.qrcode.save(f'qrcode_{membre.pk}.png', qr_code)
-        membre.save()
+    mettre_a_jour_qrcode(membre)
     
-    return HttpResponse(membre.qrcode.read(), content_type="image/png")
+    return servir_fichier(request, membre.qrcode.storage, membre.qrcode.name, content_type="image/png")
 
 ##############################################################################
 
@@ -373,11 +382,16 @@ def supprimer_membre(request, membre_id):
     return render(request, 'supprimer.html', {'membre': membre})
 
 ########################################################################################
-from django.http import HttpResponse
-from PIL import Image, ExifTags
-from io import BytesIO
+from .diffusion import servir_fichier, version_nom
+from .photos import DERIVES, nom_derive, version_photo
 
 def get_image(request, membre_id, field_name):
+    """
+    Photo (ou dérivé ?taille=avatar|vignette|carte) ou QR code d'un membre.
+
+    Les fichiers sont déjà normalisés à l'envoi : ils sont transmis tels quels,
+    avec ETag / Last-Modified (voir diffusion.py).
+    """
     membre = get_object_or_404(Membre, id=membre_id)
 
     if field_name == 'photo':
@@ -390,48 +404,43 @@ def get_image(request, membre_id, field_name):
     if not field_data:
         return HttpResponse("Image non trouvée", status=404)
 
-    try:
-        # Ouvrir l'image
-        image = Image.open(field_data.path)
-
-        # Corriger l'orientation EXIF si nécessaire
-        try:
-            exif = image._getexif()
-            if exif:
-                for orientation in ExifTags.TAGS.keys():
-                    if ExifTags.TAGS[orientation] == 'Orientation':
-                        break
-                
-                orientation_value = exif.get(orientation)
-                
-                if orientation_value == 3:
-                    image = image.rotate(180, expand=True)
-                elif orientation_value == 6:
-                    image = image.rotate(270, expand=True)
-                elif orientation_value == 8:
-                    image = image.rotate(90, expand=True)
-        except:
-            pass
-
-        # Préparer la réponse
-        image_bytes = BytesIO()
-        format_extension = field_data.path.split('.')[-1].lower()
-        
-        if format_extension in ['jpeg', 'jpg']:
-            image_format = 'JPEG'
-        elif format_extension == 'png':
-            image_format = 'PNG'
+    nom = field_data.name
+    taille = request.GET.get('taille')
+    if field_name == 'qrcode':
+        version = version_nom(nom)
+    elif taille:
+        if taille not in DERIVES:
+            return HttpResponse("Taille d'image invalide", status=400)
+        # Photo pas encore traitée par normaliser_photos : l'original fait office de dérivé
+        if membre.photo_derives:
+            version = version_photo(nom, taille)
+            nom = nom_derive(nom, taille)
         else:
-            return HttpResponse("Format d'image non supporté", status=400)
+            version = version_photo(nom)
+    else:
+        version = version_photo(nom)
 
-        image.save(image_bytes, format=image_format)
-        image_bytes.seek(0)
+    return servir_fichier(request, field_data.storage, nom, version=version)
 
-        return HttpResponse(image_bytes.read(), content_type=f"image/{image_format.lower()}")
+##############################################################################################################
+# Vérification d'une carte par son code (QR code scanné aux points de contrôle)
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+from .verification import verifier
+
+@require_GET
+def verifier_carte(request, code):
+    """Validité, statut, expiration et vignette du membre : lecture au travers du cache."""
+    resultat = verifier(code)
+    if resultat is None:
+        reponse = JsonResponse({'code': code, 'valide': False, 'motif': 'Carte inconnue'}, status=404)
+    else:
+        reponse = JsonResponse(resultat)
+    # Le statut peut changer à tout moment : pas de cache côté client
+    patch_cache_control(reponse, private=True, no_store=True)
+    return reponse
 
-    except Exception as e:
-        return HttpResponse(f"Erreur de traitement de l'image: {str(e)}", status=500)
-    
 ##############################################################################################################
 from django.shortcuts import get_object_or_404, redirect
 from django.utils import timezone
@@ -459,6 +468,8 @@ def reactiver_carte(request, membre_id):
         membre.date_expiration = nouvelle_expiration
         membre.statut = "actif"
         membre.save()
+        # La date d'expiration fait partie de la charge signée : nouveau QR code
+        mettre_a_jour_qrcode(membre)
         messages.success(
             request,
             f"La carte de {membre.nom} {membre.post_nom} a été réactivée avec succès jusqu'au {membre.date_expiration:%d/%m/%Y}."
@@ -511,352 +522,63 @@ def duplicata_liste(request):
     return render(request, "duplicata_liste.html", context)
 
 ##############################################################################################################
-# 1. IMPORTS
-from django.http import HttpResponse
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.lib.pagesizes import A4, landscape
-from io import BytesIO
+# Carte de membre en PDF (le dessin est dans cartes.py)
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Membre
-import os
 from datetime import datetime
-from reportlab.lib.colors import black, red, blue
-from reportlab.lib.utils import ImageReader
-from PIL import Image, ImageEnhance
-from django.contrib.staticfiles import finders
-from PIL import Image as PILImage
+import tempfile
+from .models import Membre
+from .cartes import rendre_carte_pdf, selectionner_membres, generer_lot_pdf, generer_lot_zip
 
 def generate_pdf(request, membre_id):
     # Récupérer les données du membre
     membre = get_object_or_404(Membre, id=membre_id)
+    return HttpResponse(rendre_carte_pdf(membre), content_type='application/pdf')
 
-    # Création du PDF en format paysage
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=landscape(A4))
-    width, height = landscape(A4)
-
-    # Chemin pour le logo
-    logo_path = finders.find('images/logo2.png')  # Rechercher le fichier dans les fichiers statiques
-
-    if logo_path:  # Si le logo est trouvé
-        c.drawImage(logo_path, width - 145, height - 140, width=1.9*inch, height=1.9*inch)
-    else:
-        c.drawString(width - 180, height - 100, "Logo non disponible")
-
-    # Agrandissement et placement des en-têtes, centrés sur la gauche
-    c.setFont("Helvetica-Bold", 25)  # Taille augmentée pour plus de lisibilité
-    c.setFillColor(black)  # Définir la couleur du texte sur noir
-    c.drawCentredString(width / 2 - 65, height - 53, "REPUBLIQUE DEMOCRATIQUE DU CONGO")
-
-    c.setFont("Helvetica-Bold", 24)
-    c.setFillColor(blue)  # Définir la couleur du texte sur rouge
-    c.drawCentredString(width / 2 - 65, height - 83, "REGROUPEMENT DES NEGOCIANTS MINIERS DU CONGO")
-
-    c.setFont("Helvetica-Bold", 36)
-    c.setFillColor(red)  # Définir la couleur du texte sur bleu
-    c.drawCentredString(width / 2 - 65, height - 123, "RENEMICO")
-
-    c.setFont("Helvetica-Bold", 15)
-    c.setFillColor(black)  # Définir la couleur du texte sur noir
-    c.drawCentredString(width / 2 - 65, height - 143, "*******************************************************************************************************************")
-
-    c.setFont("Helvetica-Bold", 40)
-    c.setFillColor(blue)  # Définir la couleur du texte sur bleu
-    c.drawCentredString(width / 2 - 65, height - 178, "CARTE DE MEMBRE")
-
-    # === Ajouter un logo en arrière-plan (filigrane) ===
-
-
-    # chemin vers ton logo
-    watermark_path = finders.find('images/logo2.png')
-
-    if watermark_path and os.path.exists(watermark_path):
-        # Ouvrir avec PIL
-        wm_img = Image.open(watermark_path).convert("RGBA")
-
-        # Réduire l’opacité (0 = transparent, 1 = opaque)
-        alpha = 0.12  
-        enhancer = ImageEnhance.Brightness(wm_img.split()[3])  # canal alpha
-        wm_img.putalpha(enhancer.enhance(alpha))
-
-        # Sauvegarde temporaire en PNG (avec transparence)
-        temp_wm = "temp_watermark.png"
-        wm_img.save(temp_wm, format="PNG")
-
-        # Placer au centre de la page
-        wm_reader = ImageReader(temp_wm)
-        c.drawImage(
-            wm_reader,
-            100, 100,  # position bas-gauche (ajuste selon besoin)
-            width - 200, height - 200,  # couvre presque toute la page
-            mask="auto"
-        )
-
-        # Supprimer le temporaire
-        os.remove(temp_wm)
-
-    # Placer la photo du membre à gauche
-
-    if membre.photo:
-        photo_path = membre.photo.path
-        if os.path.exists(photo_path):
-            # Ouvrir l'image avec PIL pour vérifier l'orientation
-            img = Image.open(photo_path)
-
-            # Vérifier et appliquer la rotation en fonction des métadonnées EXIF
-            try:
-                # Récupérer les métadonnées EXIF
-                exif = img._getexif()
-                if exif is not None:
-                    orientation = exif.get(0x0112)
-
-                    # Appliquer la rotation nécessaire
-                    if orientation == 3:
-                        img = img.rotate(180, expand=True)
-                    elif orientation == 6:
-                        img = img.rotate(270, expand=True)
-                    elif orientation == 8:
-                        img = img.rotate(90, expand=True)
-            except (AttributeError, KeyError, IndexError):
-                # Pas de métadonnées EXIF ou erreur de lecture
-                pass
-
-            # Convertir en RGB si l'image a un canal alpha (RGBA)
-            if img.mode in ('RGBA', 'LA'):
-                # Créer un fond blanc
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                # Coller l'image sur le fond blanc en préservant l'alpha
-                background.paste(img, mask=img.split()[-1])
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            # Sauvegarder temporairement l'image corrigée
-            temp_path = "temp_rotated_photo.jpg"
-            img.save(temp_path, format='JPEG', quality=95)
-
-            # Dessiner l'image dans le PDF
-            c.drawImage(temp_path, 10, height - 450, width=2.5*inch, height=3.4*inch)
-
-            # Supprimer le fichier temporaire
-            os.remove(temp_path)
-        else:
-            c.drawString(60, height - 430, "Photo non disponible")
-
-
-    # Largeur fixe pour les labels
-    label_width = 180  # largeur réservée pour le texte des labels
-    x_start = 200      # position de départ horizontale
-    x_value_start = x_start + label_width  # position pour les valeurs
-    x_second_column = 700  # position pour SEXE (deuxième colonne)
-
-    # Préparer les informations (sans SEXE, car on le gère à part avec NOM)
-    info_lines = [
-        ("NOM", f"{membre.nom.upper()}"),
-        ("POST-NOM", f"{membre.post_nom.upper()}"),
-        ("PRÉNOM", f"{membre.prenom.upper()}"),
-        ("PROVINCE", f"{membre.get_province_display().upper()}"),
-        ("FONCTION", f"{membre.fonction.upper() if hasattr(membre, 'fonction') else 'NON RENSEIGNÉ'}"),
-        ("CATÉGORIE", f"{membre.get_categorie_display().upper()}"), 
-    ]
-
-    # Position verticale de départ
-    y_position = height - 225
-    line_spacing = 45  # espacement entre les lignes
-
-    # Boucle pour dessiner chaque ligne
-    for label, value in info_lines:
-        c.setFont("Helvetica-Bold", 25)
-        c.setFillColor(black)  # couleur noire pour labels et valeurs
-
-        # Dessiner le label
-        c.drawString(x_start, y_position, label)
-
-        # Dessiner la valeur suivie de ":" (collé à la valeur)
-        value_text = f": {value}"
-        c.drawString(x_value_start, y_position, value_text)
-
-        # Cas spécial : NOM → ajouter SEXE à droite (seulement F ou M)
-        if label == "NOM":
-            sexe_label = "SEXE"
-            sexe_value = "M" if membre.get_sexe_display().upper().startswith("M") else "F"
-
-            gap = 10  # petit espace entre label et valeur
-
-            # dessiner le label SEXE
-            c.drawString(x_second_column, y_position, sexe_label)
-
-            # mesurer largeur du label
-            label_width_sexe = c.stringWidth(sexe_label, "Helvetica-Bold", 28)
-
-            # dessiner la valeur juste après le label
-            c.drawString(x_second_column + label_width_sexe + gap, y_position, f": {sexe_value}")
-
-
-        # Descendre pour la ligne suivante
-        y_position -= line_spacing
-
-    # Informations
-    code_membre = membre.code
-    date_enregistrement = membre.date_enregistrement.strftime('%d-%m-%Y')
-    date_expiration = membre.date_expiration.strftime('%d-%m-%Y') if membre.date_expiration else "NON DÉFINIE"
-
-    # Modifier la police et ajuster la position
-    c.setFont("Helvetica-Bold", 20)
-    c.setFillColor(red)
-    y_position -= 2  # Espacement avant d'ajouter ces informations
-
-    # Positions horizontales pour chaque info
-    x_code = 20
-    x_delivree = 200
-    x_expiration = 500
-
-    # Afficher les titres sur la même ligne
-    c.drawString(x_code, y_position, "CODE")
-    c.drawString(x_delivree, y_position, "Délivrée le")
-    c.drawString(x_expiration, y_position, "Expiration")
-
-    # Espacement vertical pour les valeurs
-    y_position -= 25
-
-    # Changer couleur pour les valeurs
-    c.setFont("Helvetica-Bold", 16)
-    c.setFillColor(black)
-
-    # Afficher les valeurs en dessous des titres correspondants
-    c.drawString(x_code, y_position, code_membre.upper())
-    c.drawString(x_delivree, y_position, date_enregistrement)
-    c.drawString(x_expiration, y_position, date_expiration)
-
-
-    # === Nouvelle image à ajouter ===
-    logo_path = finders.find('images/pca.png')  # Remplacez par votre image
-
-    if logo_path:  # Si le logo est trouvé
-        c.drawImage(logo_path, 655, height - 500, width=2.5*inch, height=2.5*inch, mask='auto')  # 'mask=auto' pour gérer la transparence
-    else:
-        c.drawString(480, height - 578, "Logo non disponible")
-    
-    
-
-    ##########################################################################################
-
-    # Dessiner une nouvelle page pour le verso
-    c.showPage()
-    # === Ajouter un logo en arrière-plan (filigrane) ===
-
-
-    # chemin vers ton logo
-    watermark_path = finders.find('images/logo2.png')
-
-    if watermark_path and os.path.exists(watermark_path):
-        # Ouvrir avec PIL
-        wm_img = Image.open(watermark_path).convert("RGBA")
-
-        # Réduire l’opacité (0 = transparent, 1 = opaque)
-        alpha = 0.12  
-        enhancer = ImageEnhance.Brightness(wm_img.split()[3])  # canal alpha
-        wm_img.putalpha(enhancer.enhance(alpha))
-
-        # Sauvegarde temporaire en PNG (avec transparence)
-        temp_wm = "temp_watermark.png"
-        wm_img.save(temp_wm, format="PNG")
-
-        # Placer au centre de la page
-        wm_reader = ImageReader(temp_wm)
-        c.drawImage(
-            wm_reader,
-            100, 100,  # position bas-gauche (ajuste selon besoin)
-            width - 200, height - 200,  # couvre presque toute la page
-            mask="auto"
-        )
-
-        # Supprimer le temporaire
-        os.remove(temp_wm)
-
-    # Placer le QR code à gauche, sous la photo ou à côté des infos
-    if membre.qrcode:
-        qrcode_path = membre.qrcode.path
-        if os.path.exists(qrcode_path):
-            # Ajuster la position et la taille
-            qr_x = 10       # distance depuis le bord gauche
-            qr_y = height - 225  # ajuster selon la position verticale souhaitée
-            qr_width = 3*inch   # largeur agrandie
-            qr_height = 3*inch  # hauteur agrandie
-            c.drawImage(qrcode_path, qr_x, qr_y, width=qr_width, height=qr_height)
-        else:
-            c.drawString(10, height - 500, "QR Code non disponible")
-
-    # === DRC ===
-    logo_path = finders.find('images/am.png')  # Remplacez par votre image
-
-    if logo_path:  # Si le logo est trouvé
-        c.drawImage(logo_path, 700, height - 170, width=1.8*inch, height=1.8*inch, mask='auto')  # 'mask=auto' pour gérer la transparence
-    else:
-        c.drawString(480, height - 578, "Logo non disponible")
-
-    #################################################################################################################################
-
-    # Informations
-    # Données fictives
-    code_membre = membre.code
-    site_membre = membre.site
-
-    # Définir police et couleur
-    c.setFont("Helvetica-Bold", 20)
-    c.setFillColor(black)
-
-    # Position de départ (haut de page - marge)
-    y_position = height - 120  
-
-    # Décaler vers la droite (par ex. 350px depuis la gauche)
-    x_label = width - 600   # position des labels
-    x_value = width - 375    # position des valeurs à droite
-
-
-    # Afficher Code
-    c.drawString(x_label, y_position, "Code Membre")
-    c.drawString(x_value, y_position, f": {code_membre}")
-
-    # Ligne suivante pour Site
-    y_position -= 40
-    c.drawString(x_label, y_position, "Secteur d'Activité (Site)")
-    c.drawString(x_value, y_position, f": {site_membre}")
-
-
-    # === Nouvelle image à ajouter ===
-    logo_path = finders.find('images/ap.png')
-
-    if logo_path and os.path.exists(logo_path):
-        # Ouvrir l'image avec PIL pour récupérer ses dimensions
-        img = PILImage.open(logo_path)
-        orig_width, orig_height = img.size
-
-        # Nouvelle largeur souhaitée
-        new_width = 11.7*inch  # exemple : augmenter largeur
-
-        # Calcul de la hauteur pour garder le ratio
-        new_height = (orig_height / orig_width) * new_width
-
-        # Dessiner l'image dans le PDF
-        c.drawImage(logo_path, 0, height - 350, width=new_width, height=new_height, mask='auto')
-    else:
-        c.drawString(480, height - 578, "Logo non disponible")
-
-
-
-
-    c.setFont("Helvetica-Bold", 25)
-    c.setFillColor(black)  # Définir la couleur du texte sur black
-    c.drawCentredString(width / 2 , height - 480, "Les autorités tant civiles que militaires sont priées d'apporter")
+##############################################################################################################
+# Cartes en lot : ?province=&categorie=&expire_avant=AAAA-MM-JJ&ids=1,2,3&format=pdf|zip
 
-    c.setFont("Helvetica-Bold", 25)
-    c.setFillColor(black)  # Définir la couleur du texte sur black
-    c.drawCentredString(width / 2 , height - 510, "leur assistance au porteur de la présente")
+def generer_cartes_lot(request):
+    province = request.GET.get('province') or None
+    categorie = request.GET.get('categorie') or None
+    format_sortie = request.GET.get('format', 'pdf')
 
-    # Finaliser le PDF
-    c.save()
+    expire_avant = None
+    if request.GET.get('expire_avant'):
+        try:
+            expire_avant = datetime.strptime(request.GET['expire_avant'], '%Y-%m-%d').date()
+        except ValueError:
+            return HttpResponse("Date invalide (format attendu : AAAA-MM-JJ)", status=400)
 
-    buffer.seek(0)
-    return HttpResponse(buffer, content_type='application/pdf')
\ No newline at end of file
+    ids = None
+    if request.GET.get('ids'):
+        try:
+            ids = [int(i) for i in request.GET['ids'].split(',') if i.strip()]
+        except ValueError:
+            return HttpResponse("Liste d'identifiants invalide", status=400)
+
+    if not any([province, categorie, expire_avant, ids]):
+        return HttpResponse("Indiquez au moins un filtre (province, categorie, expire_avant ou ids)", status=400)
+
+    membres = selectionner_membres(province=province, categorie=categorie, expire_avant=expire_avant, ids=ids)
+    if not membres.exists():
+        return HttpResponse("Aucun membre ne correspond à ces critères", status=404)
+
+    # Rendu dans le processus de la requête (workers=1) : pas de pool forké ni de
+    # connexions fermées en cours de requête ; les gros lots passent par
+    # `manage.py generer_cartes`
+    if format_sortie == 'zip':
+        # Le ZIP part au fil des cartes terminées : le téléchargement avance avec le lot
+        response = StreamingHttpResponse(generer_lot_zip(membres, workers=1), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="cartes_membres.zip"'
+        return response
+
+    # PDF écrit dans un fichier temporaire plutôt qu'en mémoire
+    fichier = tempfile.TemporaryFile()
+    try:
+        generer_lot_pdf(membres, fichier, workers=1)
+    except BaseException:
+        fichier.close()
+        raise
+    fichier.seek(0)
+    return FileResponse(fichier, as_attachment=True, filename="cartes_membres.pdf", content_type='application/pdf')